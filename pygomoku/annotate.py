@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Batch analysis of many positions on a pool of worker processes, and
+annotation of archived games with it
+"""
+
+import argparse
+import json
+import os
+import random
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from pygomoku.arena import AI_CLASSES, create_ai, parse_ai_spec, \
+    search_board_cls
+from pygomoku.models.bitboard import CIRCLE, CROSS
+from pygomoku.models.board import RatedBoard
+from pygomoku.models.record import GameRecord, format_move, iter_records
+from pygomoku.models.tile import TileModel
+
+PARALLEL_ERROR = "The positions are already analysed in parallel, " \
+                 "use minimax"
+
+
+class Analysis(namedtuple("Analysis", ["index", "size", "cross_turn",
+                                       "move", "rating",
+                                       "principal_variation", "stats"])):
+    """
+    The result of analysing the `index`-th position (on a board of
+    `size`): the best `move`
+    for the side to move, the `rating` (cross maximizes) and
+    `principal_variation` of the search (None and empty if the AI doesn't
+    search or the game is over) and the search statistics
+    (SearchStats.as_dict)
+    """
+    __slots__ = ()
+
+
+_worker_ai_args = None  # (spec, options) of the worker AIs
+_worker_ais = {}  # Size -> AI searching the positions of that size
+_worker_boards = {}  # Size -> board reused for the positions of that size
+
+
+def _init_worker(spec, ai_options):
+    global _worker_ai_args
+
+    # The AIs (with their transposition tables, whose keys don't include
+    # the size) are kept for all positions of their size
+    _worker_ai_args = (spec, ai_options)
+
+
+def _analyze_position(index, size, crosses, circles, cross_turn, seed):
+    """
+    Set the position up and search it by the worker AI
+    """
+    board = _worker_boards.get(size)
+    if board is None:
+        board = _worker_boards[size] = RatedBoard(size, view=False)
+    else:
+        board.reset()
+
+    for moves, symbol in ((crosses, TileModel.Symbols.CROSS),
+                          (circles, TileModel.Symbols.CIRCLE)):
+        for move in moves:
+            if not board.place(*move, symbol):
+                raise ValueError(f"position {index}: move {move} "
+                                 f"is not possible")
+
+    if board.win_info:
+        # The game is over, there is nothing to analyse
+        return Analysis(index, size, cross_turn, None, None, [], {})
+
+    random.seed(seed)
+    ai = _worker_ais.get(size)
+    if ai is None:
+        spec, ai_options = _worker_ai_args
+        ai = _worker_ais[size] = create_ai(spec, board, **ai_options)
+    ai.board = board
+    move = ai.get_move(cross_turn)
+
+    return Analysis(index, size, cross_turn, move,
+                    getattr(ai, "rating", None),
+                    list(getattr(ai, "principal_variation", [])),
+                    ai.stats.as_dict())
+
+
+def split_position(position, size):
+    """
+    Return (size, crosses, circles, cross_turn) of `position`, which is
+    a GameRecord, a list of moves (x, y) starting with cross (on a board
+    of `size`), or a size x size array of symbol codes
+    (see bitboard.SYMBOL_CODES, e.g. a row of batch.positions_array)
+    """
+    if isinstance(position, GameRecord):
+        size, moves = position.size, position.moves
+    else:
+        rows = list(position)
+        if rows and len(rows[0]) != 2:
+            # An array of symbol codes, the side with less stones moves
+            crosses = []
+            circles = []
+            for x, row in enumerate(rows):
+                for y, code in enumerate(row):
+                    if code == CROSS:
+                        crosses.append((x, y))
+                    elif code == CIRCLE:
+                        circles.append((x, y))
+            return len(rows), crosses, circles, \
+                len(crosses) == len(circles)
+        moves = [tuple(move) for move in rows]
+
+    return size, moves[0::2], moves[1::2], len(moves) % 2 == 0
+
+
+def analyze_positions(positions, spec, size=15, workers=None,
+                      max_in_flight=None, seed=0, **ai_options):
+    """
+    Analyse `positions` (any iterable, see split_position) by the AI
+    described by `spec` ("name[:depth]", see arena.create_ai, which
+    also takes `ai_options`) on `workers` processes (all CPUs by
+    default).
+
+    Generates an Analysis of each position as soon as it is finished,
+    so not in the order of `positions`. At most `max_in_flight`
+    positions (twice the number of workers by default) are submitted
+    at once, the rest of `positions` is only read as results are taken,
+    so an arbitrarily long stream can be analysed in bounded memory.
+    Positions are seeded by `seed` and their index, so random AIs are
+    repeatable.
+    """
+    # Fail early on unknown AIs and boards
+    if parse_ai_spec(spec)[0] == "parallel":
+        raise ValueError(PARALLEL_ERROR)
+    search_board_cls(ai_options.get("bitboard"), ai_options.get("patterns"),
+                     ai_options.get("sparse"))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if max_in_flight is None:
+        max_in_flight = 2 * workers
+
+    executor = ProcessPoolExecutor(max_workers=workers,
+                                   initializer=_init_worker,
+                                   initargs=(spec, ai_options))
+    in_flight = set()
+    try:
+        for index, position in enumerate(positions):
+            if len(in_flight) >= max_in_flight:
+                done, in_flight = wait(in_flight,
+                                       return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+            in_flight.add(executor.submit(
+                _analyze_position, index, *split_position(position, size),
+                seed + index))
+
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    finally:
+        # Also when the caller stops early, skip the unstarted positions
+        for future in in_flight:
+            future.cancel()
+        executor.shutdown()
+
+
+def game_positions(records):
+    """
+    Generate tuples (game index, ply, played move, position) of every
+    position before a move of the games `records`, the position is
+    a GameRecord of the moves played before
+    """
+    for game_index, record in enumerate(records):
+        for ply, move in enumerate(record.moves):
+            yield game_index, ply, move, \
+                GameRecord(record.size, record.moves[:ply], record.rules)
+
+
+def annotate_games(records, spec, workers=None, max_in_flight=None,
+                   seed=0, **ai_options):
+    """
+    Analyse every position of the games `records` (see game_positions),
+    generate tuples (game index, ply, played move, Analysis) as the
+    positions are finished
+    """
+    in_flight = {}  # Index -> (game index, ply, played move)
+
+    def positions():
+        for index, (game_index, ply, move, position) in \
+                enumerate(game_positions(records)):
+            in_flight[index] = (game_index, ply, move)
+            yield position
+
+    for analysis in analyze_positions(positions(), spec, workers=workers,
+                                      max_in_flight=max_in_flight,
+                                      seed=seed, **ai_options):
+        yield (*in_flight.pop(analysis.index), analysis)
+
+
+def annotation_json(game_index, ply, played, analysis, with_stats=False):
+    """
+    Return the annotation of a game position as a JSON serializable dict
+    (moves in the notation of game records)
+    """
+    def notation(move):
+        return format_move(move, analysis.size) if move is not None else None
+
+    annotation = {
+        "game": game_index,
+        "ply": ply,
+        "played": notation(played),
+        "best": notation(analysis.move),
+        "rating": analysis.rating,
+        "pv": [notation(move) for move in analysis.principal_variation],
+        "nodes": analysis.stats.get("nodes", 0),
+    }
+    if with_stats:
+        annotation["stats"] = analysis.stats
+    return annotation
+
+
+def main(argv=None):
+    """
+    Annotation entry point
+    """
+    parser = argparse.ArgumentParser(
+        description="Annotate archived games by an AI, every position is "
+                    "printed as a JSON line when its analysis finishes.")
+    parser.add_argument("archive", help="game archive (see --record of "
+                                        "pygomoku-arena)")
+    parser.add_argument("--ai", default="combined:4",
+                        help="AI name[:depth], one of "
+                             f"{', '.join(AI_CLASSES)}")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="worker processes (default: all CPUs)")
+    parser.add_argument("--in-flight", type=int, default=None,
+                        help="positions analysed at once "
+                             "(default: twice the workers)")
+    parser.add_argument("--seed", type=int, default=0)
+    boards = parser.add_mutually_exclusive_group()
+    boards.add_argument("--bitboard", action="store_true",
+                        help="search on BitBoard")
+    boards.add_argument("--patterns", action="store_true",
+                        help="search on PatternBoard (pattern evaluation)")
+    boards.add_argument("--sparse", action="store_true",
+                        help="search on SparseBoard")
+    parser.add_argument("--time-limit", type=int, default=None,
+                        metavar="MS", help="time limit per position")
+    parser.add_argument("--stats", action="store_true",
+                        help="include all search statistics")
+    args = parser.parse_args(argv)
+
+    try:
+        name, _ = parse_ai_spec(args.ai)
+    except ValueError as error:
+        parser.error(str(error))
+    if name == "parallel":
+        parser.error(PARALLEL_ERROR)
+
+    annotations = annotate_games(iter_records(args.archive), args.ai,
+                                 workers=args.workers,
+                                 max_in_flight=args.in_flight,
+                                 seed=args.seed, bitboard=args.bitboard,
+                                 time_limit_ms=args.time_limit,
+                                 patterns=args.patterns, sparse=args.sparse)
+    for game_index, ply, played, analysis in annotations:
+        annotation = annotation_json(game_index, ply, played, analysis,
+                                     args.stats)
+        print(json.dumps(annotation), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Headless arena, plays AIs against each other and measures them
+"""
+
+import argparse
+import json
+import random
+from time import perf_counter
+
+from pygomoku.models.ai import RandomAI, RuleAI, MinimaxAI, CombinedAI
+from pygomoku.models.bitboard import BitBoard
+from pygomoku.models.game import Game
+from pygomoku.models.parallel import ParallelMinimaxAI
+from pygomoku.models.patterns import PatternBoard
+from pygomoku.models.record import GameRecord, RecordWriter
+from pygomoku.models.sparse import SparseBoard
+from pygomoku.models.stats import SearchStats
+from pygomoku.models.tile import TileModel
+
+AI_CLASSES = {
+    "random": RandomAI,
+    "rule": RuleAI,
+    "minimax": MinimaxAI,
+    "combined": CombinedAI,
+    "parallel": ParallelMinimaxAI,  # Minimax on worker processes
+}
+SEARCHING_AIS = ("minimax", "combined", "parallel")
+
+
+def parse_ai_spec(spec):
+    """
+    Parse an AI specification "name[:depth]" into (name, depth)
+    """
+    name, _, depth = spec.partition(":")
+    if name not in AI_CLASSES:
+        raise ValueError(f"Unknown AI '{name}', choose from "
+                         f"{', '.join(AI_CLASSES)}")
+
+    if name in SEARCHING_AIS:
+        return name, int(depth) if depth else 4
+    return name, None
+
+
+def search_board_cls(bitboard=False, patterns=False, sparse=False):
+    """
+    Return the board class searched on by the chosen option (None to
+    search a clone of the board), at most one can be chosen
+    """
+    chosen = [board_cls for option, board_cls in
+              ((bitboard, BitBoard), (patterns, PatternBoard),
+               (sparse, SparseBoard)) if option]
+    if len(chosen) > 1:
+        raise ValueError("Choose at most one of bitboard, patterns "
+                         "and sparse")
+    return chosen[0] if chosen else None
+
+
+def create_ai(spec, board, bitboard=False, time_limit_ms=None,
+              patterns=False, sparse=False, workers=None):
+    """
+    Create the AI described by `spec` playing on `board`, the parallel
+    AI searches on `workers` processes (all CPUs by default). Call
+    `close()` of the AI when it is not needed any more.
+    """
+    name, depth = parse_ai_spec(spec)
+    board_cls = search_board_cls(bitboard, patterns, sparse)
+    cls = AI_CLASSES[name]
+
+    if name not in SEARCHING_AIS:
+        return cls(board)
+    if cls is ParallelMinimaxAI:
+        return cls(board, depth, board_cls=board_cls,
+                   time_limit_ms=time_limit_ms, workers=workers)
+
+    return cls(board, depth, board_cls=board_cls,
+               time_limit_ms=time_limit_ms)
+
+
+def percentile(values, percent):
+    """
+    Return the `percent`-th percentile of `values` (nearest rank)
+    """
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    rank = round(percent / 100 * (len(ordered) - 1))
+    return ordered[rank]
+
+
+class PlayerStats:
+    """
+    Results and search statistics of one AI over all games
+    """
+    def __init__(self, spec):
+        self.spec = spec
+        self.wins = 0
+        self.losses = 0
+        self.draws = 0
+        self.search_stats = SearchStats()
+        self.move_times = []  # Seconds
+
+    @property
+    def nodes(self):
+        """
+        Positions searched in all moves
+        """
+        return self.search_stats.nodes
+
+    def add_move(self, seconds, search_stats):
+        """
+        Record one played move
+        """
+        self.move_times.append(seconds)
+        self.search_stats.merge(search_stats)
+
+    def summary(self):
+        """
+        Return the statistics as a dict
+        """
+        games = self.wins + self.losses + self.draws
+        search_time = sum(self.move_times)
+        latencies_ms = [seconds * 1000 for seconds in self.move_times]
+
+        return {
+            "ai": self.spec,
+            "games": games,
+            "wins": self.wins,
+            "losses": self.losses,
+            "draws": self.draws,
+            "win_rate": self.wins / games if games else 0.0,
+            "moves": len(self.move_times),
+            "nodes": self.nodes,
+            "nodes_per_second": self.nodes / search_time
+                                if search_time else 0.0,
+            "cutoffs": self.search_stats.cutoffs,
+            "first_move_cutoff_rate":
+                self.search_stats.first_move_cutoff_rate,
+            "latency_ms": {
+                "p50": percentile(latencies_ms, 50),
+                "p90": percentile(latencies_ms, 90),
+                "p99": percentile(latencies_ms, 99),
+                "max": max(latencies_ms, default=0.0),
+            },
+        }
+
+
+def play_game(game, cross_ai, circle_ai, cross_stats, circle_stats,
+              max_moves=None):
+    """
+    Play one game between two AIs bound to `game.board`.
+
+    Returns True if cross won, False if circle won and None for a draw.
+    """
+    game.new_game()
+
+    size = game.board.size
+    if max_moves is None:
+        max_moves = size * size
+
+    for _ in range(max_moves):
+        if not game.active.get():
+            break
+
+        cross_turn = game.cross_turn
+        ai, stats = (cross_ai, cross_stats) if cross_turn \
+            else (circle_ai, circle_stats)
+
+        start = perf_counter()
+        move = ai.get_move(cross_turn)
+        stats.add_move(perf_counter() - start, ai.stats)
+
+        game.play_move(*move)
+        if game.cross_turn == cross_turn and game.active.get():
+            # The move was not accepted, the AI forfeits
+            return not cross_turn
+
+    win_info = game.board.win_info
+    if not win_info:
+        return None
+
+    _, _, symbol = win_info
+    return symbol == TileModel.Symbols.CROSS
+
+
+def run_arena(first_spec, second_spec, games, size=15, seed=0,
+              bitboard=False, time_limit_ms=None, max_moves=None,
+              patterns=False, sparse=False, record_writer=None,
+              workers=None):
+    """
+    Play `games` games between two AIs, swapping symbols after each game
+    (the first AI plays cross in the first game). The games are written
+    to `record_writer` (a RecordWriter), if given. With `sparse`, the
+    games are also played on a SparseBoard. Parallel AIs search on
+    `workers` processes.
+
+    Games are seeded by `seed` and their index, so runs are repeatable.
+    Returns PlayerStats of both AIs.
+    """
+    search_board_cls(bitboard, patterns, sparse)  # Fail before playing
+    game = Game(size, sparse=sparse)
+    game.set_multiplayer(True)  # Moves of both sides are played by us
+
+    first_stats = PlayerStats(first_spec)
+    second_stats = PlayerStats(second_spec)
+
+    for game_index in range(games):
+        random.seed(seed + game_index)
+
+        first_ai = create_ai(first_spec, game.board, bitboard, time_limit_ms,
+                             patterns, sparse, workers)
+        second_ai = create_ai(second_spec, game.board, bitboard,
+                              time_limit_ms, patterns, sparse, workers)
+
+        if game_index % 2 == 0:
+            players = (first_ai, second_ai, first_stats, second_stats)
+        else:
+            players = (second_ai, first_ai, second_stats, first_stats)
+
+        try:
+            cross_won = play_game(game, *players, max_moves=max_moves)
+        finally:
+            first_ai.close()
+            second_ai.close()
+        if record_writer is not None:
+            record_writer.write(GameRecord.from_board(game.board))
+        _, _, cross_stats, circle_stats = players
+
+        if cross_won is None:
+            cross_stats.draws += 1
+            circle_stats.draws += 1
+        elif cross_won:
+            cross_stats.wins += 1
+            circle_stats.losses += 1
+        else:
+            cross_stats.losses += 1
+            circle_stats.wins += 1
+
+    return first_stats, second_stats
+
+
+def format_summary(summary):
+    """
+    Return a human readable report of PlayerStats.summary()
+    """
+    latency = summary["latency_ms"]
+    return (
+        f"{summary['ai']}: {summary['wins']}W {summary['losses']}L "
+        f"{summary['draws']}D (win rate {summary['win_rate']:.0%})\n"
+        f"  moves {summary['moves']}, nodes {summary['nodes']}, "
+        f"{summary['nodes_per_second']:.0f} nodes/s, "
+        f"{summary['cutoffs']} cutoffs "
+        f"({summary['first_move_cutoff_rate']:.0%} on first move)\n"
+        f"  latency p50 {latency['p50']:.1f} ms, "
+        f"p90 {latency['p90']:.1f} ms, p99 {latency['p99']:.1f} ms, "
+        f"max {latency['max']:.1f} ms"
+    )
+
+
+def main(argv=None):
+    """
+    Arena entry point
+    """
+    parser = argparse.ArgumentParser(
+        description="Play gomoku AIs against each other without GUI.")
+    parser.add_argument("first", help="AI name[:depth], one of "
+                                      f"{', '.join(AI_CLASSES)}")
+    parser.add_argument("second", help="AI name[:depth]")
+    parser.add_argument("-n", "--games", type=int, default=10)
+    parser.add_argument("-s", "--size", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=0)
+    boards = parser.add_mutually_exclusive_group()
+    boards.add_argument("--bitboard", action="store_true",
+                        help="search on BitBoard")
+    boards.add_argument("--patterns", action="store_true",
+                        help="search on PatternBoard (pattern evaluation)")
+    boards.add_argument("--sparse", action="store_true",
+                        help="play and search on SparseBoard")
+    parser.add_argument("--time-limit", type=int, default=None,
+                        metavar="MS", help="time limit per move")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="processes of the parallel AI "
+                             "(default: all CPUs)")
+    parser.add_argument("--max-moves", type=int, default=None,
+                        help="declare a draw after this many moves")
+    parser.add_argument("--json", action="store_true",
+                        help="print the results as JSON")
+    parser.add_argument("--record", default=None, metavar="FILE",
+                        help="archive the played games to FILE")
+    args = parser.parse_args(argv)
+
+    try:
+        parse_ai_spec(args.first)
+        parse_ai_spec(args.second)
+    except ValueError as error:
+        parser.error(str(error))
+
+    def play(record_writer=None):
+        return run_arena(args.first, args.second, args.games,
+                         size=args.size, seed=args.seed,
+                         bitboard=args.bitboard,
+                         time_limit_ms=args.time_limit,
+                         max_moves=args.max_moves,
+                         patterns=args.patterns,
+                         sparse=args.sparse,
+                         record_writer=record_writer,
+                         workers=args.workers)
+
+    if args.record is not None:
+        with RecordWriter(args.record) as writer:
+            results = play(writer)
+    else:
+        results = play()
+    summaries = [stats.summary() for stats in results]
+
+    if args.json:
+        print(json.dumps(summaries, indent=2))
+    else:
+        for summary in summaries:
+            print(format_summary(summary))
+
+
+if __name__ == "__main__":
+    main()
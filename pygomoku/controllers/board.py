@@ -2,6 +2,7 @@
 MVC controller of the game app
 """
 
+from threading import Lock
 from tkinter import Menu, BooleanVar, IntVar
 
 from pygomoku.models.game import Game
@@ -15,7 +16,8 @@ class GameController:
     """
     SIZE = 15
 
-    def __init__(self, master):
+    def __init__(self, master, size=SIZE):
+        self.size = size
 
         self.multiplayer_option_var = BooleanVar()
         self.multiplayer_option_var.set(False)
@@ -24,8 +26,13 @@ class GameController:
         self.difficulty_option_var.set(3)
 
         self.master = master
-        self.game = Game(self.SIZE)
-        self.view = BoardView(master, self.SIZE)
+
+        # Batched tile state changes waiting for tkinter to be idle
+        self._pending_states = {}
+        self._pending_lock = Lock()
+
+        self.game = Game(self.size)
+        self.view = BoardView(master, self.size)
         self.view.place(relx=0.5, rely=0.5, anchor="c")
 
         self._setup_board()
@@ -38,8 +45,8 @@ class GameController:
 
     def _setup_board(self):
         # Bind tiles
-        for x in range(self.SIZE):
-            for y in range(self.SIZE):
+        for x in range(self.size):
+            for y in range(self.size):
                 tile_view = self.view.tiles[x][y]
 
                 tile_view.bind_click(
@@ -58,6 +65,9 @@ class GameController:
                 tile_model.state.add_callable(
                     lambda value, parent: self.state_changed(parent, value))
 
+        self.game.board.states_changed.add_callable(
+            lambda changes, parent: self.states_changed(changes))
+
     def _setup_menu(self):
         self.menu = Menu(self.master)
         self.gamemenu = Menu(self.menu, tearoff=0)
@@ -144,7 +154,34 @@ class GameController:
         """
         Tile state change handler
         """
-        tile_view = self.get_tile_view(parent.x, parent.y)
+        with self._pending_lock:
+            # Newer than the batched change
+            self._pending_states.pop((parent.x, parent.y), None)
+
+        self._show_state(parent.x, parent.y, value)
+
+    def states_changed(self, changes):
+        """
+        Handler of state changes of many tiles (possibly from the AI
+        thread), the changes are drawn in one pass when tkinter is idle
+        """
+        with self._pending_lock:
+            schedule = not self._pending_states
+            self._pending_states.update(changes)
+
+        if schedule:
+            self.master.after_idle(self._apply_pending_states)
+
+    def _apply_pending_states(self):
+        with self._pending_lock:
+            changes = self._pending_states
+            self._pending_states = {}
+
+        for (x, y), value in changes.items():
+            self._show_state(x, y, value)
+
+    def _show_state(self, x, y, value):
+        tile_view = self.get_tile_view(x, y)
         if value == TileModel.States.NONE:
             tile_view.no_prelight()
         elif value == TileModel.States.PRELIT:
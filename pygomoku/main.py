@@ -3,6 +3,7 @@
 Game entry class
 """
 
+import argparse
 import tkinter as tk
 
 from pygomoku.controllers.board import GameController
@@ -12,12 +13,21 @@ def main():
     """
     Game entry point
     """
+    parser = argparse.ArgumentParser(description="Play gomoku.")
+    parser.add_argument("-s", "--size", type=int,
+                        default=GameController.SIZE,
+                        help="board size (default %(default)s)")
+    args = parser.parse_args()
+
+    # Tiles are 20px wide with a border
+    window_size = args.size * 22 + 20
+
     root = tk.Tk()
     root.title("Gomoku")
-    root.geometry("350x350")
+    root.geometry(f"{window_size}x{window_size}")
     root.resizable(0, 0)
 
-    GameController(root)  # The instance just needs to be created
+    GameController(root, args.size)  # The instance just needs to be created
     root.mainloop()
 
 
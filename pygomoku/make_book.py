@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Opening book generator
+"""
+
+import argparse
+
+from pygomoku.models.book import DEFAULT_BOOK_PATH, DEFAULT_WIDTH, \
+    build_book
+
+
+def main(argv=None):
+    """
+    Generator entry point
+    """
+    parser = argparse.ArgumentParser(
+        description="Build an opening book by searching early positions.")
+    parser.add_argument("output", nargs="?", default=DEFAULT_BOOK_PATH,
+                        help="book file (default: the book shipped "
+                             "with the game)")
+    parser.add_argument("-s", "--size", type=int, default=15)
+    parser.add_argument("-p", "--plies", type=int, default=3,
+                        help="book positions with less moves than this")
+    parser.add_argument("-d", "--depth", type=int, default=4,
+                        help="search depth")
+    parser.add_argument("-w", "--width", type=int, default=DEFAULT_WIDTH,
+                        help="moves followed from every position")
+    args = parser.parse_args(argv)
+
+    def report(count):
+        print(f"\rSearched {count} positions", end="", flush=True)
+
+    book = build_book(args.size, args.plies, args.depth, args.width,
+                      on_position=report)
+    print()
+
+    book.save(args.output)
+    print(f"Saved {len(book)} positions to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
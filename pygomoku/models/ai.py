@@ -3,11 +3,17 @@ Different AIs for gomoku
 """
 
 from random import choice
+from time import monotonic, perf_counter
 
-from .tile_generators import relevant_tiles, next_in_direction, \
-                             prev_in_direction
-from .analysis import find_attack, group_empty_end
+from .analysis import find_attack_end
+from .cache import EvaluationCache
 from .tile import TileModel
+from .constants import Bound
+from .stats import SearchStats
+from .threats import VCFSolver
+from .transposition import TranspositionTable
+from .symmetry import canonical_key, inverse_transform_move, transform_move
+from .zobrist import turn_hash
 
 
 class AbstractAI:
@@ -17,6 +23,7 @@ class AbstractAI:
     def __init__(self, board):
         self.board = board
         self.stopped = False
+        self.stats = SearchStats()  # Of the last get_move
 
     # pylint: disable=unused-argument
     def get_move(self, cross_turn):
@@ -24,6 +31,7 @@ class AbstractAI:
         Returns a tuple (x, y) of chosen move position
         """
         self.stopped = False
+        self.stats = SearchStats()
 
     def stop(self):
         """
@@ -31,6 +39,12 @@ class AbstractAI:
         """
         self.stopped = True
 
+    def close(self):
+        """
+        Release the resources of the AI (e.g. worker processes), it is
+        not used any more
+        """
+
 
 class RandomAI(AbstractAI):
     """
@@ -39,85 +53,189 @@ class RandomAI(AbstractAI):
     def get_move(self, cross_turn):
         super().get_move(cross_turn)
 
-        relevant = list(relevant_tiles(self.board))
-
-        move = choice(relevant)
-
-        return (move.x, move.y)
+        return choice(self.board.relevant_moves())
 
 
 class MinimaxAI(AbstractAI):
     """
     Uses minimax to find a good move.
+
+    The search runs on a detached copy of the board. If `board_cls` is
+    given, the copy is made by `board_cls.from_board` (e.g. BitBoard),
+    otherwise the board is cloned.
+
+    Search results are kept in a transposition table (shared between
+    moves), so positions reached by different move orders are only
+    searched once. Static ratings of positions (used to order moves)
+    are kept in a bounded evaluation cache, also shared between moves.
+
+    If `time_limit_ms` is given, the search is iteratively deepened
+    (up to `depth`) and the move of the deepest completed iteration is
+    returned when the time runs out or the AI is stopped. Iterations
+    after the first search only an aspiration window around the rating
+    of the previous one, and again with the full window if the rating
+    falls outside of it.
+
+    The expected line of play (the principal variation) of the last
+    search is in `principal_variation`, its rating in `rating` (both are
+    empty if the move was not searched).
+
+    Moves are ordered by their static rating, except right above the
+    leaves, where killer moves (recent cutoff moves in the same ply) and
+    the history of cutoffs are used instead.
+
+    Statistics of the last search are in `stats`, they are also passed
+    to `on_stats` (if given) after every search.
     """
-    def __init__(self, board, depth):
+    KILLERS_PER_PLY = 2
+    ASPIRATION_WINDOW = 25  # Around the rating of the previous iteration
+
+    def __init__(self, board, depth, board_cls=None,
+                 transposition_table=None, time_limit_ms=None,
+                 on_stats=None, evaluation_cache=None):
         super().__init__(board)
 
         self.depth = depth
-
-    def minimax(self, board, depth, cross_turn, alpha, beta,
-                last_move_tile=None):
+        self.board_cls = board_cls
+        self.time_limit_ms = time_limit_ms
+        self.on_stats = on_stats
+        self._deadline = None
+        self._root_depth = depth
+
+        self._killers = {}  # Ply -> moves that recently caused cutoffs
+        self._history = {}  # Move -> cutoff score
+        self._pv = {}  # Ply -> principal variation from the searched node
+        # Moves expected to be played from the position of the last search
+        # (the first is the chosen move)
+        self.principal_variation = []
+        self.rating = None
+
+        if transposition_table is None:
+            transposition_table = TranspositionTable()
+        self.transposition_table = transposition_table
+
+        if evaluation_cache is None:
+            evaluation_cache = EvaluationCache()
+        self.evaluation_cache = evaluation_cache
+
+    def _should_stop(self):
         """
-        Run the minimax algorithm.
+        Return True if the search should be abandoned
+        """
+        if self.stopped:
+            return True
+        return self._deadline is not None and monotonic() >= self._deadline
 
-        Cross maximizes, circle minimizes
+    def minimax(self, board, depth, cross_turn, alpha, beta):
         """
+        Run the minimax algorithm.
 
-        stop = False
+        Cross maximizes, circle minimizes. Returns a tuple
+        (move, rating), where move is None in the leaves, or None
+        if the search was stopped. The principal variation from the
+        position is left in self._pv[ply].
 
-        if depth == 0:
-            # rating = self.rater.rate(board)
+        This is a principal variation search: the first move is searched
+        with the full window, the other moves only with a null window
+        proving they are not better. Only when that fails, the move is
+        searched again with the full window.
+        """
+        ply = self._root_depth - depth
+        self.stats.add_node(ply)
+        pv = self._pv
+        pv[ply] = []
+
+        if depth == 0 or board.win_info:
+            # Nothing to search after a win
+            start = perf_counter()
             rating = board.rating
-            return last_move_tile, rating
-
-        # Order positions by rating
-        position_options = []  # (tile, rating)
+            self.stats.evaluation_time += perf_counter() - start
+            self.stats.leaf_evaluations += 1
+            return None, rating
+
+        original_alpha, original_beta = alpha, beta
+
+        position_key, transform = self.table_key(board, cross_turn)
+        entry = self.transposition_table.get(position_key)
+        best_known_move = None
+
+        if entry is not None:
+            if entry.move is not None:
+                best_known_move = inverse_transform_move(
+                    entry.move, transform, board.size)
+
+            if entry.depth >= depth and (
+                    entry.bound == Bound.EXACT or
+                    (entry.bound == Bound.LOWER and entry.rating >= beta) or
+                    (entry.bound == Bound.UPPER and entry.rating <= alpha)):
+                self.stats.transposition_hits += 1
+                if best_known_move is not None:
+                    pv[ply] = [best_known_move]
+                return best_known_move, entry.rating
 
         symbol = TileModel.Symbols.CROSS if cross_turn \
             else TileModel.Symbols.CIRCLE
 
-        for new_tile in relevant_tiles(board):
-            board.place(new_tile.x, new_tile.y, symbol)
-            rating = board.rating
-            position_options.append((new_tile, rating))
-            board.undo()
-
-            if self.stopped:
-                return None
-
-        if cross_turn:
-            def key(rating_tuple):
-                return -rating_tuple[1]
-        else:
-            def key(rating_tuple):
-                return rating_tuple[1]
-
-        position_options.sort(key=key)
-        # 30 (heuristically) best moves
-        position_options = position_options[:30]
+        moves = self.order_moves(board, cross_turn, best_known_move,
+                                 depth=depth, ply=ply)
+        if moves is None:
+            return None
 
-        minimax_results = []
-        for new_tile, rating in position_options:
-            if self.stopped:
+        best_move, best_rating = None, None
+        for move_index, move in enumerate(moves):
+            if self._should_stop():
                 return None
 
             # Add new symbol to board (temporarily)
-            board.place(new_tile.x, new_tile.y, symbol)
-            minimax_result = self.minimax(board, depth - 1, not cross_turn,
-                                          alpha=alpha, beta=beta,
-                                          last_move_tile=new_tile)
+            board.place(*move, symbol)
+
+            # A null window around the bound to beat (if there is one)
+            null_window = None
+            if move_index > 0:
+                if cross_turn and alpha != float("-inf"):
+                    null_window = alpha, alpha + 1
+                elif not cross_turn and beta != float("inf"):
+                    null_window = beta - 1, beta
+
+            minimax_result = None
+            if null_window is not None:
+                minimax_result = self.minimax(board, depth - 1,
+                                              not cross_turn, *null_window)
+                if minimax_result is not None and \
+                        alpha < minimax_result[1] < beta:
+                    # Better than the bound, find out by how much
+                    self.stats.researches += 1
+                    minimax_result = None
+                elif minimax_result is None:
+                    board.undo()
+                    return None
+
+            if minimax_result is None:
+                minimax_result = self.minimax(board, depth - 1,
+                                              not cross_turn,
+                                              alpha=alpha, beta=beta)
+
+            # Remove the added symbol
+            board.undo()
 
-            if self.stopped:
+            if minimax_result is None or self._should_stop():
                 return None
 
             result_rating = minimax_result[1]
 
+            if best_rating is None or \
+                    (cross_turn and result_rating > best_rating) or \
+                    (not cross_turn and result_rating < best_rating):
+                best_move, best_rating = move, result_rating
+                pv[ply] = [move] + pv.get(ply + 1, [])
+
             # Check alpha and beta
             if (cross_turn and result_rating >= beta) or \
                     (not cross_turn and result_rating <= alpha):
-                # Don't go further, this result will be ignored
-                minimax_results = [minimax_result]
-                stop = True  # Still needs to be cleaned up
+                # Don't go further, the other moves can't matter
+                self.stats.add_cutoff(move_index)
+                self._add_cutoff_move(move, depth, ply)
+                break
 
             # Set new alpha/beta
             if cross_turn and result_rating > alpha:
@@ -125,37 +243,240 @@ class MinimaxAI(AbstractAI):
             elif not cross_turn and result_rating < beta:
                 beta = result_rating
 
-            # Remove the added symbol
-            board.undo()
+        if best_rating <= original_alpha:
+            bound = Bound.UPPER
+        elif best_rating >= original_beta:
+            bound = Bound.LOWER
+        else:
+            bound = Bound.EXACT
+        self.transposition_table.store(
+            position_key, depth, bound, best_rating,
+            transform_move(best_move, transform, board.size))
 
-            if stop:
-                break
+        return best_move, best_rating
 
-            # The rating that can be enforced after playing new_tile
-            added_tile_result = (new_tile, result_rating)
+    @staticmethod
+    def table_key(board, cross_turn):
+        """
+        Return (key, transform) of the position on `board` in the
+        transposition table. Symmetric positions have the same key, the
+        moves are stored transformed by the `transform`-th symmetry.
+        """
+        if board.symmetry_hashes is None:
+            return turn_hash(board.hash, cross_turn), 0  # No symmetries
+        return canonical_key(board.symmetry_hashes, cross_turn)
 
-            minimax_results.append(added_tile_result)
+    def _add_cutoff_move(self, move, depth, ply):
+        """
+        Remember that `move` caused a cutoff
+        """
+        killers = self._killers.setdefault(ply, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[self.KILLERS_PER_PLY:]
 
-        if cross_turn:
-            best_tile = max(minimax_results, key=lambda x: x[1])
-        else:
-            best_tile = min(minimax_results, key=lambda x: x[1])
-        return best_tile
+        self._history[move] = self._history.get(move, 0) + depth * depth
+
+    def _cutoff_order(self, moves, best_known_move, ply):
+        """
+        Order `moves` by cutoffs: the best known move, then killer
+        moves, then by history
+        """
+        killers = self._killers.get(ply, ())
+        history = self._history
+
+        def key(move):
+            if move == best_known_move:
+                return 0, 0
+            if move in killers:
+                return 1, killers.index(move)
+            return 2, -history.get(move, 0)
+
+        return sorted(moves, key=key)
+
+    def order_moves(self, board, cross_turn, best_known_move=None,
+                    depth=None, ply=0):
+        """
+        Return the (heuristically) best moves, best first, or None
+        if the search was stopped.
+
+        `best_known_move` (from an earlier search) is put first. If the
+        moves lead to leaves (`depth` is 1), all of them are returned,
+        ordered only by cutoffs -- rating them first would cost as much
+        as searching them.
+        """
+        start = perf_counter()
+        relevant_moves = board.relevant_moves()
+        generated = perf_counter()
+        self.stats.generation_time += generated - start
+
+        if depth == 1:
+            moves = self._cutoff_order(relevant_moves, best_known_move, ply)
+            self.stats.ordering_time += perf_counter() - generated
+            return moves
+
+        # Order positions by rating
+        position_options = []  # (move, rating)
+
+        symbol = TileModel.Symbols.CROSS if cross_turn \
+            else TileModel.Symbols.CIRCLE
+
+        cache = self.evaluation_cache
+        for move in relevant_moves:
+            # The rating of a position reached before needs no placing
+            position_hash = board.hash_after(*move, symbol)
+            rating = cache.get(position_hash)
+            if rating is None:
+                board.place(*move, symbol)
+                rating = board.rating
+                board.undo()
+                cache.store(position_hash, rating)
+            else:
+                self.stats.evaluation_cache_hits += 1
+            position_options.append((move, rating))
+
+            if self._should_stop():
+                return None
+
+        history = self._history
+        sign = -1 if cross_turn else 1
+
+        def key(rating_tuple):
+            move, rating = rating_tuple
+            return sign * rating, -history.get(move, 0)
+
+        position_options.sort(key=key)
+        # 30 (heuristically) best moves
+        moves = [move for move, _ in position_options[:30]]
+
+        # Search the best move of an earlier search and killer moves first
+        killers = self._killers.get(ply, [])
+        for move in reversed([best_known_move] + killers):
+            if move in moves:
+                moves.remove(move)
+                moves.insert(0, move)
+
+        self.stats.ordering_time += perf_counter() - generated
+        return moves
+
+    def search_board(self):
+        """
+        Return a detached copy of the board to run the search on
+        """
+        if self.board_cls is None:
+            return self.board.clone()
+        return self.board_cls.from_board(self.board)
 
     def get_move(self, cross_turn):
         AbstractAI.get_move(self, cross_turn)
+        self._clear_search_results()
 
-        detached_board = self.board.clone()
-        minimax_result = self.minimax(detached_board, self.depth, cross_turn,
-                                      alpha=float("-inf"), beta=float("inf"))
+        return self._search_move(cross_turn)
 
-        if minimax_result is None:
-            # Was stopped
-            return None
+    def _clear_search_results(self):
+        self.principal_variation = []
+        self.rating = None
+
+    def _search_move(self, cross_turn):
+        """
+        Search for the move (without resetting the statistics)
+        """
+        # Killer moves are bound to plies, history only ages
+        self._killers = {}
+        self._history = {move: score // 2
+                         for move, score in self._history.items()
+                         if score > 1}
+
+        detached_board = self.search_board()
 
-        tile, _ = minimax_result
+        if self.time_limit_ms is not None:
+            move = self._iterative_deepening(detached_board, cross_turn)
+        else:
+            minimax_result = self._search(detached_board, self.depth,
+                                          cross_turn)
+            # None if it was stopped
+            move = minimax_result[0] if minimax_result is not None else None
 
-        return tile.x, tile.y
+        if self.on_stats is not None:
+            self.on_stats(self.stats)
+
+        return move
+
+    def _search(self, board, depth, cross_turn, alpha=float("-inf"),
+                beta=float("inf")):
+        """
+        Run minimax from the root to `depth`, timing the search
+        """
+        self._root_depth = depth
+        self._pv = {}
+        start = perf_counter()
+
+        minimax_result = self.minimax(board, depth, cross_turn,
+                                      alpha=alpha, beta=beta)
+
+        if minimax_result is not None:
+            self.stats.depth_times[depth] = perf_counter() - start
+            _, rating = minimax_result
+            if alpha < rating < beta:  # Not a failed aspiration window
+                self.principal_variation = self._pv.get(0, [])
+                self.rating = rating
+        return minimax_result
+
+    def _iterative_deepening(self, board, cross_turn):
+        """
+        Search with increasing depth until the time runs out.
+
+        Returns the move of the deepest completed search, or None if the
+        AI was stopped before the first search finished.
+        """
+        deadline = monotonic() + self.time_limit_ms / 1000
+        best_move = None
+        rating = None
+
+        try:
+            for depth in range(1, self.depth + 1):
+                # The first iteration always finishes, to have some move
+                self._deadline = deadline if best_move is not None else None
+
+                if rating is None:
+                    minimax_result = self._search(board, depth, cross_turn)
+                else:
+                    minimax_result = self._aspiration_search(
+                        board, depth, cross_turn, rating)
+                if minimax_result is None:
+                    break  # Out of time or stopped
+
+                best_move, rating = minimax_result
+
+                if monotonic() >= deadline:
+                    break
+        finally:
+            self._deadline = None
+
+        return best_move
+
+    def _aspiration_search(self, board, depth, cross_turn, rating):
+        """
+        Search with a window around the expected `rating`, if the result
+        is outside of it, search again with the failed side open
+        """
+        alpha = rating - self.ASPIRATION_WINDOW
+        beta = rating + self.ASPIRATION_WINDOW
+
+        while True:
+            minimax_result = self._search(board, depth, cross_turn,
+                                          alpha, beta)
+            if minimax_result is None:
+                return None
+
+            _, result_rating = minimax_result
+            if result_rating <= alpha:
+                alpha = float("-inf")
+            elif result_rating >= beta:
+                beta = float("inf")
+            else:
+                return minimax_result
+            self.stats.aspiration_failures += 1
 
 
 class RuleAI(AbstractAI):
@@ -174,50 +495,59 @@ class RuleAI(AbstractAI):
             my_symbol = TileModel.Symbols.CIRCLE
             other_symbol = TileModel.Symbols.CROSS
 
-        my_fourth = find_attack(self.board, my_symbol, 4, False)
+        my_fourth = find_attack_end(self.board, my_symbol, 4, False)
         if my_fourth is not None:
-            end = group_empty_end(self.board, my_fourth)
-            return (end.x, end.y)
+            return (my_fourth.x, my_fourth.y)
 
-        other_fourth = find_attack(self.board, other_symbol, 4, False)
+        other_fourth = find_attack_end(self.board, other_symbol, 4, False)
         if other_fourth is not None:
-            end = group_empty_end(self.board, other_fourth)
-            return (end.x, end.y)
+            return (other_fourth.x, other_fourth.y)
 
-        my_open_third = find_attack(self.board, my_symbol, 3, True)
+        my_open_third = find_attack_end(self.board, my_symbol, 3, True)
         if my_open_third is not None:
-            end = group_empty_end(self.board, my_open_third)
-            return (end.x, end.y)
+            return (my_open_third.x, my_open_third.y)
 
-        other_open_third = find_attack(self.board, other_symbol, 3, True)
+        other_open_third = find_attack_end(self.board, other_symbol, 3, True)
         if other_open_third is not None:
-            end = group_empty_end(self.board, other_open_third)
-            return (end.x, end.y)
+            return (other_open_third.x, other_open_third.y)
 
-        my_open_couple = find_attack(self.board, my_symbol, 2, True)
+        my_open_couple = find_attack_end(self.board, my_symbol, 2, True)
         if my_open_couple is not None:
-            end = group_empty_end(self.board, my_open_couple)
-            return (end.x, end.y)
+            return (my_open_couple.x, my_open_couple.y)
 
-        other_open_couple = find_attack(self.board, other_symbol, 2, True)
+        other_open_couple = find_attack_end(self.board, other_symbol, 2, True)
         if other_open_couple is not None:
-            end = group_empty_end(self.board, other_open_couple)
-            return (end.x, end.y)
+            return (other_open_couple.x, other_open_couple.y)
 
         # Choose randomly (from relevant tiles)
 
-        relevant = list(relevant_tiles(self.board))
-        tile = choice(relevant)
-
-        return (tile.x, tile.y)
+        return choice(self.board.relevant_moves())
 
 
 class CombinedAI(MinimaxAI, RuleAI):
     """
-    First apply some simple rules, then use minimax
+    First look the position up in the opening `book` (if given),
+    then apply some simple rules, then look for a win by continuous
+    fours (VCF), then use minimax
     """
+    def __init__(self, board, depth, board_cls=None,
+                 transposition_table=None, time_limit_ms=None,
+                 on_stats=None, book=None, evaluation_cache=None):
+        super().__init__(board, depth, board_cls=board_cls,
+                         transposition_table=transposition_table,
+                         time_limit_ms=time_limit_ms, on_stats=on_stats,
+                         evaluation_cache=evaluation_cache)
+
+        self.book = book
+
     def get_move(self, cross_turn):
         AbstractAI.get_move(self, cross_turn)
+        self._clear_search_results()
+
+        if self.book is not None:
+            book_move = self.book.lookup(self.board, cross_turn)
+            if book_move is not None:
+                return book_move
 
         if cross_turn:
             my_symbol = TileModel.Symbols.CROSS
@@ -226,21 +556,27 @@ class CombinedAI(MinimaxAI, RuleAI):
             my_symbol = TileModel.Symbols.CIRCLE
             other_symbol = TileModel.Symbols.CROSS
 
-        my_fourth = find_attack(self.board, my_symbol, 4, False)
+        my_fourth = find_attack_end(self.board, my_symbol, 4, False)
         if my_fourth is not None:
-            end = group_empty_end(self.board, my_fourth)
-            return (end.x, end.y)
-
-        other_fourth = find_attack(self.board, other_symbol, 4, False)
-        if other_fourth is not None:
-            end = group_empty_end(self.board, other_fourth)
-            return (end.x, end.y)
-
-        my_open_third = find_attack(self.board, my_symbol, 3, True)
+            return (my_fourth.x, my_fourth.y)
+
+        # Also finds wins by broken fours (like XX_XX)
+        solver = VCFSolver.from_board(self.board)
+        winning_line = solver.solve(my_symbol)
+        self.stats.threat_nodes += solver.nodes
+        if winning_line is not None:
+            return winning_line[0]
+
+        search_board = solver.board
+        other_fours = search_board.threat_cells(
+            other_symbol, search_board.WINNING_COUNT - 1)
+        if other_fours:
+            return search_board.mask_positions(other_fours)[0]
+
+        my_open_third = find_attack_end(self.board, my_symbol, 3, True)
         if my_open_third is not None:
-            end = group_empty_end(self.board, my_open_third)
-            return (end.x, end.y)
+            return (my_open_third.x, my_open_third.y)
 
         # Let minimax decide ho to handle opponent open thirds
 
-        return MinimaxAI.get_move(self, cross_turn)
+        return self._search_move(cross_turn)
@@ -2,9 +2,9 @@
 Helper functions for board analysis.
 """
 
+from .board import GROUP_STEPS, PositionGrid
 from .tile import TileModel
-from .tile_generators import all_generators, next_in_direction, \
-                             prev_in_direction
+from .tile_generators import all_generators
 
 
 def n_tet_counts(board, n):
@@ -24,12 +24,12 @@ def n_tet_counts(board, n):
     # [cross, circle]
     counts = [0, 0]
 
-    for line, _ in all_generators(board):
+    for line, _ in all_generators(PositionGrid(board.size)):
         same = 1
         last = None
 
-        for tile in line:
-            symbol = tile.symbol.get()
+        for x, y in line:
+            symbol = board.symbol_at(x, y)
             if symbol == last:
                 same += 1
             else:
@@ -42,51 +42,68 @@ def n_tet_counts(board, n):
     return tuple(counts)
 
 
-def find_attack(board, symbol, min_size, unblocked):
+def find_attacks(board, symbol, min_size, unblocked):
     """
-    Finds a group of at least `min_size` symbols of `symbol`.
-    If `unblocked`, the group must not be blocked from either side,
-    otherwise it may be blocked from ONE side. If no such group
-    exists, returns None
+    Generates groups of at least `min_size` symbols of `symbol`.
+    If `unblocked`, the groups must not be blocked from either side,
+    otherwise they may be blocked from ONE side.
     """
+    if unblocked:
+        max_blocked = 0
+    else:
+        max_blocked = 1
+
     for group in board.groups:
         size = group.get_size()
         blocked = group.get_blocked()
         group_symbol = group.get_symbol()
 
-        if unblocked:
-            max_blocked = 0
-        else:
-            max_blocked = 1
-
         if size >= min_size and blocked <= max_blocked \
                 and group_symbol == symbol:
-            return group
+            yield group
+
+
+def find_attack(board, symbol, min_size, unblocked):
+    """
+    Finds a group of at least `min_size` symbols of `symbol`.
+    If `unblocked`, the group must not be blocked from either side,
+    otherwise it may be blocked from ONE side. If no such group
+    exists, returns None
+    """
+    return next(find_attacks(board, symbol, min_size, unblocked), None)
+
+
+def find_attack_end(board, symbol, min_size, unblocked):
+    """
+    Finds an empty end next to a group found like in `find_attack`.
+    (A group next to the board edge might have none.) If there is no
+    such end, returns None
+    """
+    for group in find_attacks(board, symbol, min_size, unblocked):
+        end = group_empty_end(board, group)
+        if end is not None:
+            return end
 
     return None
 
 
 def group_empty_end(board, group):
     """
-    Finds and empty end next to a group.
+    Finds and empty end next to a group (its tile, see BoardModel.tile),
+    or returns None
     """
-    x, y = group.x, group.y
-    tile = board[x][y]
-    symbol = tile.symbol.get()
-    direction = group.direction
-
-    end_tile = tile
-    while end_tile is not None and \
-            end_tile.symbol.get() == symbol:
-        end_tile = next_in_direction(board, end_tile, direction)
-
-    if end_tile is not None and end_tile.empty():
-        return end_tile
-
-    # Search in opposite direction
-    end_tile = tile
-    while end_tile is not None and \
-            end_tile.symbol.get() == symbol:
-        end_tile = prev_in_direction(board, end_tile, direction)
-
-    return end_tile
+    symbol = board.symbol_at(group.x, group.y)
+    dx, dy = GROUP_STEPS[group.direction]
+
+    # Search in the direction, then in the opposite one
+    for step_x, step_y in ((dx, dy), (-dx, -dy)):
+        x, y = group.x, group.y
+        while 0 <= x < board.size and 0 <= y < board.size and \
+                board.symbol_at(x, y) == symbol:
+            x, y = x + step_x, y + step_y
+
+        if 0 <= x < board.size and 0 <= y < board.size and \
+                board.is_empty(x, y):
+            return board.tile(x, y)
+
+    return None
@@ -0,0 +1,140 @@
+"""
+Vectorized rating of many positions at once (needs NumPy).
+
+Positions are passed as an (N, size, size) int8 array of symbol codes
+(see bitboard.SYMBOL_CODES). Groups are found for all positions and
+directions at once by comparing the array with its shifted copies, the
+ratings are the same as RatedBoard.rating (the sum of the scores of all
+groups), so this can serve as a reference for the incremental ratings.
+"""
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is an optional dependency
+    np = None
+
+from .bitboard import CIRCLE, CROSS, SYMBOL_CODES
+from .board import BoardModel, GROUP_STEPS, rate_group
+
+# Groups of at least a winning count of symbols are counted together
+MAX_GROUP_SIZE = BoardModel.WINNING_COUNT
+OFF_BOARD = 3  # Code of the padding around positions, blocks nothing
+
+# Codes of the counted symbols, in the order of the count arrays
+COUNTED_CODES = (CROSS, CIRCLE)
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Batch rating needs NumPy, install it by "
+                          "'pip install pyGomoku[numpy]'")
+
+
+def positions_array(boards):
+    """
+    Return an (N, size, size) int8 array of the symbols on `boards`
+    (of the same size)
+    """
+    _require_numpy()
+
+    boards = list(boards)
+    size = boards[0].size if boards else 0
+    positions = np.zeros((len(boards), size, size), dtype=np.int8)
+    for index, board in enumerate(boards):
+        for x in range(size):
+            for y in range(size):
+                if not board.is_empty(x, y):
+                    positions[index, x, y] = \
+                        SYMBOL_CODES[board.symbol_at(x, y)]
+    return positions
+
+
+def group_counts(positions):
+    """
+    Return the counts of groups in `positions` (an (N, size, size)
+    array) as an (N, 2, MAX_GROUP_SIZE + 1, 3) int64 array indexed by
+    position, symbol (cross, circle), group size and the number of
+    blocked sides.
+
+    Groups are counted in all 4 directions, like RatedBoard.groups. Groups
+    of at least MAX_GROUP_SIZE symbols are counted as MAX_GROUP_SIZE large
+    and not blocked (the score of a win doesn't depend on it).
+    """
+    _require_numpy()
+
+    positions = np.asarray(positions, dtype=np.int8)
+    count, size, _ = positions.shape
+    pad = MAX_GROUP_SIZE
+    padded = np.full((count, size + 2 * pad, size + 2 * pad), OFF_BOARD,
+                     dtype=np.int8)
+    padded[:, pad:pad + size, pad:pad + size] = positions
+
+    def shifted(dx, dy, steps):
+        # Codes of the positions `steps` far in the direction (dx, dy)
+        x, y = pad + steps * dx, pad + steps * dy
+        return padded[:, x:x + size, y:y + size]
+
+    counts = np.zeros((count, len(COUNTED_CODES), MAX_GROUP_SIZE + 1, 3),
+                      dtype=np.int64)
+    for dx, dy in GROUP_STEPS.values():
+        ahead = [shifted(dx, dy, steps) for steps in range(pad + 1)]
+        before = shifted(dx, dy, -1)
+
+        for symbol_index, code in enumerate(COUNTED_CODES):
+            other = CROSS + CIRCLE - code
+            # First symbols of groups
+            run = (ahead[0] == code) & (before != code)
+            blocked_before = (before == other).astype(np.int8)
+
+            for group_size in range(1, MAX_GROUP_SIZE):
+                end = ahead[group_size]
+                ends = run & (end != code)
+                blocked = blocked_before + (end == other)
+                for blocked_count in range(3):
+                    counts[:, symbol_index, group_size, blocked_count] += \
+                        (ends & (blocked == blocked_count)).sum(axis=(1, 2))
+                run = run & (end == code)
+
+            # The rest is at least MAX_GROUP_SIZE large, the blocked sides
+            # don't matter for the score
+            counts[:, symbol_index, MAX_GROUP_SIZE, 0] += \
+                run.sum(axis=(1, 2))
+    return counts
+
+
+def score_table():
+    """
+    Return the (2, MAX_GROUP_SIZE + 1, 3) array of group scores, to be
+    multiplied with group_counts (circle groups score negatively)
+    """
+    _require_numpy()
+
+    table = np.zeros((len(COUNTED_CODES), MAX_GROUP_SIZE + 1, 3),
+                     dtype=np.int64)
+    for group_size in range(1, MAX_GROUP_SIZE + 1):
+        for blocked in range(3):
+            score = rate_group(group_size, blocked)
+            table[0, group_size, blocked] = score
+            table[1, group_size, blocked] = -score
+    return table
+
+
+def rate_positions(positions):
+    """
+    Return an int64 array of the ratings of `positions` (an (N, size,
+    size) array), equal to the ratings of RatedBoards with the same
+    symbols
+    """
+    counts = group_counts(positions)
+    return (counts * score_table()).sum(axis=(1, 2, 3))
+
+
+def rate_boards(boards):
+    """
+    Return a list of the ratings of `boards` (of the same size)
+    """
+    boards = list(boards)
+    if not boards:
+        return []
+    return rate_positions(positions_array(boards)).tolist()
+
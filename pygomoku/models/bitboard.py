@@ -0,0 +1,421 @@
+"""
+A compact board engine for the AI search.
+
+The board is stored as one integer bitmask per player plus a flat
+bytearray of symbol codes. Every row is padded with two empty columns,
+so that stepping off the board in any direction lands on a cell that
+is always empty and shifted masks never wrap to the next row.
+"""
+
+from collections import namedtuple
+from itertools import combinations
+from operator import xor
+
+from .board import BoardModel, Cell, WIN_DIRECTIONS, rate_group
+from .constants import Direction
+from .symmetry import TRANSFORMS, symmetry_keys
+from .tile import TileModel
+from .zobrist import zobrist_keys
+
+EMPTY = 0
+CROSS = 1
+CIRCLE = 2
+
+SYMBOL_CODES = {
+    TileModel.Symbols.EMPTY: EMPTY,
+    TileModel.Symbols.CROSS: CROSS,
+    TileModel.Symbols.CIRCLE: CIRCLE,
+}
+CODE_SYMBOLS = {code: symbol for symbol, code in SYMBOL_CODES.items()}
+
+# Columns of padding after each row (the search looks at most 2 tiles
+# far when looking for relevant moves)
+PADDING = 2
+
+
+class BitGroup(namedtuple("BitGroup", ["x", "y", "direction", "symbol",
+                                       "size", "blocked"])):
+    """
+    A snapshot of one group of symbols, with the same getters
+    as SymbolGroup
+    """
+    __slots__ = ()
+
+    def get_symbol(self):
+        return self.symbol
+
+    def get_size(self):
+        return self.size
+
+    def get_blocked(self):
+        return self.blocked
+
+    def score(self):
+        score = rate_group(self.size, self.blocked)
+        if self.symbol == TileModel.Symbols.CIRCLE:
+            score = -score
+        return score
+
+
+class BitBoard:
+    """
+    A board without TileModels, meant for searching.
+
+    Implements the place/undo/rating/groups/check_win/win_info
+    contract of RatedBoard, with the same ratings and hashes.
+    """
+    WINNING_COUNT = BoardModel.WINNING_COUNT
+    __slots__ = ("size", "stride", "rating", "hash", "win_info", "_cells",
+                 "_masks", "_valid", "_steps", "_move_stack",
+                 "_zobrist_keys", "_win_move_count", "symmetry_hashes",
+                 "_symmetry_keys")
+
+    def __init__(self, size):
+        self.size = size
+        self.stride = size + PADDING
+        self._zobrist_keys = zobrist_keys(size)
+        self._symmetry_keys = symmetry_keys(size)
+
+        # Steps in the RatedBoard group directions
+        self._steps = {
+            Direction.HORIZONTAL: self.stride,      # (x + 1, y)
+            Direction.VERTICAL: 1,                  # (x, y + 1)
+            Direction.DIAGONAL_A: self.stride + 1,  # (x + 1, y + 1)
+            Direction.DIAGONAL_B: self.stride - 1,  # (x + 1, y - 1)
+        }
+
+        row_mask = (1 << size) - 1
+        self._valid = 0
+        for x in range(size):
+            self._valid |= row_mask << (x * self.stride)
+
+        self._reset_state()
+
+    def _reset_state(self):
+        self._cells = bytearray(self.size * self.stride)
+        self._masks = [0, 0, 0]  # Indexed by symbol code
+        # (index, rating, hash and symmetry hashes before the move)
+        self._move_stack = []
+        self.rating = 0
+        self.hash = 0
+        self.symmetry_hashes = (0,) * len(TRANSFORMS)
+        self.win_info = False
+        self._win_move_count = 0  # Number of moves when win_info was set
+
+    @classmethod
+    def from_board(cls, board):
+        """
+        Create a BitBoard with the same symbols as `board`
+        """
+        bitboard = cls(board.size)
+        for x in range(board.size):
+            for y in range(board.size):
+                if not board.is_empty(x, y):
+                    bitboard.place(x, y, board.symbol_at(x, y))
+        bitboard._move_stack = []  # The copied moves can't be undone
+        bitboard._win_move_count = 0
+        return bitboard
+
+    def reset(self):
+        """
+        Clear all symbols on board
+        """
+        self._reset_state()
+        return self
+
+    def index(self, x, y):
+        """
+        Return the cell index of (x, y)
+        """
+        return x * self.stride + y
+
+    def position(self, index):
+        """
+        Return the (x, y) coordinates of a cell index
+        """
+        return divmod(index, self.stride)
+
+    def symbol_at(self, x, y):
+        """
+        Return the symbol at (x, y)
+        """
+        return CODE_SYMBOLS[self._cells[x * self.stride + y]]
+
+    def is_empty(self, x, y):
+        """
+        Return True if there is no symbol at (x, y)
+        """
+        return self._cells[x * self.stride + y] == EMPTY
+
+    def _run(self, index, step, code):
+        """
+        Return (size, blocked) of the group of `code` symbols
+        going through `index` in the direction of `step`
+        """
+        cells = self._cells
+        length = len(cells)
+        other = CROSS + CIRCLE - code
+
+        start = index
+        while start >= step and cells[start - step] == code:
+            start -= step
+        end = index
+        while end + step < length and cells[end + step] == code:
+            end += step
+
+        blocked = 0
+        if start >= step and cells[start - step] == other:
+            blocked += 1
+        if end + step < length and cells[end + step] == other:
+            blocked += 1
+
+        return (end - start) // step + 1, blocked
+
+    def _run_score(self, index, step, code):
+        score = rate_group(*self._run(index, step, code))
+        return score if code == CROSS else -score
+
+    def _local_score(self, index, step):
+        """
+        Return the summed score of the groups touching `index`
+        in the direction of `step`
+        """
+        cells = self._cells
+        length = len(cells)
+        code = cells[index]
+        score = 0
+
+        if code != EMPTY:
+            score += self._run_score(index, step, code)
+
+        for neighbor in (index - step, index + step):
+            if not 0 <= neighbor < length:
+                continue
+            neighbor_code = cells[neighbor]
+            if neighbor_code != EMPTY and neighbor_code != code:
+                score += self._run_score(neighbor, step, neighbor_code)
+
+        return score
+
+    def hash_after(self, x, y, symbol):
+        """
+        Return the hash of the position after placing `symbol` at (x, y)
+        (without placing it)
+        """
+        return self.hash ^ self._zobrist_keys[symbol][x][y]
+
+    def place(self, x, y, symbol):
+        """
+        Places `symbol` at (x, y)
+        """
+        index = x * self.stride + y
+        if self._cells[index] != EMPTY:
+            return False
+
+        code = SYMBOL_CODES[symbol]
+        self._move_stack.append((index, self.rating, self.hash,
+                                 self.symmetry_hashes))
+        self.rating += self._set_cell(index, code)
+        self.hash ^= self._zobrist_keys[symbol][x][y]
+        self.symmetry_hashes = tuple(map(xor, self.symmetry_hashes,
+                                         self._symmetry_keys[symbol][x][y]))
+
+        if not self.win_info:
+            self._check_move_win(index, code)
+
+        return self
+
+    def _set_cell(self, index, code):
+        """
+        Put `code` to the empty cell at `index`, return the change
+        of the rating
+        """
+        steps = self._steps.values()
+
+        before = 0
+        for step in steps:
+            before += self._local_score(index, step)
+
+        self._cells[index] = code
+        self._masks[code] |= 1 << index
+
+        after = 0
+        for step in steps:
+            after += self._local_score(index, step)
+
+        return after - before
+
+    def _clear_cell(self, index):
+        """
+        Empty the cell at `index` (the rating is restored by undo)
+        """
+        code = self._cells[index]
+        self._cells[index] = EMPTY
+        self._masks[code] &= ~(1 << index)
+
+    def _check_move_win(self, index, code):
+        """
+        Set win_info if the symbol at `index` is in a winning group
+        """
+        cells = self._cells
+        for direction, step in self._steps.items():
+            first = index
+            while first >= step and cells[first - step] == code:
+                first -= step
+
+            last = index
+            while last + step < len(cells) and cells[last + step] == code:
+                last += step
+
+            if (last - first) // step + 1 >= self.WINNING_COUNT:
+                self.win_info = (Cell(*self.position(first)),
+                                 WIN_DIRECTIONS[direction],
+                                 CODE_SYMBOLS[code])
+                self._win_move_count = len(self._move_stack)
+                return
+
+    def undo(self):
+        """
+        "Unplaces" last tile placement
+        """
+        if len(self._move_stack) == self._win_move_count:
+            self.win_info = False
+
+        index, rating, position_hash, symmetry_hashes = \
+            self._move_stack.pop()
+
+        self._clear_cell(index)
+        self.rating = rating
+        self.hash = position_hash
+        self.symmetry_hashes = symmetry_hashes
+
+    @property
+    def groups(self):
+        """
+        All groups of symbols on the board (computed on demand)
+        """
+        cells = self._cells
+        groups = []
+        for direction, step in self._steps.items():
+            for index, code in enumerate(cells):
+                if code == EMPTY:
+                    continue
+                if index >= step and cells[index - step] == code:
+                    continue  # Not the first tile of the group
+
+                size, blocked = self._run(index, step, code)
+                x, y = self.position(index)
+                groups.append(BitGroup(x, y, direction, CODE_SYMBOLS[code],
+                                       size, blocked))
+        return groups
+
+    def check_win(self):
+        """
+        Check if one of the players won
+
+        Returns False or winning position start and direction
+        (in the format of BoardModel.check_win)
+        """
+        # BoardModel.next_tile directions for the index steps
+        win_directions = (
+            (1, Direction.HORIZONTAL),
+            (self.stride, Direction.VERTICAL),
+            (self.stride + 1, Direction.DIAGONAL_B),
+            (self.stride - 1, Direction.DIAGONAL_A),
+        )
+        for code in (CROSS, CIRCLE):
+            mask = self._masks[code]
+            for step, direction in win_directions:
+                wins = mask
+                for i in range(1, self.WINNING_COUNT):
+                    wins &= mask >> (i * step)
+                if wins:
+                    first = (wins & -wins).bit_length() - 1
+                    return Cell(*self.position(first)), direction, \
+                        CODE_SYMBOLS[code]
+        return False
+
+    def relevant_moves(self):
+        """
+        Return a list of (x, y) positions worth playing -- empty
+        positions that have a symbol within distance 2
+        """
+        occupied = self._masks[CROSS] | self._masks[CIRCLE]
+
+        if not occupied:
+            # Return the tile in the middle
+            center_coord = self.size // 2
+            return [(center_coord, center_coord)]
+
+        close = 0
+        for dx in range(0, 3):
+            for dy in range(-2, 3):
+                shift = dx * self.stride + dy
+                if shift <= 0:
+                    continue  # Negative shifts are covered by >>
+                close |= (occupied << shift) | (occupied >> shift)
+        close &= self._valid & ~occupied
+
+        return self.mask_positions(close)
+
+    def mask_positions(self, mask):
+        """
+        Return a list of (x, y) positions of the cells set in `mask`,
+        in the order of their indices
+        """
+        positions = []
+        while mask:
+            lowest = mask & -mask
+            positions.append(self.position(lowest.bit_length() - 1))
+            mask ^= lowest
+        return positions
+
+    def threat_cells(self, symbol, stones):
+        """
+        Return a bitmask of the empty cells that lie in a line of
+        WINNING_COUNT cells with `stones` symbols of `symbol` and no
+        opponent symbol.
+
+        With `stones` of WINNING_COUNT - 1 these are the cells
+        completing a win, with WINNING_COUNT - 2 the cells making a four.
+        """
+        mine = self._masks[SYMBOL_CODES[symbol]]
+        empty = self._valid & ~(self._masks[CROSS] | self._masks[CIRCLE])
+        count = self.WINNING_COUNT
+
+        cells = 0
+        for step in self._steps.values():
+            shifts = [i * step for i in range(count)]
+            mine_at = [mine >> shift for shift in shifts]
+            empty_at = [empty >> shift for shift in shifts]
+
+            for empties in combinations(range(count), count - stones):
+                # Bits of the first cells of the matching lines
+                lines = -1
+                for i in range(count):
+                    lines &= empty_at[i] if i in empties else mine_at[i]
+                if lines:
+                    for i in empties:
+                        cells |= lines << shifts[i]
+        return cells
+
+    def clone(self):
+        """
+        Return a copy of the board
+        """
+        cloned = self.__class__.__new__(self.__class__)
+        cloned.size = self.size
+        cloned.stride = self.stride
+        cloned.rating = self.rating
+        cloned.hash = self.hash
+        cloned.symmetry_hashes = self.symmetry_hashes
+        cloned.win_info = self.win_info
+        cloned._win_move_count = self._win_move_count
+        cloned._cells = bytearray(self._cells)
+        cloned._masks = list(self._masks)
+        cloned._valid = self._valid
+        cloned._steps = self._steps
+        cloned._zobrist_keys = self._zobrist_keys
+        cloned._symmetry_keys = self._symmetry_keys
+        cloned._move_stack = list(self._move_stack)
+        return cloned
@@ -3,13 +3,16 @@ This module contains boards
 """
 
 from collections import namedtuple
-from copy import deepcopy
+from operator import xor
 
+from .observable import Observable
 from .tile import TileModel
 from .tile_generators import all_generators, all_tiles, direction_neighbors, \
                              next_in_direction
 
 from .constants import Direction
+from .symmetry import TRANSFORMS, symmetry_keys
+from .zobrist import zobrist_keys
 
 # (x1, y1), (x2, y2) are being merged, (x3, y3) is the position that merged
 # them
@@ -20,41 +23,187 @@ UndoCreate = namedtuple("UndoCreate", ["x", "y", "direction"])
 UndoChange = namedtuple("UndoChange", ["x", "y", "direction", "state"])
 UndoExtend = namedtuple("UndoExtend", ["x", "y", "direction", "state"])
 
+# A position on a board without a view, it quacks like a TileModel
+# for win_info and mark_win
+Cell = namedtuple("Cell", ["x", "y"])
+
+DIRECTIONS = tuple(Direction.all())
+
+# (dx, dy) to the next position in the group directions
+# (see next_in_direction)
+GROUP_STEPS = {
+    Direction.HORIZONTAL: (1, 0),
+    Direction.VERTICAL: (0, 1),
+    Direction.DIAGONAL_A: (1, 1),
+    Direction.DIAGONAL_B: (1, -1),
+}
+
+# Group directions (see direction_neighbors) and the corresponding
+# directions of winning lines (see BoardModel.next_tile)
+WIN_DIRECTIONS = {
+    Direction.HORIZONTAL: Direction.VERTICAL,
+    Direction.VERTICAL: Direction.HORIZONTAL,
+    Direction.DIAGONAL_A: Direction.DIAGONAL_B,
+    Direction.DIAGONAL_B: Direction.DIAGONAL_A,
+}
+
+
+def rate_group(size, blocked):
+    """
+    Return the (unsigned) score of a group of `size` symbols
+    that is blocked from `blocked` sides
+    """
+    if size >= 5:
+        return 99999
+
+    if blocked == 2:
+        return 0  # It is useless in this direction
+
+    if size == 1:
+        return 1 if blocked == 1 else 2
+
+    if size == 2:
+        return 3 if blocked == 1 else 5
+
+    if size == 3:
+        return 7 if blocked == 1 else 15
+
+    if size == 4:
+        return 20 if blocked == 1 else 5000
+
+    return 0  # Should never happen
+
+
+class PositionGrid:
+    """
+    Quacks like a board for the tile generators, its "tiles"
+    are (x, y) positions
+    """
+    def __init__(self, size):
+        self.size = size
+        self._rows = [[(x, y) for y in range(size)] for x in range(size)]
+
+    def __getitem__(self, x):
+        return self._rows[x]
+
 
 class BoardModel:
     """
     Standard board model, containing TileModels.
     Supports undoing moves.
+
+    Symbols are kept in a plain grid, the observable TileModels are only
+    a view for the GUI, updated with every move. Boards made for searching
+    have no view (`view` is False), so moves don't notify anyone; only
+    the position-based methods (symbol_at, is_empty, tile, place, undo,
+    check_win, ...) can be used on them.
+
+    Changes of the states of many tiles at once (disable, enable, reset,
+    mark_win) don't notify the tile handlers, they are reported as one
+    `states_changed` event, whose value is a dict (x, y) -> new state
+    of the changed tiles.
     """
     WINNING_COUNT = 5
-    __slots__ = ("size", "_board", "_added_tiles_stack")
+    # Moves within this distance of a symbol are relevant
+    CANDIDATE_DISTANCE = 2
+    __slots__ = ("size", "_board", "_symbols", "_added_tiles_stack",
+                 "states_changed")
 
-    def __init__(self, size):
+    def __init__(self, size, view=True):
         self.size = size
-        self._board = [[TileModel(x, y) for y in range(self.size)]
-                       for x in range(self.size)]
+        self._symbols = [[TileModel.Symbols.EMPTY] * size
+                         for _ in range(size)]
+        if view:
+            self._board = [[TileModel(x, y) for y in range(self.size)]
+                           for x in range(self.size)]
+        else:
+            self._board = None
         self._added_tiles_stack = []  # So that we can undo
+        self.states_changed = Observable(self, {})
 
     def __getitem__(self, x):
+        if self._board is None:
+            return [Cell(x, y) for y in range(self.size)]
         return self._board[x]
 
+    @property
+    def has_view(self):
+        """
+        Whether the board has TileModels
+        """
+        return self._board is not None
+
+    @property
+    def moves(self):
+        """
+        The list of (x, y) positions of the placed symbols, in the order
+        they were placed
+        """
+        return list(self._added_tiles_stack)
+
+    def symbol_at(self, x, y):
+        """
+        Return the symbol at (x, y)
+        """
+        return self._symbols[x][y]
+
+    def is_empty(self, x, y):
+        """
+        Return True if there is no symbol at (x, y)
+        """
+        return self._symbols[x][y] == TileModel.Symbols.EMPTY
+
+    def tile(self, x, y):
+        """
+        Return the TileModel at (x, y), or a Cell if the board
+        has no view
+        """
+        if self._board is None:
+            return Cell(x, y)
+        return self._board[x][y]
+
     def reset(self):
         """
         Clear all symbols on board
         """
-        for row in self._board:
-            for tile in row:
-                tile.reset()
+        self._symbols = [[TileModel.Symbols.EMPTY] * self.size
+                         for _ in range(self.size)]
+        if self._board is not None:
+            for tile in all_tiles(self):
+                if not tile.empty():
+                    tile.symbol.set(TileModel.Symbols.EMPTY)
+            self._set_states((tile, TileModel.States.NONE)
+                             for tile in all_tiles(self))
+        self._added_tiles_stack = []
         return self
 
+    def _set_states(self, tile_states):
+        """
+        Set the states of tiles from (tile, state) pairs, report
+        the changes as one states_changed event (a board without view
+        has no states)
+        """
+        if self._board is None:
+            return
+
+        changes = {}
+        for tile, state in tile_states:
+            if tile.state.get() != state:
+                tile.state.set(state, notify=False)
+                changes[tile.x, tile.y] = state
+
+        if changes:
+            self.states_changed.set(changes)
+
     def place(self, x, y, symbol):
         """
         Places `symbol` at (x, y)
         """
-        tile = self._board[x][y]
-        if not tile.empty():
+        if self._symbols[x][y] != TileModel.Symbols.EMPTY:
             return False
-        tile.symbol.set(symbol)
+        self._symbols[x][y] = symbol
+        if self._board is not None:
+            self._board[x][y].symbol.set(symbol)
 
         self._added_tiles_stack.append((x, y))
         return self
@@ -65,8 +214,9 @@ class BoardModel:
         """
         x, y = self._added_tiles_stack.pop()
 
-        tile = self._board[x][y]
-        tile.symbol.set(TileModel.Symbols.EMPTY)
+        self._symbols[x][y] = TileModel.Symbols.EMPTY
+        if self._board is not None:
+            self._board[x][y].symbol.set(TileModel.Symbols.EMPTY)
 
     def check_win(self):
         """
@@ -74,29 +224,56 @@ class BoardModel:
 
         Returns False or winning position start and direction
         """
-        for line, direction in all_generators(self):
+        symbols = self._symbols
+        for line, direction in all_generators(PositionGrid(self.size)):
             count = 0
-            first_group_tile = None
+            first_group_position = None
             last_symbol = TileModel.Symbols.EMPTY
-            for tile in line:
-                symbol = tile.symbol.get()
+            for x, y in line:
+                symbol = symbols[x][y]
                 if symbol == last_symbol:
                     count += 1
                 else:
                     count = 1
                     last_symbol = symbol
-                    first_group_tile = tile
+                    first_group_position = (x, y)
                 if count >= BoardModel.WINNING_COUNT and \
                         last_symbol != TileModel.Symbols.EMPTY:
-                    return first_group_tile, direction, last_symbol
+                    return self.tile(*first_group_position), direction, \
+                        last_symbol
         return False
 
+    def relevant_moves(self):
+        """
+        Return a list of (x, y) positions worth playing -- empty positions
+        that have a symbol close to them, row by row
+        """
+        symbols = self._symbols
+        empty = TileModel.Symbols.EMPTY
+        size = self.size
+        distance = self.CANDIDATE_DISTANCE
+
+        def close_to_symbol(x, y):
+            return any(symbols[nx][ny] != empty
+                       for nx in range(max(x - distance, 0),
+                                       min(x + distance + 1, size))
+                       for ny in range(max(y - distance, 0),
+                                       min(y + distance + 1, size)))
+
+        moves = [(x, y) for x in range(size) for y in range(size)
+                 if symbols[x][y] == empty and close_to_symbol(x, y)]
+        if not moves:
+            # Return the tile in the middle
+            center_coord = size // 2
+            return [(center_coord, center_coord)]
+        return moves
+
     def disable(self):
         """
         Make the board disabled/gray
         """
-        for tile in all_tiles(self):
-            tile.state.set(TileModel.States.DISABLED)
+        self._set_states((tile, TileModel.States.DISABLED)
+                         for tile in all_tiles(self))
         return self
 
     def next_tile(self, r, c, direction):
@@ -138,17 +315,23 @@ class BoardModel:
         """
         Make the board enabled/white
         """
-        for tile in all_tiles(self):
-            tile.state.set(TileModel.States.NONE)
+        self._set_states((tile, TileModel.States.NONE)
+                         for tile in all_tiles(self))
         return self
 
     def mark_win(self, win_info):
+        if self._board is None:
+            return self
+
         tile, direction, symbol = win_info
         x, y = tile.x, tile.y
-        self._board[x][y].state.set(TileModel.States.MARKED_AS_WIN)
+        win_tiles = [self._board[x][y]]
         for _ in range(self.WINNING_COUNT - 1):
             x, y = self.next_tile(x, y, direction)
-            self._board[x][y].state.set(TileModel.States.MARKED_AS_WIN)
+            win_tiles.append(self._board[x][y])
+
+        self._set_states((tile, TileModel.States.MARKED_AS_WIN)
+                         for tile in win_tiles)
         return self
 
     def clone(self):
@@ -157,21 +340,30 @@ class BoardModel:
         """
         # This could be subclassed
         cls = self.__class__
-        cloned_board = cls(self.size)
+        cloned_board = cls(self.size, view=self.has_view)
 
-        cloned_board._board = [[tile.clone() for tile in row]
-                               for row in self._board]
+        cloned_board._symbols = [row[:] for row in self._symbols]
+        if self.has_view:
+            cloned_board._board = [[tile.clone() for tile in row]
+                                   for row in self._board]
+        cloned_board._added_tiles_stack = list(self._added_tiles_stack)
         return cloned_board
 
 
 class SymbolGroup:
     """
     A group of symbols in ONE DIRECTION
+
+    Merged groups form a DFU-like tree, whose root holds the state of the
+    whole group. Smaller trees are attached under larger ones (union by
+    size), so the trees are at most log2(size) deep. Paths are not
+    compressed -- a merge is undone by restoring the local states of the
+    two merged roots, which would not be enough after compression.
     """
     def __init__(self, symbol, blocked, x, y, direction):
         self._parent = None  # DFU-like, for merging the groups
         self._size = 1
-        self._symbol = symbol  # ?
+        self._symbol = symbol  # The same in the whole tree
         self._blocked = blocked  # 0-2, from how many sides it is protected
         self.x = x
         self.y = y
@@ -181,36 +373,28 @@ class SymbolGroup:
         """
         Merging groups uses DFU-like structure, this finds its root
         """
-        if self._parent is None:
-            return self
-        else:
-            return self._parent.root()
+        group = self
+        while group._parent is not None:
+            group = group._parent
+        return group
 
     def get_state(self):
         """
         Return the group state
         """
-        if self._parent is not None:
-            return self.root().get_state()
-
+        root = self.root()
         return (
-            self._size,
-            self._symbol,
-            self._blocked
+            root._size,
+            root._symbol,
+            root._blocked
         )
 
     def set_state(self, state):
         """
         Set the group state
         """
-        if self._parent is not None:
-            self.root().set_state(state)
-            return
-
-        size, symbol, blocked = state
-        self._size = size
-        self._symbol = symbol
-        self._blocked = blocked
+        root = self.root()
+        root._size, root._symbol, root._blocked = state
 
     def get_local_state(self):
         """
@@ -245,98 +429,63 @@ class SymbolGroup:
         """
         Return the group symbol
         """
-        root = self.root()
-        return root._symbol
+        return self._symbol
 
     def get_size(self):
         """
         Return the group size
         """
-        root = self.root()
-        return root._size
+        return self.root()._size
 
     def increment_size(self):
         """
         Increment the group size
         """
-        root = self.root()
-        root._size += 1
+        self.root()._size += 1
 
     def get_blocked(self):
         """
         Return the number of blocked sides
         """
-        root = self.root()
-        return root._blocked
+        return self.root()._blocked
 
     def increment_blocked(self):
         """
         Increase the number of blocked sides
         """
-        root = self.root()
-        root._blocked += 1
+        self.root()._blocked += 1
 
     def merge(self, other):
         """
         Merge two groups.
 
-        This works like DFU union
+        This works like DFU union (by size), returns the root
+        of the merged group
         """
         my_root = self.root()
         other_root = other.root()
 
-        assert my_root != other_root
+        assert my_root is not other_root
+        assert my_root._symbol == other_root._symbol
+
+        if my_root._size < other_root._size:
+            my_root, other_root = other_root, my_root
 
         other_root._parent = my_root
         my_root._size += other_root._size
         my_root._blocked += other_root._blocked
 
-        assert my_root._symbol == other_root._symbol
         assert my_root._blocked <= 2
+        return my_root
 
     def score(self):
         """
         Return group score
         """
-        size = self.get_size()
-        blocked = self.get_blocked()
-
-        score = 0
-
-        if size >= 5:
-            score = 99999
-
-        elif blocked == 2:
-            score = 0  # It is useless in this direction
-
-        elif size == 1:
-            if blocked == 1:
-                score = 1
-            else:
-                score = 2
-
-        elif size == 2:
-            if blocked == 1:
-                score = 3
-            else:
-                score = 5
-
-        elif size == 3:
-            if blocked == 1:
-                score = 7
-            else:
-                score = 15
-
-        elif size == 4:
-            if blocked == 1:
-                score = 20
-            else:
-                score = 5000
-
-        else:
-            score = 0  # Should never happen
+        root = self.root()
+        score = rate_group(root._size, root._blocked)
 
-        if self.get_symbol() == TileModel.Symbols.CIRCLE:
+        if self._symbol == TileModel.Symbols.CIRCLE:
             score = -score
 
         return score
@@ -347,23 +496,33 @@ class PositionContext:
     Remember what symbol groups are in all directions
     on a given position
     """
+    __slots__ = ("directions",)
+
     def __init__(self):
         # Group in each direction
-        self.directions = {
-            direction: None for direction in Direction.all()
-        }
+        self.directions = dict.fromkeys(DIRECTIONS)
 
 
 class RatedBoard(BoardModel):
     """
-    A better version of BoardModel that keeps track of its groups
-    and its rating (all the time)
+    A better version of BoardModel that keeps track of its groups,
+    its rating, its Zobrist hash, its relevant moves and whether
+    someone won (all the time)
+
+    `win_info` is False or the first win on the board, in the format
+    of `check_win`. `symmetry_hashes` are the hashes of the position in all
+    its symmetries (see symmetry.symmetry_keys).
     """
     __slots__ = BoardModel.__slots__ + \
-        ("board_context", "_context_undo_stack", "rating", "groups")
-
-    def __init__(self, size):
-        super().__init__(size)
+        ("board_context", "_context_undo_stack", "rating", "groups",
+         "hash", "_zobrist_keys", "candidates", "_candidate_counts",
+         "win_info", "_win_move_count", "symmetry_hashes",
+         "_symmetry_keys")
+
+    def __init__(self, size, view=True):
+        super().__init__(size, view)
+        self._zobrist_keys = zobrist_keys(size)
+        self._symmetry_keys = symmetry_keys(size)
         self._reset_context()
 
         self.groups = []
@@ -378,18 +537,93 @@ class RatedBoard(BoardModel):
                               for _ in range(self.size)]
         self._context_undo_stack = []
         self.rating = 0
+        self.hash = 0
+        self.symmetry_hashes = (0,) * len(TRANSFORMS)
         self.groups = []
 
+        # For every position, the number of symbols close to it
+        self._candidate_counts = [[0] * self.size for _ in range(self.size)]
+        # Empty positions with a close symbol
+        self.candidates = set()
+
+        self.win_info = False
+        self._win_move_count = 0  # Number of moves when win_info was set
+
+    def _close_positions(self, x, y):
+        """
+        Generate positions within CANDIDATE_DISTANCE of (x, y)
+        """
+        distance = self.CANDIDATE_DISTANCE
+        for nx in range(max(x - distance, 0),
+                        min(x + distance + 1, self.size)):
+            for ny in range(max(y - distance, 0),
+                            min(y + distance + 1, self.size)):
+                if (nx, ny) != (x, y):
+                    yield nx, ny
+
+    def _add_candidates(self, x, y):
+        self.candidates.discard((x, y))
+
+        for nx, ny in self._close_positions(x, y):
+            self._candidate_counts[nx][ny] += 1
+            if self._symbols[nx][ny] == TileModel.Symbols.EMPTY:
+                self.candidates.add((nx, ny))
+
+    def _remove_candidates(self, x, y):
+        for nx, ny in self._close_positions(x, y):
+            self._candidate_counts[nx][ny] -= 1
+            if not self._candidate_counts[nx][ny]:
+                self.candidates.discard((nx, ny))
+
+        if self._candidate_counts[x][y]:
+            self.candidates.add((x, y))
+
+    def _set_win(self, x, y, direction, symbol):
+        """
+        Remember a win of `symbol` through (x, y) in the group `direction`
+        """
+        dx, dy = GROUP_STEPS[direction]
+        while 0 <= x - dx < self.size and 0 <= y - dy < self.size and \
+                self._symbols[x - dx][y - dy] == symbol:
+            x, y = x - dx, y - dy
+
+        self.win_info = (self.tile(x, y), WIN_DIRECTIONS[direction], symbol)
+        self._win_move_count = len(self._added_tiles_stack)
+
+    def relevant_moves(self):
+        """
+        Return a sorted list of (x, y) positions worth playing -- empty
+        positions that have a symbol close to them
+        """
+        if not self.candidates:
+            # Return the tile in the middle
+            center_coord = self.size // 2
+            return [(center_coord, center_coord)]
+
+        return sorted(self.candidates)
+
+    def hash_after(self, x, y, symbol):
+        """
+        Return the hash of the position after placing `symbol` at (x, y)
+        (without placing it)
+        """
+        return self.hash ^ self._zobrist_keys[symbol][x][y]
+
     def place(self, x, y, symbol):
         placing_success = super().place(x, y, symbol)
 
         if not placing_success:
             return False
 
+        self.hash ^= self._zobrist_keys[symbol][x][y]
+        self.symmetry_hashes = tuple(map(xor, self.symmetry_hashes,
+                                         self._symmetry_keys[symbol][x][y]))
+        self._add_candidates(x, y)
+
         position_context = self.board_context[x][y]
         undo_instructions = []
 
-        for direction in Direction.all():
+        for direction in DIRECTIONS:
             dir_neighbors = direction_neighbors(self, direction, x, y)
             nei_contexts = [self.board_context[nx][ny]
                             for (nx, ny) in dir_neighbors]
@@ -443,17 +677,18 @@ class RatedBoard(BoardModel):
                     # These two groups need to be merged
                     second_group = same_symbol_groups[1][1]
 
-                    # Create unmerge instruction
-                    local_state1 = old_group.get_local_state()
-                    local_state2 = second_group.get_local_state()
-
-                    x1, y1 = same_symbol_groups[0][0]
-                    x2, y2 = same_symbol_groups[1][0]
-                    instruction = UndoMerge(x1, y1, x2, y2, x, y, direction,
-                                            local_state1, local_state2)
+                    # Create unmerge instruction, the merge changes the
+                    # roots (a root is the group of the position where
+                    # it was created)
+                    root1 = old_group.root()
+                    root2 = second_group.root()
+                    instruction = UndoMerge(root1.x, root1.y,
+                                            root2.x, root2.y, x, y, direction,
+                                            root1.get_local_state(),
+                                            root2.get_local_state())
                     undo_instructions.append(instruction)
 
-                    second_group.merge(old_group)
+                    old_group = old_group.merge(second_group)
 
                 else:
                     # Create undo EXTEND instruction
@@ -485,6 +720,10 @@ class RatedBoard(BoardModel):
             # Update (x, y) position context
             position_context.directions[direction] = my_group
 
+            if not self.win_info and \
+                    my_group.get_size() >= self.WINNING_COUNT:
+                self._set_win(x, y, direction, symbol)
+
             # There is definitely only one group of the same symbol --
             # my_group, and exactly those groups of the other symbol as in the
             # beginning (only possibly changed). Use these for rating.
@@ -620,7 +859,17 @@ class RatedBoard(BoardModel):
         # All changes in the last method call
         move_undo_instructions = self._context_undo_stack.pop()
 
+        x, y = self._added_tiles_stack[-1]
+        symbol = self._symbols[x][y]
+        self.hash ^= self._zobrist_keys[symbol][x][y]
+        self.symmetry_hashes = tuple(map(xor, self.symmetry_hashes,
+                                         self._symmetry_keys[symbol][x][y]))
+
+        if len(self._added_tiles_stack) == self._win_move_count:
+            self.win_info = False
+
         super().undo()
+        self._remove_candidates(x, y)
 
         for instruction in move_undo_instructions:
             if isinstance(instruction, UndoChange):
@@ -635,9 +884,13 @@ class RatedBoard(BoardModel):
         # self._check_invariants()
 
     def clone(self):
-        cloned = BoardModel.clone(self)
-        cloned.rating = self.rating
-        cloned.board_context = deepcopy(self.board_context)
-        cloned._context_undo_stack = deepcopy(self._context_undo_stack)
+        """
+        Return a copy of the board without a view, made by replaying
+        the moves on an empty board (instead of copying all the groups).
 
+        The copy is meant for searching.
+        """
+        cloned = self.__class__(self.size, view=False)
+        for x, y in self._added_tiles_stack:
+            cloned.place(x, y, self._symbols[x][y])
         return cloned
@@ -0,0 +1,175 @@
+"""
+Opening book -- precomputed replies for early positions.
+
+Positions are keyed by their canonical (symmetry-normalized) hash and
+moves are stored in the coordinates of the canonical position, so one
+entry covers all 8 symmetric variants of a position.
+
+File format (little endian): a header of the magic bytes b"PGBK",
+version (1 byte), board size (1 byte) and entry count (4 bytes),
+followed by entries sorted by key: 8 byte key, 1 byte x, 1 byte y.
+"""
+
+import os
+import struct
+from functools import lru_cache
+
+from .ai import CombinedAI
+from .bitboard import BitBoard
+from .board import RatedBoard
+from .symmetry import board_canonical_hash, transform_move, \
+                      inverse_transform_move
+from .tile import TileModel
+
+DEFAULT_BOOK_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                                 "data", "opening_book.bin")
+DEFAULT_WIDTH = 4  # Best moves followed from every position by build_book
+
+
+class BookFormatError(Exception):
+    """
+    The file is not a valid opening book
+    """
+
+
+class OpeningBook:
+    """
+    A mapping from positions to the best replies
+    """
+    MAGIC = b"PGBK"
+    VERSION = 1
+    HEADER = struct.Struct("<4sBBI")
+    ENTRY = struct.Struct("<QBB")
+
+    def __init__(self, size):
+        self.size = size
+        self._moves = {}  # Canonical hash -> move in canonical coordinates
+
+    def __len__(self):
+        return len(self._moves)
+
+    def _key(self, board, cross_turn):
+        return board_canonical_hash(board, cross_turn)
+
+    def add(self, board, cross_turn, move):
+        """
+        Remember `move` as the reply in the position of `board`
+        """
+        key, transform = self._key(board, cross_turn)
+        self._moves[key] = transform_move(move, transform, self.size)
+
+    def lookup(self, board, cross_turn):
+        """
+        Return the book reply (x, y) for the position of `board`,
+        or None if the position is not in the book
+        """
+        if board.size != self.size:
+            return None
+
+        key, transform = self._key(board, cross_turn)
+        move = self._moves.get(key)
+        if move is None:
+            return None
+        return inverse_transform_move(move, transform, self.size)
+
+    def save(self, path):
+        """
+        Write the book to `path`
+        """
+        with open(path, "wb") as book_file:
+            book_file.write(self.HEADER.pack(self.MAGIC, self.VERSION,
+                                             self.size, len(self._moves)))
+            for key in sorted(self._moves):
+                book_file.write(self.ENTRY.pack(key, *self._moves[key]))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a book written by `save`
+        """
+        with open(path, "rb") as book_file:
+            data = book_file.read()
+
+        if len(data) < cls.HEADER.size:
+            raise BookFormatError(f"{path}: file too short")
+
+        magic, version, size, count = cls.HEADER.unpack_from(data)
+        if magic != cls.MAGIC or version != cls.VERSION:
+            raise BookFormatError(f"{path}: not an opening book "
+                                  f"of version {cls.VERSION}")
+        if len(data) != cls.HEADER.size + count * cls.ENTRY.size:
+            raise BookFormatError(f"{path}: wrong number of entries")
+
+        book = cls(size)
+        for key, x, y in cls.ENTRY.iter_unpack(data[cls.HEADER.size:]):
+            book._moves[key] = (x, y)
+        return book
+
+    @classmethod
+    def load_default(cls, size):
+        """
+        Return the book shipped with the game for boards of `size`,
+        or None if there is none.
+
+        The book is only read once, all games share it (it must not be
+        modified).
+        """
+        book = _load_default_book(cls)
+        return book if book is not None and book.size == size else None
+
+
+@lru_cache(maxsize=None)
+def _load_default_book(cls):
+    try:
+        return cls.load(DEFAULT_BOOK_PATH)
+    except (OSError, BookFormatError):
+        return None
+
+
+def build_book(size, plies, depth, width=DEFAULT_WIDTH, on_position=None):
+    """
+    Build an opening book by searching (with CombinedAI of `depth`) all
+    positions with less than `plies` moves, following the found move and
+    the `width` best moves (by move ordering) from every position.
+    From the empty board, all first moves are followed (the player may
+    start anywhere). Positions equal up to symmetry are searched once.
+
+    `on_position(count)` is called after every searched position.
+    """
+    book = OpeningBook(size)
+    board = RatedBoard(size)
+    ai = CombinedAI(board, depth, board_cls=BitBoard)
+    searched = set()
+
+    def visit(ply, cross_turn):
+        key, _ = book._key(board, cross_turn)
+        if key in searched:
+            return
+        searched.add(key)
+
+        best_move = ai.get_move(cross_turn)
+        book.add(board, cross_turn, best_move)
+        if on_position is not None:
+            on_position(len(searched))
+
+        if ply + 1 >= plies:
+            return
+
+        symbol = TileModel.Symbols.CROSS if cross_turn \
+            else TileModel.Symbols.CIRCLE
+        if ply == 0:
+            moves = [(x, y) for x in range(size) for y in range(size)]
+        else:
+            search_board = BitBoard.from_board(board)
+            moves = ai.order_moves(search_board, cross_turn)[:width]
+            if best_move not in moves:
+                moves.insert(0, best_move)
+
+        for move in moves:
+            board.place(*move, symbol)
+            if not board.win_info:
+                visit(ply + 1, not cross_turn)
+            board.undo()
+
+    visit(0, True)
+    return book
@@ -0,0 +1,78 @@
+"""
+Evaluation cache for the minimax search
+"""
+
+from collections import OrderedDict
+
+
+class EvaluationCache:
+    """
+    A bounded store of position ratings, keyed by position hash.
+
+    When the cache is full, the least recently used rating is evicted
+    (a zero `capacity` disables caching).
+    Ratings depend on the board class (e.g. PatternBoard rates
+    differently), so a cache should only be shared by searches on the
+    same kind of boards. The cache can be shared between threads, at
+    worst a rating evicted by another thread is computed again.
+    """
+    DEFAULT_CAPACITY = 2 ** 17
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._ratings = OrderedDict()
+
+    def __len__(self):
+        return len(self._ratings)
+
+    @property
+    def hit_rate(self):
+        """
+        The share of lookups that found a rating
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key):
+        """
+        Return the rating stored for `key`, or None
+        """
+        rating = self._ratings.get(key)
+        if rating is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        try:
+            self._ratings.move_to_end(key)
+        except KeyError:
+            pass  # Evicted by another thread meanwhile
+        return rating
+
+    def store(self, key, rating):
+        """
+        Store the rating of the position of `key`
+        """
+        if not self.capacity:
+            return  # Caching disabled
+
+        ratings = self._ratings
+        if key in ratings:
+            ratings.move_to_end(key)
+        elif len(ratings) >= self.capacity:
+            try:
+                ratings.popitem(last=False)
+            except KeyError:
+                pass  # Emptied by another thread meanwhile
+
+        ratings[key] = rating
+
+    def clear(self):
+        """
+        Remove all ratings and reset the counters
+        """
+        self._ratings.clear()
+        self.hits = 0
+        self.misses = 0
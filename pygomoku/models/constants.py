@@ -19,3 +19,12 @@ class Direction(Enum):
             cls.DIAGONAL_A,
             cls.DIAGONAL_B
         ]
+
+
+class Bound(Enum):
+    """
+    What a stored search rating says about the real rating
+    """
+    EXACT = auto()
+    LOWER = auto()  # The real rating is at least this
+    UPPER = auto()  # The real rating is at most this
@@ -2,28 +2,74 @@
 This module controls core game logic
 """
 
-from threading import Thread
+from threading import RLock
 
 from .board import BoardModel, RatedBoard
 from .tile import TileModel
 from .observable import Observable
 from .ai import RandomAI, MinimaxAI, RuleAI, CombinedAI
+from .bitboard import BitBoard
+from .book import OpeningBook
+from .cache import EvaluationCache
+from .service import AIService
+from .sparse import SparseBoard
+from .transposition import TranspositionTable
 
 
 class Game:
     """
     The class controlling core game logic
+
+    AI moves are searched by `service` (an AIService, which can be shared
+    by many games; a single worker one is created if not given) and
+    played when found. Every new game increments `generation`, moves
+    searched for an earlier generation are never played.
+
+    Position ratings are cached in `evaluation_cache` and search results
+    in `transposition_table` (both kept across games and difficulty
+    changes); games sharing a service can also share them, so memory
+    stays bounded however many games run.
+
+    Every played move (of a player or the AI) is reported by `last_move`.
+    Games without GUI don't need the TileModels of the board (`view`),
+    they can also be played on a SparseBoard (`sparse`), which the AI
+    then also searches on.
     """
-    def __init__(self, size):
-        self.board = RatedBoard(size)
+    AI_TIME_LIMIT_MS = 3000  # Per move
+
+    def __init__(self, size, service=None, evaluation_cache=None,
+                 transposition_table=None, view=True, sparse=False):
+        if sparse:
+            self.board = SparseBoard(size)
+        else:
+            self.board = RatedBoard(size, view=view)
         self.active = Observable(self, True)
+        self.last_move = Observable(self, None)  # (x, y)
         self.cross_turn = True
         self.player_turn = True
         self.player_starting = True
 
+        self.sparse = sparse
         self.multiplayer = False
         self.difficulty = 1
 
+        self.book = OpeningBook.load_default(size)
+
+        if service is None:
+            service = AIService(max_workers=1)
+        self.service = service
+        self.generation = 0
+        self._ai_future = None  # Of the requested AI move
+        # Guards the game state against AI moves from the worker threads
+        self._lock = RLock()
+
+        if evaluation_cache is None:
+            evaluation_cache = EvaluationCache()
+        self.evaluation_cache = evaluation_cache
+        if transposition_table is None:
+            transposition_table = TranspositionTable()
+        self.transposition_table = transposition_table
+
         self.ai = None
         self._update_ai()
 
@@ -32,41 +78,58 @@ class Game:
         If active, place a symbol on (x, y) for the player
         whose turn it is. Then (if not in multiplayer),
         initiate AI move.
-        """
-        if not self.active.get():
-            return
-        symbol = TileModel.Symbols.CROSS if self.cross_turn \
-            else TileModel.Symbols.CIRCLE
 
-        place_success = self.board.place(x, y, symbol)
-        if not place_success:
-            return
-        win_info = self.board.check_win()
-        if win_info:
-            self.end_game()
-            self.board.mark_win(win_info)
-            return
-        self.cross_turn = not self.cross_turn
-        if not self.multiplayer:
-            self.player_turn = not self.player_turn
-            if not self.player_turn:
-                ai_thread = Thread(target=self._ai_turn, daemon=True)
-                ai_thread.start()
+        Returns True if the move was played.
+        """
+        with self._lock:
+            if not self.active.get():
+                return False
+            symbol = TileModel.Symbols.CROSS if self.cross_turn \
+                else TileModel.Symbols.CIRCLE
+
+            place_success = self.board.place(x, y, symbol)
+            if not place_success:
+                return False
+            win_info = self.board.win_info
+            if win_info:
+                self.end_game()
+                self.board.mark_win(win_info)
+                self.last_move.set((x, y))
+                return True
+            self.cross_turn = not self.cross_turn
+            self.last_move.set((x, y))
+            if not self.multiplayer:
+                self.player_turn = not self.player_turn
+                if not self.player_turn:
+                    self._ai_turn()
+            return True
 
     def _ai_turn(self):
+        """
+        Request the AI move, it is played when found
+        """
         self.active.set(False)
         self.board.disable()
 
-        move = self.ai.get_move(self.cross_turn)
+        generation = self.generation
+        self._ai_future = self.service.request_move(self.ai, self.cross_turn)
+        self._ai_future.add_done_callback(
+            lambda future: self._ai_move_found(future, generation))
 
-        if self.ai.stopped:
+    def _ai_move_found(self, future, generation):
+        if future.cancelled() or future.exception() is not None:
             return
 
-        x, y = move
+        with self._lock:
+            if generation != self.generation:
+                return  # Searched for an earlier game
+
+            x, y = future.result()
 
-        self.active.set(True)
-        self.board.enable()
-        self.play_move(x, y)
+            self._ai_future = None
+            self.active.set(True)
+            self.board.enable()
+            self.play_move(x, y)
 
     def end_game(self):
         """
@@ -75,22 +138,37 @@ class Game:
         self.active.set(False)
         self.board.disable()
 
+    def _cancel_ai_move(self):
+        self.generation += 1
+        if self._ai_future is not None:
+            # If AI is currently looking for a move, terminate it
+            self._ai_future.cancel()
+            self._ai_future = None
+
+    def close(self):
+        """
+        End the game for good, the AI stops searching
+        """
+        with self._lock:
+            self._cancel_ai_move()
+            self.end_game()
+
     def new_game(self):
         """
         Start a new game
         """
-        self.ai.stop()  # If AI is currently looking for a move, termininate it
+        with self._lock:
+            self._cancel_ai_move()
 
-        self.board.reset()
-        self.active.set(True)
+            self.board.reset()
+            self.active.set(True)
 
-        self.player_turn = self.player_starting
-        self.player_starting = not self.player_starting
-        self.cross_turn = True
+            self.player_turn = self.player_starting
+            self.player_starting = not self.player_starting
+            self.cross_turn = True
 
-        if not self.multiplayer and not self.player_turn:
-            ai_thread = Thread(target=self._ai_turn, daemon=True)
-            ai_thread.start()
+            if not self.multiplayer and not self.player_turn:
+                self._ai_turn()
 
     def set_multiplayer(self, is_multiplayer):
         """
@@ -110,7 +188,12 @@ class Game:
         elif self.difficulty == 2:
             self.ai = RuleAI(self.board)
         elif self.difficulty == 3:
-            self.ai = CombinedAI(self.board, 4)
+            board_cls = SparseBoard if self.sparse else BitBoard
+            self.ai = CombinedAI(self.board, 4, board_cls=board_cls,
+                                 time_limit_ms=self.AI_TIME_LIMIT_MS,
+                                 book=self.book,
+                                 evaluation_cache=self.evaluation_cache,
+                                 transposition_table=self.transposition_table)
 
     def set_difficulty(self, difficulty):
         """
@@ -17,12 +17,14 @@ class Observable:
         for c in self._callables:
             c(self._value, self.parent)
 
-    def set(self, value):
+    def set(self, value, notify=True):
         """
-        Set new value
+        Set new value, handlers are not called if `notify` is False
+        (the change is reported some other way)
         """
         self._value = value
-        self._notify()
+        if notify:
+            self._notify()
 
     def get(self):
         """
@@ -0,0 +1,282 @@
+"""
+Multi-process minimax search.
+
+The root moves are split between worker processes, each of them
+searching its subtree on its own copy of the board. The best rating
+found so far is shared, so that later root moves can be searched with
+a narrower window.
+
+The root position is sent to the workers as a list of its stones (the
+boards with their key tables are much larger), a worker sets its board
+up once per searched position.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from .ai import MinimaxAI
+from .board import BoardModel
+from .constants import Bound
+from .stats import SearchStats
+from .tile import TileModel
+from .symmetry import inverse_transform_move, transform_move
+
+# Shared between the main process and the workers, set by _init_worker
+_shared_rating = None  # Best root rating found so far
+_shared_search = None  # ID of the current search (guarded by the rating)
+_stop_flag = None
+_worker_depth = None
+_worker_ais = {}  # Size -> _WorkerAI searching the positions of that size
+_worker_position = None  # Set up on _worker_board
+_worker_board = None
+
+
+class _WorkerAI(MinimaxAI):
+    """
+    MinimaxAI running in a worker process, stopped by the shared flag
+    or by the start of another search than `search_id`
+    """
+    search_id = None
+
+    def _should_stop(self):
+        return _stop_flag.value or \
+            _shared_search.value != self.search_id or \
+            super()._should_stop()
+
+
+def _init_worker(shared_rating, shared_search, stop_flag, depth):
+    global _shared_rating, _shared_search, _stop_flag, _worker_depth
+
+    _shared_rating = shared_rating
+    _shared_search = shared_search
+    _stop_flag = stop_flag
+    _worker_depth = depth
+
+
+def _size_ai(size):
+    """
+    Return the worker AI for positions of `size` (the transposition
+    table keys don't include the size, so every size has its own)
+    """
+    ai = _worker_ais.get(size)
+    if ai is None:
+        ai = _worker_ais[size] = _WorkerAI(None, _worker_depth)
+    return ai
+
+
+def _board_position(board):
+    """
+    Return (board class, size, stones) of the position on `board`,
+    the stones are tuples (x, y, symbol)
+    """
+    if board.size is None:
+        positions = board.moves  # An unbounded SparseBoard
+    else:
+        positions = [(x, y) for x in range(board.size)
+                     for y in range(board.size) if not board.is_empty(x, y)]
+    stones = tuple((x, y, board.symbol_at(x, y)) for x, y in positions)
+    return type(board), board.size, stones
+
+
+def _position_board(position):
+    """
+    Return the worker board set up to `position` (see _board_position)
+    """
+    global _worker_position, _worker_board
+
+    if position != _worker_position:
+        board_cls, size, stones = position
+        if issubclass(board_cls, BoardModel):
+            board = board_cls(size, view=False)
+        else:
+            board = board_cls(size)
+        for x, y, symbol in stones:
+            board.place(x, y, symbol)
+        _worker_position, _worker_board = position, board
+    return _worker_board
+
+
+def _search_root_move(search_id, position, move, depth, cross_turn,
+                      alpha, beta):
+    """
+    Search the subtree after playing root `move` in `position` (see
+    _board_position) for the search `search_id`.
+
+    Returns (rating, alpha, beta, stats) with the window used for the
+    search and its SearchStats, or None if the search was stopped (or
+    another search started meanwhile).
+    """
+    with _shared_rating.get_lock():
+        if _shared_search.value != search_id:
+            return None  # Left over from a stopped search
+        shared_rating = _shared_rating.value
+
+    # Narrow the window by what the other workers have found
+    if cross_turn:
+        alpha = max(alpha, shared_rating)
+        symbol = TileModel.Symbols.CROSS
+    else:
+        beta = min(beta, shared_rating)
+        symbol = TileModel.Symbols.CIRCLE
+
+    board = _position_board(position)
+    ai = _size_ai(board.size)
+    ai.search_id = search_id
+    ai.stats = SearchStats()
+    ai._root_depth = depth - 1
+    board.place(*move, symbol)
+    minimax_result = ai.minimax(board, depth - 1, not cross_turn,
+                                alpha=alpha, beta=beta)
+    board.undo()  # The board is kept for the other root moves
+    if minimax_result is None:
+        return None
+
+    _, rating = minimax_result
+
+    with _shared_rating.get_lock():
+        if _shared_search.value != search_id:
+            return None  # Don't narrow the window of another search
+        if cross_turn and rating > _shared_rating.value:
+            _shared_rating.value = rating
+        elif not cross_turn and rating < _shared_rating.value:
+            _shared_rating.value = rating
+
+    return rating, alpha, beta, ai.stats
+
+
+class ParallelMinimaxAI(MinimaxAI):
+    """
+    MinimaxAI that searches the root moves in `workers` processes
+    (all CPUs by default).
+
+    The worker pool is kept between moves, call `close()` to shut
+    it down. Every search has an ID, tasks of earlier (stopped) searches
+    stop and don't touch the shared rating of the current one.
+    """
+    POLL_INTERVAL = 0.05  # Seconds between stop checks
+
+    def __init__(self, board, depth, board_cls=None,
+                 transposition_table=None, time_limit_ms=None,
+                 on_stats=None, workers=None, evaluation_cache=None):
+        super().__init__(board, depth, board_cls=board_cls,
+                         transposition_table=transposition_table,
+                         time_limit_ms=time_limit_ms, on_stats=on_stats,
+                         evaluation_cache=evaluation_cache)
+
+        self.workers = workers
+        self._executor = None
+        self._shared_rating = None
+        self._shared_search = None
+        self._stop_flag = None
+        self._search_id = 0
+
+    def _get_executor(self):
+        if self._executor is None:
+            context = multiprocessing.get_context()
+            self._shared_rating = context.Value("d", 0.0)
+            self._shared_search = context.Value("i", 0, lock=False)
+            self._stop_flag = context.Value("b", 0, lock=False)
+
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self._shared_rating, self._shared_search,
+                          self._stop_flag, self.depth))
+        return self._executor
+
+    def stop(self):
+        super().stop()
+        if self._stop_flag is not None:
+            self._stop_flag.value = 1
+
+    def close(self):
+        """
+        Shut down the worker processes
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def minimax(self, board, depth, cross_turn, alpha, beta):
+        """
+        Run the minimax algorithm, with root moves searched in parallel.
+
+        Returns the same as MinimaxAI.minimax.
+        """
+        if depth <= 1 or board.win_info:
+            # Not worth sending to the workers
+            return super().minimax(board, depth, cross_turn, alpha, beta)
+
+        self.stats.add_node(self._root_depth - depth)
+
+        position_key, transform = self.table_key(board, cross_turn)
+        entry = self.transposition_table.get(position_key)
+        best_known_move = None
+        if entry is not None and entry.move is not None:
+            best_known_move = inverse_transform_move(entry.move, transform,
+                                                     board.size)
+
+        moves = self.order_moves(board, cross_turn, best_known_move)
+        if moves is None:
+            return None
+
+        executor = self._get_executor()
+        self._search_id += 1
+        with self._shared_rating.get_lock():
+            self._shared_search.value = self._search_id
+            self._shared_rating.value = alpha if cross_turn else beta
+        self._stop_flag.value = 0
+
+        position = _board_position(board)
+        futures = {
+            executor.submit(_search_root_move, self._search_id, position,
+                            move, depth, cross_turn, alpha,
+                            beta): (index, move)
+            for index, move in enumerate(moves)
+        }
+
+        results = []  # (key, move, rating)
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=self.POLL_INTERVAL,
+                                 return_when=FIRST_COMPLETED)
+
+            for future in done:
+                search_result = future.result()
+                if search_result is None:
+                    continue  # Stopped
+
+                index, move = futures[future]
+                rating, used_alpha, used_beta, stats = search_result
+                self.stats.merge(stats, ply_offset=1)
+
+                # A result outside of its window is only a bound, prefer
+                # exact results of the same rating (and earlier moves)
+                if cross_turn:
+                    key = (rating, rating > used_alpha, -index)
+                else:
+                    key = (-rating, rating < used_beta, -index)
+                results.append((key, move, rating))
+
+            if self._should_stop():
+                self._stop_flag.value = 1
+                for future in pending:
+                    future.cancel()
+                return None
+
+        _, move, rating = max(results)
+        # The workers' continuations are not sent back
+        self._pv[self._root_depth - depth] = [move]
+
+        if rating <= alpha:
+            bound = Bound.UPPER
+        elif rating >= beta:
+            bound = Bound.LOWER
+        else:
+            bound = Bound.EXACT
+        self.transposition_table.store(
+            position_key, depth, bound, rating,
+            transform_move(move, transform, board.size))
+
+        return move, rating
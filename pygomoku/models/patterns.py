@@ -0,0 +1,262 @@
+"""
+Pattern-based evaluation.
+
+Every symbol is rated in each direction by the shape of the line of 9
+cells around it (4 on each side). The line is encoded from the point of
+view of the symbol's player as a base 3 number -- 0 for an empty cell,
+1 for their symbol, 2 for an opponent symbol or a cell off the board --
+which indexes a precomputed table of shape scores. Unlike groups, shapes
+see through gaps, so `XX_X` is rated as a (broken) three.
+
+The line codes of all cells are kept up to date on place/undo, placing
+a symbol only changes the codes of the 8 cells around it in each
+direction.
+"""
+
+from functools import lru_cache
+
+from .bitboard import BitBoard, EMPTY, CROSS, CIRCLE, PADDING
+from .board import rate_group
+
+LINE_RADIUS = 4
+LINE_LENGTH = 2 * LINE_RADIUS + 1  # Cells in an encoded line
+LINE_CODES = 3 ** LINE_LENGTH
+# (dx, dy) of the BitBoard group directions, in the order of its steps
+LINE_DIRECTIONS = ((1, 0), (0, 1), (1, 1), (1, -1))
+
+MIDDLE_WEIGHT = 3 ** LINE_RADIUS  # Of the middle cell in a line code
+WIN_SCORE = rate_group(BitBoard.WINNING_COUNT, 0)
+
+# Cell codes in an encoded line
+LINE_EMPTY = 0
+LINE_OWN = 1
+LINE_BLOCKED = 2
+
+
+@lru_cache(maxsize=None)
+def line_shape(cells):
+    """
+    Return (size, open) of the best shape the middle symbol of `cells`
+    (a tuple of LINE_LENGTH line codes) is part of.
+
+    `size` is the most symbols in a 5 cell part of the line around the
+    middle symbol that has no blocked cell, a shape is open if adding
+    a symbol makes it an open shape one larger (open four has two ways
+    to win).
+    """
+    count = BitBoard.WINNING_COUNT
+    free_windows = []  # (start, cells) of 5 cells with the middle one
+    for start in range(LINE_RADIUS - count + 1, LINE_RADIUS + 1):
+        window = cells[start:start + count]
+        if LINE_BLOCKED not in window:
+            free_windows.append((start, window))
+    if not free_windows:
+        return 0, False  # Can never be a part of a win in this direction
+
+    size = max(window.count(LINE_OWN) for _, window in free_windows)
+    if size >= count:
+        return size, True
+
+    # Empty cells of the free windows with the most symbols
+    empty_cells = set()
+    for start, window in free_windows:
+        if window.count(LINE_OWN) == size:
+            empty_cells.update(start + i for i, code in enumerate(window)
+                               if code == LINE_EMPTY)
+
+    if size == count - 1:
+        return size, len(empty_cells) >= 2
+
+    for cell in empty_cells:
+        extended = cells[:cell] + (LINE_OWN,) + cells[cell + 1:]
+        if line_shape(extended) == (size + 1, True):
+            return size, True
+    return size, False
+
+
+@lru_cache(maxsize=None)
+def pattern_table():
+    """
+    Return the list of (unsigned) scores of all line codes, the score
+    of a code is the score of a group of the size of the shape (0 if
+    the middle cell is not a symbol)
+    """
+    table = [0] * LINE_CODES
+    for code in range(LINE_CODES):
+        cells = []
+        rest = code
+        for _ in range(LINE_LENGTH):
+            rest, cell = divmod(rest, 3)
+            cells.append(cell)
+        cells = tuple(cells)
+
+        if cells[LINE_RADIUS] != LINE_OWN:
+            continue
+        size, is_open = line_shape(cells)
+        if size:
+            table[code] = rate_group(size, 0 if is_open else 1)
+    return table
+
+
+def _lines(size):
+    """
+    Yield (index, direction number, offset, neighbor index or None if
+    it is off the board) for all cells of a BitBoard of `size` and the
+    cells at most LINE_RADIUS far in their lines
+    """
+    board = BitBoard(size)
+    for x in range(size):
+        for y in range(size):
+            for direction, (dx, dy) in enumerate(LINE_DIRECTIONS):
+                for offset in range(-LINE_RADIUS, LINE_RADIUS + 1):
+                    if offset == 0:
+                        continue
+                    nx, ny = x + offset * dx, y + offset * dy
+                    neighbor = board.index(nx, ny) \
+                        if 0 <= nx < size and 0 <= ny < size else None
+                    yield board.index(x, y), direction, offset, neighbor
+
+
+@lru_cache(maxsize=None)
+def line_neighbors(size):
+    """
+    Return the cells whose line codes change by placing a symbol, for
+    a BitBoard of `size`.
+
+    The result is indexed by symbol code and cell index, the items are
+    lists of (slot, neighbor index, cross change, circle change), where
+    slot is the neighbor index * 4 + direction number and the changes
+    are added to the line codes of the neighbor's slot from the point
+    of view of cross and circle.
+    """
+    cells = size * (size + PADDING)
+    neighbors = [None, [[] for _ in range(cells)], [[] for _ in range(cells)]]
+    for index, direction, offset, neighbor in _lines(size):
+        if neighbor is None:
+            continue
+
+        # The cell is at -offset in the line of the neighbor
+        weight = 3 ** (LINE_RADIUS - offset)
+        own, blocked = LINE_OWN * weight, LINE_BLOCKED * weight
+        slot = neighbor * 4 + direction
+        neighbors[CROSS][index].append((slot, neighbor, own, blocked))
+        neighbors[CIRCLE][index].append((slot, neighbor, blocked, own))
+    return neighbors
+
+
+@lru_cache(maxsize=None)
+def initial_line_codes(size):
+    """
+    Return the line codes (indexed by slot) of an empty board of `size`,
+    only the cells off the board are blocked
+    """
+    codes = [0] * (size * (size + PADDING) * 4)
+    for index, direction, offset, neighbor in _lines(size):
+        if neighbor is None:
+            codes[index * 4 + direction] += \
+                LINE_BLOCKED * 3 ** (LINE_RADIUS + offset)
+    return codes
+
+
+class PatternBoard(BitBoard):
+    """
+    BitBoard rated by line patterns instead of groups.
+
+    The rating is the sum of pattern_table scores of all symbols in all
+    directions, positive for cross, negative for circle.
+    """
+    __slots__ = ("_line_codes", "_neighbors", "_table")
+
+    def __init__(self, size):
+        self._neighbors = line_neighbors(size)
+        self._table = pattern_table()
+        super().__init__(size)
+
+    def _reset_state(self):
+        super()._reset_state()
+        # Line codes from the point of view of each player
+        self._line_codes = [None, list(initial_line_codes(self.size)),
+                            list(initial_line_codes(self.size))]
+
+    def _set_cell(self, index, code):
+        cells = self._cells
+        table = self._table
+        cross_codes = self._line_codes[CROSS]
+        circle_codes = self._line_codes[CIRCLE]
+
+        change = 0
+        for slot, neighbor, cross_change, circle_change \
+                in self._neighbors[code][index]:
+            neighbor_code = cells[neighbor]
+            if neighbor_code == EMPTY:
+                cross_codes[slot] += cross_change
+                circle_codes[slot] += circle_change
+            elif neighbor_code == CROSS:
+                old = cross_codes[slot]
+                cross_codes[slot] = old + cross_change
+                circle_codes[slot] += circle_change
+                change += table[old + cross_change] - table[old]
+            else:
+                old = circle_codes[slot]
+                circle_codes[slot] = old + circle_change
+                cross_codes[slot] += cross_change
+                change -= table[old + circle_change] - table[old]
+
+        # The middle cells of the lines of the symbol itself
+        own_change, blocked_change = MIDDLE_WEIGHT * LINE_OWN, \
+            MIDDLE_WEIGHT * LINE_BLOCKED
+        if code == CROSS:
+            cross_change, circle_change = own_change, blocked_change
+        else:
+            cross_change, circle_change = blocked_change, own_change
+
+        own_codes = self._line_codes[code]
+        score = 0
+        for slot in range(index * 4, index * 4 + 4):
+            cross_codes[slot] += cross_change
+            circle_codes[slot] += circle_change
+            score += table[own_codes[slot]]
+        change += score if code == CROSS else -score
+
+        cells[index] = code
+        self._masks[code] |= 1 << index
+        return change
+
+    def _clear_cell(self, index):
+        code = self._cells[index]
+        cross_codes = self._line_codes[CROSS]
+        circle_codes = self._line_codes[CIRCLE]
+
+        for slot, _, cross_change, circle_change \
+                in self._neighbors[code][index]:
+            cross_codes[slot] -= cross_change
+            circle_codes[slot] -= circle_change
+
+        if code == CROSS:
+            cross_change, circle_change = MIDDLE_WEIGHT * LINE_OWN, \
+                MIDDLE_WEIGHT * LINE_BLOCKED
+        else:
+            cross_change, circle_change = MIDDLE_WEIGHT * LINE_BLOCKED, \
+                MIDDLE_WEIGHT * LINE_OWN
+        for slot in range(index * 4, index * 4 + 4):
+            cross_codes[slot] -= cross_change
+            circle_codes[slot] -= circle_change
+
+        self._cells[index] = EMPTY
+        self._masks[code] &= ~(1 << index)
+
+    def _check_move_win(self, index, code):
+        # Only a symbol in a five has the score of a win
+        own_codes = self._line_codes[code]
+        table = self._table
+        if max(table[own_codes[slot]]
+               for slot in range(index * 4, index * 4 + 4)) >= WIN_SCORE:
+            super()._check_move_win(index, code)
+
+    def clone(self):
+        cloned = super().clone()
+        cloned._neighbors = self._neighbors
+        cloned._table = self._table
+        cloned._line_codes = [None, list(self._line_codes[CROSS]),
+                              list(self._line_codes[CIRCLE])]
+        return cloned
@@ -0,0 +1,263 @@
+"""
+Game records -- storing played games and replaying them.
+
+Binary archive format: a header of the magic bytes b"PGGR" and version
+(1 byte), followed by any number of games. A game is its board size
+(varint), rules (1 byte, index to RULES), number of moves (varint)
+and the moves, each as the varint x * size + y. Varints are unsigned
+LEB128 (7 bits per byte, the high bit set on all but the last byte),
+so a move on a board up to 11x11 takes one byte, up to 181x181 two.
+
+Text notation: moves separated by spaces, each a column letter (from
+"a", by y) followed by a row number (from 1 at the bottom, by x),
+e.g. "h8 h9 i8" -- like the usual notation of gomoku diagrams.
+"""
+
+from .board import RatedBoard
+from .tile import TileModel
+
+FREESTYLE = "freestyle"  # Five or more in a row wins
+# Rule sets of the games, the rules byte is an index to this
+RULES = (FREESTYLE,)
+
+COLUMN_LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+class RecordFormatError(Exception):
+    """
+    The data is not a valid game record
+    """
+
+
+def encode_varint(value):
+    """
+    Return the bytes of a non-negative integer as a varint
+    """
+    encoded = bytearray()
+    while value >= 0x80:
+        encoded.append(value & 0x7F | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def read_varint(stream):
+    """
+    Read a varint from a binary `stream`, return None at the end
+    of the stream
+    """
+    value = 0
+    shift = 0
+    while True:
+        byte = stream.read(1)
+        if not byte:
+            if shift:
+                raise RecordFormatError("unexpected end of a varint")
+            return None
+
+        value |= (byte[0] & 0x7F) << shift
+        if byte[0] < 0x80:
+            return value
+        shift += 7
+
+
+def format_move(move, size):
+    """
+    Return the text notation of a move (x, y) on a board of `size`
+    """
+    x, y = move
+    return f"{COLUMN_LETTERS[y]}{size - x}"
+
+
+def parse_move(text, size):
+    """
+    Return the move (x, y) of its text notation on a board of `size`
+    """
+    column = COLUMN_LETTERS.find(text[:1].lower())
+    try:
+        row = int(text[1:])
+    except ValueError:
+        row = 0
+
+    if not (0 <= column < size and 1 <= row <= size):
+        raise RecordFormatError(f"'{text}' is not a move on a board "
+                                f"of size {size}")
+    return size - row, column
+
+
+class GameRecord:
+    """
+    The moves of one game (cross plays first) with its board size
+    and rules
+    """
+    def __init__(self, size, moves=(), rules=FREESTYLE):
+        if rules not in RULES:
+            raise ValueError(f"Unknown rules '{rules}', choose from "
+                             f"{', '.join(RULES)}")
+        self.size = size
+        self.moves = list(moves)
+        self.rules = rules
+
+    def __eq__(self, other):
+        if not isinstance(other, GameRecord):
+            return NotImplemented
+        return (self.size, self.moves, self.rules) == \
+            (other.size, other.moves, other.rules)
+
+    def __repr__(self):
+        return f"GameRecord({self.size}, {self.moves!r}, {self.rules!r})"
+
+    @classmethod
+    def from_board(cls, board, rules=FREESTYLE):
+        """
+        Create a record of the moves played on `board`
+        """
+        return cls(board.size, board.moves, rules)
+
+    def replay(self, board=None):
+        """
+        Place the moves on `board` (a new RatedBoard without view if not
+        given, otherwise it is reset first) and return it.
+
+        The replay stops after the first win, like a game does.
+        """
+        if board is None:
+            board = RatedBoard(self.size, view=False)
+        else:
+            board.reset()
+
+        for index, move in enumerate(self.moves):
+            if board.win_info:
+                break
+            symbol = TileModel.Symbols.CROSS if index % 2 == 0 \
+                else TileModel.Symbols.CIRCLE
+            if not board.place(*move, symbol):
+                raise RecordFormatError(f"move {index + 1} "
+                                        f"{move} is not possible")
+        return board
+
+    def to_bytes(self):
+        """
+        Return the game in the binary archive format (without
+        the file header)
+        """
+        encoded = bytearray(encode_varint(self.size))
+        encoded.append(RULES.index(self.rules))
+        encoded += encode_varint(len(self.moves))
+        for x, y in self.moves:
+            encoded += encode_varint(x * self.size + y)
+        return bytes(encoded)
+
+    @classmethod
+    def read(cls, stream):
+        """
+        Read a game written by `to_bytes` from a binary `stream`, return
+        None at the end of the stream
+        """
+        size = read_varint(stream)
+        if size is None:
+            return None
+
+        rules = stream.read(1)
+        count = read_varint(stream)
+        if not rules or count is None:
+            raise RecordFormatError("unexpected end of a game")
+        if rules[0] >= len(RULES):
+            raise RecordFormatError(f"unknown rules {rules[0]}")
+
+        moves = []
+        for _ in range(count):
+            index = read_varint(stream)
+            if index is None:
+                raise RecordFormatError("unexpected end of a game")
+            if index >= size * size:
+                raise RecordFormatError(f"move {index} is off the board")
+            moves.append(divmod(index, size))
+        return cls(size, moves, RULES[rules[0]])
+
+    def to_text(self):
+        """
+        Return the moves in the text notation
+        """
+        if self.size > len(COLUMN_LETTERS):
+            raise RecordFormatError(f"the text notation has no columns "
+                                    f"for size {self.size}")
+        return " ".join(format_move(move, self.size) for move in self.moves)
+
+    @classmethod
+    def from_text(cls, text, size, rules=FREESTYLE):
+        """
+        Create a record from moves in the text notation
+        """
+        return cls(size, [parse_move(move, size) for move in text.split()],
+                   rules)
+
+
+class RecordWriter:
+    """
+    Appends games to a binary archive, use as a context manager
+    """
+    MAGIC = b"PGGR"
+    VERSION = 1
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, "wb")
+        self._file.write(self.MAGIC + bytes([self.VERSION]))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._file.close()
+        self._file = None
+
+    def write(self, record):
+        """
+        Append the game of `record`
+        """
+        self._file.write(record.to_bytes())
+
+
+def iter_records(path):
+    """
+    Generate the GameRecords of a binary archive one by one, without
+    reading the whole file
+    """
+    with open(path, "rb") as archive:
+        header = archive.read(len(RecordWriter.MAGIC) + 1)
+        if header[:-1] != RecordWriter.MAGIC or \
+                header[-1:] != bytes([RecordWriter.VERSION]):
+            raise RecordFormatError(f"{path}: not a game archive of "
+                                    f"version {RecordWriter.VERSION}")
+
+        while True:
+            record = GameRecord.read(archive)
+            if record is None:
+                return
+            yield record
+
+
+def replay_records(path):
+    """
+    Replay the games of a binary archive one by one, generate tuples
+    (record, board after the game).
+
+    The board is reused for games of the same size, it is only valid
+    until the next game is generated.
+    """
+    board = None
+    for record in iter_records(path):
+        if board is None or board.size != record.size:
+            board = RatedBoard(record.size, view=False)
+        yield record, record.replay(board)
+
+
+def write_records(path, records):
+    """
+    Write `records` (any iterable) to a binary archive
+    """
+    with RecordWriter(path) as writer:
+        for record in records:
+            writer.write(record)
@@ -0,0 +1,243 @@
+"""
+Services running AI move searches on a long-lived pool of workers, so
+that one process can serve many games.
+
+A move request returns a concurrent.futures.Future of the move (or an
+awaitable, see AIService.get_move). AIService searches on threads: the
+future stays pending until the move is found, so it can be cancelled
+any time before that; cancelling it stops the search. Searches of one
+AI never run concurrently -- a new request of the same AI waits until
+the previous (possibly cancelled) search ends.
+
+The searches are CPU-bound, so threads share one core (the GIL).
+ProcessAIService searches on processes instead, for games that should
+be searched in parallel.
+"""
+
+import asyncio
+import random
+from concurrent.futures import Future, ProcessPoolExecutor, \
+    ThreadPoolExecutor
+from threading import Lock
+from weakref import WeakKeyDictionary
+
+from .ai import MinimaxAI
+from .board import BoardModel
+from .book import OpeningBook
+from .cache import EvaluationCache
+from .transposition import TranspositionTable
+
+
+class AIService:
+    """
+    Runs `get_move` of AIs on a pool of `max_workers` threads
+    (the ThreadPoolExecutor default if not given).
+
+    Call `close()` to cancel the pending requests and shut the pool
+    down.
+    """
+    def __init__(self, max_workers=None):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="pygomoku-ai")
+        self._ai_locks = WeakKeyDictionary()  # AI -> Lock of its searches
+        self._locks_lock = Lock()
+        self._pending = set()  # Futures of unfinished requests
+        self._closed = False
+
+    def _ai_lock(self, ai):
+        with self._locks_lock:
+            lock = self._ai_locks.get(ai)
+            if lock is None:
+                lock = self._ai_locks[ai] = Lock()
+            return lock
+
+    def request_move(self, ai, cross_turn):
+        """
+        Start searching the move of `ai`, return a Future of the move
+        (x, y). Cancelling the future stops the search.
+        """
+        if self._closed:
+            raise RuntimeError("The AI service is closed")
+
+        future = Future()
+        with self._locks_lock:
+            self._pending.add(future)
+        future.add_done_callback(lambda done: self._request_done(done, ai))
+
+        self._executor.submit(self._run, future, ai, cross_turn)
+        return future
+
+    def _run(self, future, ai, cross_turn):
+        with self._ai_lock(ai):
+            if future.cancelled():
+                return  # Cancelled before the search started
+
+            try:
+                move = ai.get_move(cross_turn)
+            except BaseException as error:  # pylint: disable=broad-except
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(error)
+                return
+
+            # Only completes the future if it was not cancelled meanwhile
+            if future.set_running_or_notify_cancel():
+                future.set_result(move)
+
+    def _request_done(self, future, ai):
+        with self._locks_lock:
+            self._pending.discard(future)
+
+        if future.cancelled():
+            ai.stop()
+
+    async def get_move(self, ai, cross_turn):
+        """
+        Search the move of `ai` and return it, cancelling the awaiting
+        task cancels the search
+        """
+        return await asyncio.wrap_future(self.request_move(ai, cross_turn))
+
+    def close(self):
+        """
+        Cancel all pending requests and shut the worker threads down
+        """
+        self._closed = True
+        with self._locks_lock:
+            pending = list(self._pending)
+        for future in pending:
+            future.cancel()
+        self._executor.shutdown(wait=False)
+
+
+# Of a ProcessAIService worker
+_worker_ais = {}  # (AI spec, board class, size) -> AI
+_worker_tables = {}  # Size -> TranspositionTable of the AIs of that size
+_worker_cache = None  # EvaluationCache of all the AIs
+
+
+def _init_worker():
+    # Forked workers would all continue the random sequence of the parent
+    random.seed()
+
+
+def _ai_spec(ai):
+    """
+    Return (AI class, options) describing `ai` for creating it in
+    a worker, the options are sorted (name, value) pairs
+    """
+    options = {}
+    if isinstance(ai, MinimaxAI):
+        options = {"depth": ai.depth, "board_cls": ai.board_cls,
+                   "time_limit_ms": ai.time_limit_ms}
+        if getattr(ai, "book", None) is not None:
+            options["book"] = True  # The worker loads the default book
+    return type(ai), tuple(sorted(options.items()))
+
+
+def _worker_ai(spec, board_cls, size):
+    """
+    Return the worker AI of `spec` (see _ai_spec) playing on a board of
+    `board_cls` and `size`
+    """
+    global _worker_cache
+
+    key = (spec, board_cls, size)
+    ai = _worker_ais.get(key)
+    if ai is not None:
+        return ai
+
+    if issubclass(board_cls, BoardModel):
+        board = board_cls(size, view=False)
+    else:
+        board = board_cls(size)
+
+    ai_cls, options = spec
+    options = dict(options)
+    if not issubclass(ai_cls, MinimaxAI):
+        ai = ai_cls(board)
+    else:
+        if options.pop("book", False):
+            options["book"] = OpeningBook.load_default(size)
+        if _worker_cache is None:
+            _worker_cache = EvaluationCache()
+        # The table keys don't include the size, so the tables don't
+        # mix sizes
+        table = _worker_tables.get(size)
+        if table is None:
+            table = _worker_tables[size] = TranspositionTable()
+        ai = ai_cls(board, evaluation_cache=_worker_cache,
+                    transposition_table=table, **options)
+
+    _worker_ais[key] = ai
+    return ai
+
+
+def _search_move(spec, board_cls, size, stones, cross_turn):
+    """
+    Set the worker board of the AI up with `stones` (x, y, symbol) and
+    return the move of the AI
+    """
+    ai = _worker_ai(spec, board_cls, size)
+    board = ai.board.reset()
+    for x, y, symbol in stones:
+        board.place(x, y, symbol)
+    return ai.get_move(cross_turn)
+
+
+class ProcessAIService:
+    """
+    Runs AI searches on a pool of `max_workers` processes (the number of
+    CPUs if not given), it can replace AIService.
+
+    The AIs are not sent to the workers, only their class and options
+    and the moves on their board. Every worker keeps its own copies of
+    the AIs (with the default opening book), which share a transposition
+    table per board size and one evaluation cache. Searches only stop by
+    their time limit: cancelling a request that has started only drops
+    its move.
+    """
+    def __init__(self, max_workers=None):
+        self._executor = ProcessPoolExecutor(max_workers=max_workers,
+                                             initializer=_init_worker)
+        self._pending = set()  # Futures of unfinished requests
+        self._lock = Lock()
+        self._closed = False
+
+    def request_move(self, ai, cross_turn):
+        """
+        Start searching the move of `ai`, return a Future of the move
+        (x, y)
+        """
+        if self._closed:
+            raise RuntimeError("The AI service is closed")
+
+        board = ai.board
+        stones = [(x, y, board.symbol_at(x, y)) for x, y in board.moves]
+        future = self._executor.submit(_search_move, _ai_spec(ai),
+                                       type(board), board.size, stones,
+                                       cross_turn)
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._request_done)
+        return future
+
+    def _request_done(self, future):
+        with self._lock:
+            self._pending.discard(future)
+
+    async def get_move(self, ai, cross_turn):
+        """
+        Search the move of `ai` and return it
+        """
+        return await asyncio.wrap_future(self.request_move(ai, cross_turn))
+
+    def close(self):
+        """
+        Cancel all pending requests and shut the worker processes down
+        """
+        self._closed = True
+        with self._lock:
+            pending = list(self._pending)
+        for future in pending:
+            future.cancel()
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,374 @@
+"""
+A sparse board for large and unbounded boards.
+
+Only the occupied positions are stored (in a dict), so placing, undoing
+and generating moves costs time proportional to the number of symbols
+around, not to the area of the board. The board can be unbounded
+(`size` is None), positions may then have any (even negative)
+coordinates.
+"""
+
+from operator import xor
+
+from .bitboard import BitGroup
+from .board import BoardModel, Cell, GROUP_STEPS, WIN_DIRECTIONS, \
+                   rate_group
+from .observable import Observable
+from .symmetry import TRANSFORMS, symmetry_keys
+from .tile import TileModel
+from .zobrist import position_key, zobrist_keys
+
+# (dx, dy) of the positions whose moves become relevant by placing
+# a symbol (within BoardModel.CANDIDATE_DISTANCE)
+CLOSE_OFFSETS = tuple(
+    (dx, dy)
+    for dx in range(-BoardModel.CANDIDATE_DISTANCE,
+                    BoardModel.CANDIDATE_DISTANCE + 1)
+    for dy in range(-BoardModel.CANDIDATE_DISTANCE,
+                    BoardModel.CANDIDATE_DISTANCE + 1)
+    if (dx, dy) != (0, 0))
+
+
+class SparseBoard:
+    """
+    A board without TileModels, storing only the occupied positions.
+
+    Implements the place/undo/rating/groups/check_win/win_info contract
+    of RatedBoard. On a bounded board, the ratings and hashes (including
+    `symmetry_hashes`) are the same as those of a RatedBoard of the same
+    size. An unbounded board has no symmetries, its `symmetry_hashes`
+    are None.
+
+    Like a RatedBoard without view, it can also be the board of a Game
+    (it has `moves`, and the tile state changes are no-ops).
+    """
+    WINNING_COUNT = BoardModel.WINNING_COUNT
+
+    __slots__ = ("size", "rating", "hash", "win_info", "candidates",
+                 "_stones", "_candidate_counts", "_move_stack",
+                 "_win_move_count", "_zobrist_keys", "symmetry_hashes",
+                 "_symmetry_keys", "states_changed")
+
+    def __init__(self, size=None):
+        self.size = size
+        if size is not None:
+            self._zobrist_keys = zobrist_keys(size)
+            self._symmetry_keys = symmetry_keys(size)
+        else:
+            self._zobrist_keys = self._symmetry_keys = None
+        # Never set, the board has no tile states
+        self.states_changed = Observable(self, {})
+        self._reset_state()
+
+    def _reset_state(self):
+        self._stones = {}  # (x, y) -> symbol, in the order of placing
+        # For every position, the number of symbols close to it
+        self._candidate_counts = {}
+        # Empty positions with a close symbol
+        self.candidates = set()
+        # (x, y, rating, hash and symmetry hashes before the move)
+        self._move_stack = []
+        self.rating = 0
+        self.hash = 0
+        self.symmetry_hashes = (0,) * len(TRANSFORMS) \
+            if self.size is not None else None
+        self.win_info = False
+        self._win_move_count = 0  # Number of moves when win_info was set
+
+    @classmethod
+    def from_board(cls, board):
+        """
+        Create a SparseBoard with the same symbols as `board` (a board
+        with `moves`, e.g. a RatedBoard or a SparseBoard), in time
+        proportional to the number of symbols
+        """
+        sparse = cls(board.size)
+        for x, y in board.moves:
+            sparse.place(x, y, board.symbol_at(x, y))
+        sparse._move_stack = []  # The copied moves can't be undone
+        sparse._win_move_count = 0
+        return sparse
+
+    def reset(self):
+        """
+        Clear all symbols on board
+        """
+        self._reset_state()
+        return self
+
+    @property
+    def has_view(self):
+        """
+        Whether the board has TileModels (never)
+        """
+        return False
+
+    @property
+    def moves(self):
+        """
+        The list of (x, y) positions of the placed symbols, in the order
+        they were placed
+        """
+        return list(self._stones)
+
+    def on_board(self, x, y):
+        """
+        Return True if (x, y) is a position of the board
+        """
+        return self.size is None or \
+            (0 <= x < self.size and 0 <= y < self.size)
+
+    def symbol_at(self, x, y):
+        """
+        Return the symbol at (x, y)
+        """
+        return self._stones.get((x, y), TileModel.Symbols.EMPTY)
+
+    def is_empty(self, x, y):
+        """
+        Return True if there is no symbol at (x, y)
+        """
+        return (x, y) not in self._stones
+
+    def tile(self, x, y):
+        """
+        Return the position (x, y) as a Cell
+        """
+        return Cell(x, y)
+
+    def _key(self, symbol, x, y):
+        if self._zobrist_keys is None:
+            return position_key(symbol, x, y)
+        return self._zobrist_keys[symbol][x][y]
+
+    def _run(self, x, y, dx, dy, symbol):
+        """
+        Return (first x, first y, size, blocked) of the group of `symbol`
+        going through (x, y) in the direction (dx, dy)
+        """
+        stones = self._stones
+        start_x, start_y = x, y
+        while stones.get((start_x - dx, start_y - dy)) == symbol:
+            start_x, start_y = start_x - dx, start_y - dy
+        end_x, end_y = x, y
+        while stones.get((end_x + dx, end_y + dy)) == symbol:
+            end_x, end_y = end_x + dx, end_y + dy
+
+        # Board edges don't block groups, only opponent symbols do
+        blocked = 0
+        before = stones.get((start_x - dx, start_y - dy))
+        if before is not None and before != symbol:
+            blocked += 1
+        after = stones.get((end_x + dx, end_y + dy))
+        if after is not None and after != symbol:
+            blocked += 1
+
+        size = max(abs(end_x - start_x), abs(end_y - start_y)) + 1
+        return start_x, start_y, size, blocked
+
+    def _run_score(self, x, y, dx, dy, symbol):
+        _, _, size, blocked = self._run(x, y, dx, dy, symbol)
+        score = rate_group(size, blocked)
+        return score if symbol == TileModel.Symbols.CROSS else -score
+
+    def _local_score(self, x, y, dx, dy):
+        """
+        Return the summed score of the groups touching (x, y)
+        in the direction (dx, dy)
+        """
+        stones = self._stones
+        symbol = stones.get((x, y))
+        score = 0
+
+        if symbol is not None:
+            score += self._run_score(x, y, dx, dy, symbol)
+
+        for nx, ny in ((x - dx, y - dy), (x + dx, y + dy)):
+            neighbor_symbol = stones.get((nx, ny))
+            if neighbor_symbol is not None and neighbor_symbol != symbol:
+                score += self._run_score(nx, ny, dx, dy, neighbor_symbol)
+
+        return score
+
+    def _close_positions(self, x, y):
+        """
+        Return a list of positions of the board close to (x, y)
+        (see CLOSE_OFFSETS)
+        """
+        if self.size is None:
+            return [(x + dx, y + dy) for dx, dy in CLOSE_OFFSETS]
+
+        size = self.size
+        return [(x + dx, y + dy) for dx, dy in CLOSE_OFFSETS
+                if 0 <= x + dx < size and 0 <= y + dy < size]
+
+    def hash_after(self, x, y, symbol):
+        """
+        Return the hash of the position after placing `symbol` at (x, y)
+        (without placing it)
+        """
+        return self.hash ^ self._key(symbol, x, y)
+
+    def place(self, x, y, symbol):
+        """
+        Places `symbol` at (x, y)
+        """
+        if (x, y) in self._stones or not self.on_board(x, y):
+            return False
+
+        self._move_stack.append((x, y, self.rating, self.hash,
+                                 self.symmetry_hashes))
+
+        steps = GROUP_STEPS.values()
+        before = 0
+        for dx, dy in steps:
+            before += self._local_score(x, y, dx, dy)
+        self._stones[x, y] = symbol
+        after = 0
+        for dx, dy in steps:
+            after += self._local_score(x, y, dx, dy)
+
+        self.rating += after - before
+        self.hash ^= self._key(symbol, x, y)
+        if self._symmetry_keys is not None:
+            self.symmetry_hashes = tuple(map(
+                xor, self.symmetry_hashes, self._symmetry_keys[symbol][x][y]))
+
+        stones = self._stones
+        counts = self._candidate_counts
+        candidates = self.candidates
+        candidates.discard((x, y))
+        for position in self._close_positions(x, y):
+            counts[position] = counts.get(position, 0) + 1
+            if position not in stones:
+                candidates.add(position)
+
+        if not self.win_info:
+            self._check_move_win(x, y, symbol)
+
+        return self
+
+    def _check_move_win(self, x, y, symbol):
+        """
+        Set win_info if the symbol at (x, y) is in a winning group
+        """
+        for direction, (dx, dy) in GROUP_STEPS.items():
+            first_x, first_y, size, _ = self._run(x, y, dx, dy, symbol)
+            if size >= self.WINNING_COUNT:
+                self.win_info = (Cell(first_x, first_y),
+                                 WIN_DIRECTIONS[direction], symbol)
+                self._win_move_count = len(self._move_stack)
+                return
+
+    def undo(self):
+        """
+        "Unplaces" last tile placement
+        """
+        if len(self._move_stack) == self._win_move_count:
+            self.win_info = False
+
+        x, y, rating, position_hash, symmetry_hashes = \
+            self._move_stack.pop()
+
+        del self._stones[x, y]
+        self.rating = rating
+        self.hash = position_hash
+        self.symmetry_hashes = symmetry_hashes
+
+        counts = self._candidate_counts
+        candidates = self.candidates
+        for position in self._close_positions(x, y):
+            count = counts[position] - 1
+            if count:
+                counts[position] = count
+            else:
+                del counts[position]
+                candidates.discard(position)
+
+        if (x, y) in counts:
+            self.candidates.add((x, y))
+
+    @property
+    def groups(self):
+        """
+        All groups of symbols on the board (computed on demand)
+        """
+        stones = self._stones
+        groups = []
+        for direction, (dx, dy) in GROUP_STEPS.items():
+            for (x, y), symbol in stones.items():
+                if stones.get((x - dx, y - dy)) == symbol:
+                    continue  # Not the first tile of the group
+
+                _, _, size, blocked = self._run(x, y, dx, dy, symbol)
+                groups.append(BitGroup(x, y, direction, symbol, size,
+                                       blocked))
+        return groups
+
+    def check_win(self):
+        """
+        Check if one of the players won
+
+        Returns False or winning position start and direction
+        (in the format of BoardModel.check_win)
+        """
+        stones = self._stones
+        for (x, y), symbol in sorted(stones.items()):
+            for direction, (dx, dy) in GROUP_STEPS.items():
+                if stones.get((x - dx, y - dy)) == symbol:
+                    continue  # Not the first tile of the group
+
+                _, _, size, _ = self._run(x, y, dx, dy, symbol)
+                if size >= self.WINNING_COUNT:
+                    return Cell(x, y), WIN_DIRECTIONS[direction], symbol
+        return False
+
+    def disable(self):
+        """
+        Nothing to disable, the board has no tiles
+        """
+        return self
+
+    def enable(self):
+        """
+        Nothing to enable, the board has no tiles
+        """
+        return self
+
+    def mark_win(self, win_info):
+        """
+        Nothing to mark, the board has no tiles
+        """
+        return self
+
+    def relevant_moves(self):
+        """
+        Return a sorted list of (x, y) positions worth playing -- empty
+        positions that have a symbol close to them
+        """
+        if not self.candidates:
+            # Return the tile in the middle
+            center_coord = self.size // 2 if self.size is not None else 0
+            return [(center_coord, center_coord)]
+
+        return sorted(self.candidates)
+
+    def clone(self):
+        """
+        Return a copy of the board
+        """
+        cloned = self.__class__.__new__(self.__class__)
+        cloned.size = self.size
+        cloned.rating = self.rating
+        cloned.hash = self.hash
+        cloned.symmetry_hashes = self.symmetry_hashes
+        cloned.win_info = self.win_info
+        cloned.candidates = set(self.candidates)
+        cloned._stones = dict(self._stones)
+        cloned._candidate_counts = dict(self._candidate_counts)
+        cloned._move_stack = list(self._move_stack)
+        cloned._win_move_count = self._win_move_count
+        cloned._zobrist_keys = self._zobrist_keys
+        cloned._symmetry_keys = self._symmetry_keys
+        cloned.states_changed = Observable(cloned, {})
+        return cloned
@@ -0,0 +1,124 @@
+"""
+Statistics about what a search did
+"""
+
+from collections import Counter
+
+
+class SearchStats:
+    """
+    Counters and timings of one AI move search.
+
+    Plies are counted from the root of the search (the root is ply 0),
+    times are in seconds.
+    """
+    def __init__(self):
+        self.nodes = 0
+        self.nodes_by_ply = Counter()
+        self.leaf_evaluations = 0
+        self.transposition_hits = 0
+        # Move ordering ratings found in the evaluation cache
+        self.evaluation_cache_hits = 0
+        self.threat_nodes = 0  # Positions searched by the VCF solver
+        self.cutoffs = 0
+        # Index of the move (in the searched order) causing each cutoff
+        self.cutoff_indices = Counter()
+        # Moves searched again after failing their null window search
+        self.researches = 0
+        # Searches repeated after failing their aspiration window
+        self.aspiration_failures = 0
+
+        self.generation_time = 0.0
+        self.ordering_time = 0.0
+        self.evaluation_time = 0.0
+
+        # Search depth -> time of the (iteration) search to that depth
+        self.depth_times = {}
+
+    def add_node(self, ply):
+        """
+        Count a searched position
+        """
+        self.nodes += 1
+        self.nodes_by_ply[ply] += 1
+
+    def add_cutoff(self, move_index):
+        """
+        Count an alpha-beta cutoff caused by the `move_index`-th move
+        """
+        self.cutoffs += 1
+        self.cutoff_indices[move_index] += 1
+
+    def merge(self, other, ply_offset=0):
+        """
+        Add statistics of a subtree search, whose root was
+        at `ply_offset`
+        """
+        self.nodes += other.nodes
+        for ply, nodes in other.nodes_by_ply.items():
+            self.nodes_by_ply[ply + ply_offset] += nodes
+        self.leaf_evaluations += other.leaf_evaluations
+        self.transposition_hits += other.transposition_hits
+        self.evaluation_cache_hits += other.evaluation_cache_hits
+        self.threat_nodes += other.threat_nodes
+        self.cutoffs += other.cutoffs
+        self.cutoff_indices.update(other.cutoff_indices)
+        self.researches += other.researches
+        self.aspiration_failures += other.aspiration_failures
+
+        self.generation_time += other.generation_time
+        self.ordering_time += other.ordering_time
+        self.evaluation_time += other.evaluation_time
+
+    @property
+    def max_ply(self):
+        """
+        The deepest ply reached
+        """
+        return max(self.nodes_by_ply, default=0)
+
+    @property
+    def branching_factor(self):
+        """
+        The effective branching factor, i.e. b such that
+        b ** max_ply is the number of nodes in the deepest ply
+        """
+        if not self.max_ply:
+            return 0.0
+        return self.nodes_by_ply[self.max_ply] ** (1 / self.max_ply)
+
+    @property
+    def first_move_cutoff_rate(self):
+        """
+        The share of cutoffs caused by the first searched move
+        (a measure of move ordering quality)
+        """
+        if not self.cutoffs:
+            return 0.0
+        return self.cutoff_indices[0] / self.cutoffs
+
+    def as_dict(self):
+        """
+        Return the statistics as a (JSON serializable) dict
+        """
+        return {
+            "nodes": self.nodes,
+            "nodes_by_ply": {str(ply): nodes for ply, nodes
+                             in sorted(self.nodes_by_ply.items())},
+            "leaf_evaluations": self.leaf_evaluations,
+            "transposition_hits": self.transposition_hits,
+            "evaluation_cache_hits": self.evaluation_cache_hits,
+            "threat_nodes": self.threat_nodes,
+            "cutoffs": self.cutoffs,
+            "cutoff_indices": {str(index): count for index, count
+                               in sorted(self.cutoff_indices.items())},
+            "first_move_cutoff_rate": self.first_move_cutoff_rate,
+            "researches": self.researches,
+            "aspiration_failures": self.aspiration_failures,
+            "branching_factor": self.branching_factor,
+            "generation_time": self.generation_time,
+            "ordering_time": self.ordering_time,
+            "evaluation_time": self.evaluation_time,
+            "depth_times": {str(depth): seconds for depth, seconds
+                            in sorted(self.depth_times.items())},
+        }
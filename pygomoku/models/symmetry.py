@@ -0,0 +1,117 @@
+"""
+Symmetries of the (square) board -- rotations and reflections
+"""
+
+from functools import lru_cache
+
+from .zobrist import zobrist_keys, turn_hash
+
+# Functions (x, y, n) -> (x, y), where n is the largest coordinate
+TRANSFORMS = (
+    lambda x, y, n: (x, y),          # Identity
+    lambda x, y, n: (y, n - x),      # Rotation by 90 degrees
+    lambda x, y, n: (n - x, n - y),  # Rotation by 180 degrees
+    lambda x, y, n: (n - y, x),      # Rotation by 270 degrees
+    lambda x, y, n: (x, n - y),      # Reflections
+    lambda x, y, n: (n - x, y),
+    lambda x, y, n: (y, x),
+    lambda x, y, n: (n - y, n - x),
+)
+# Index of the inverse of each transform
+INVERSE_TRANSFORMS = (0, 3, 2, 1, 4, 5, 6, 7)
+
+
+def transform_move(move, transform, size):
+    """
+    Map `move` (x, y) by the `transform`-th symmetry
+    """
+    if transform == 0:
+        return move  # Identity, also on boards without a size
+    x, y = move
+    return TRANSFORMS[transform](x, y, size - 1)
+
+
+def inverse_transform_move(move, transform, size):
+    """
+    Map `move` (x, y) back by the inverse of the `transform`-th symmetry
+    """
+    return transform_move(move, INVERSE_TRANSFORMS[transform], size)
+
+
+@lru_cache(maxsize=None)
+def symmetry_keys(size):
+    """
+    Return the Zobrist keys of every symbol and position in all symmetric
+    positions, as a dict symbol -> 2-D list of tuples of keys (one for
+    every transform).
+
+    XORing the tuples of all symbols on a board gives its symmetry
+    hashes -- the Zobrist hashes of its transformed positions (the first
+    one is the hash of the position itself).
+    """
+    keys = zobrist_keys(size)
+    n = size - 1
+    return {
+        symbol: [[tuple(symbol_keys[tx][ty] for tx, ty in
+                        (function(x, y, n) for function in TRANSFORMS))
+                  for y in range(size)]
+                 for x in range(size)]
+        for symbol, symbol_keys in keys.items()
+    }
+
+
+def canonical_key(symmetry_hashes, cross_turn=True):
+    """
+    Return (hash, transform) like canonical_hash, from the symmetry
+    hashes of a position (kept by the boards on place/undo)
+    """
+    if not cross_turn:
+        symmetry_hashes = [turn_hash(position_hash, cross_turn)
+                           for position_hash in symmetry_hashes]
+    best_hash = min(symmetry_hashes)
+    return best_hash, symmetry_hashes.index(best_hash)
+
+
+def board_canonical_hash(board, cross_turn=True):
+    """
+    Return (hash, transform) like canonical_hash for the position on
+    `board`, from its symmetry hashes if it keeps them
+    """
+    symmetry_hashes = getattr(board, "symmetry_hashes", None)
+    if symmetry_hashes is None:
+        return canonical_hash(board_stones(board), board.size, cross_turn)
+    return canonical_key(symmetry_hashes, cross_turn)
+
+
+def board_stones(board):
+    """
+    Return a list of (x, y, symbol) of all symbols on the board
+    """
+    return [(x, y, board.symbol_at(x, y))
+            for x in range(board.size) for y in range(board.size)
+            if not board.is_empty(x, y)]
+
+
+def canonical_hash(stones, size, cross_turn=True):
+    """
+    Return (hash, transform), where `hash` is the smallest Zobrist hash
+    of the position of `stones` ((x, y, symbol) triples) over all board
+    symmetries, and `transform` the symmetry giving it.
+
+    Positions equal up to symmetry have equal canonical hashes.
+    """
+    keys = zobrist_keys(size)
+    n = size - 1
+
+    best = None
+    for transform, function in enumerate(TRANSFORMS):
+        position_hash = 0
+        for x, y, symbol in stones:
+            tx, ty = function(x, y, n)
+            position_hash ^= keys[symbol][tx][ty]
+
+        position_hash = turn_hash(position_hash, cross_turn)
+        if best is None or position_hash < best[0]:
+            best = (position_hash, transform)
+
+    return best
@@ -0,0 +1,103 @@
+"""
+Threat-space search -- finding forced wins by continuous fours (VCF).
+
+Only the attacker's moves making a four and the defender's forced
+replies (blocking the four) are searched, so the search can look much
+deeper than the full-width minimax.
+"""
+
+from .bitboard import BitBoard
+from .tile import TileModel
+
+
+def opponent(symbol):
+    """
+    Return the symbol of the other player
+    """
+    if symbol == TileModel.Symbols.CROSS:
+        return TileModel.Symbols.CIRCLE
+    return TileModel.Symbols.CROSS
+
+
+class VCFSolver:
+    """
+    Searches for a victory by continuous fours on a BitBoard.
+
+    The attacker plays only moves making a four (or winning), the
+    defender has to block the four. If the defender's block makes a four
+    of their own, the attacker has to block it with a four as well.
+    """
+    MAX_FOURS = 12  # Attacker moves of the searched sequences
+    MAX_NODES = 20000
+
+    def __init__(self, board, max_fours=MAX_FOURS, max_nodes=MAX_NODES):
+        self.board = board
+        self.max_fours = max_fours
+        self.max_nodes = max_nodes
+        self.nodes = 0  # Of the last search
+
+        self._failed = {}  # Hash -> fours left, searched without a win
+
+    @classmethod
+    def from_board(cls, board, **kwargs):
+        """
+        Create a solver for a copy of `board`
+        """
+        return cls(BitBoard.from_board(board), **kwargs)
+
+    def solve(self, symbol):
+        """
+        Return the winning sequence of moves [(x, y), ...] of `symbol`
+        (who is on turn), alternating with the defender's replies, or
+        None if no win by continuous fours was found
+        """
+        self.nodes = 0
+        self._failed = {}
+        return self._search(symbol, opponent(symbol), self.max_fours)
+
+    def _search(self, symbol, other, fours_left):
+        board = self.board
+        winning_count = board.WINNING_COUNT
+        self.nodes += 1
+
+        wins = board.threat_cells(symbol, winning_count - 1)
+        if wins:
+            return board.mask_positions(wins)[:1]
+
+        if fours_left == 0 or self.nodes > self.max_nodes:
+            return None
+        if self._failed.get(board.hash, -1) >= fours_left:
+            return None
+
+        fours = board.threat_cells(symbol, winning_count - 2)
+        other_wins = board.threat_cells(other, winning_count - 1)
+        if other_wins:
+            if other_wins & (other_wins - 1):
+                return None  # Two wins of the defender can't be blocked
+            fours &= other_wins  # Have to block
+
+        # (move, reply) of the fours with one reply
+        forced_lines = []
+        for move in board.mask_positions(fours):
+            board.place(*move, symbol)
+            replies = board.mask_positions(
+                board.threat_cells(symbol, winning_count - 1))
+            board.undo()
+
+            if len(replies) >= 2:
+                # A double four, only one of the wins can be blocked
+                return [move, replies[0], replies[1]]
+            forced_lines.append((move, replies[0]))
+
+        for move, reply in forced_lines:
+            board.place(*move, symbol)
+            board.place(*reply, other)
+            line = self._search(symbol, other, fours_left - 1)
+            board.undo()
+            board.undo()
+
+            if line is not None:
+                return [move, reply] + line
+
+        self._failed[board.hash] = fours_left
+        return None
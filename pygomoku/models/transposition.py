@@ -0,0 +1,64 @@
+"""
+Transposition table for the minimax search
+"""
+
+from collections import namedtuple, OrderedDict
+
+TTEntry = namedtuple("TTEntry", ["depth", "bound", "rating", "move"])
+
+
+class TranspositionTable:
+    """
+    A bounded store of search results, keyed by position hash.
+
+    An entry is only replaced by a search that is at least as deep.
+    When the table is full, the least recently stored entry is evicted
+    (a zero `capacity` disables the table). The table can be shared by
+    searches in different threads.
+    """
+    DEFAULT_CAPACITY = 2 ** 18
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Return the TTEntry stored for `key`, or None
+        """
+        return self._entries.get(key)
+
+    def store(self, key, depth, bound, rating, move):
+        """
+        Store a search result for `key`, if it is not shallower
+        than the one already stored
+        """
+        if self.capacity <= 0:
+            return  # Table disabled
+
+        entries = self._entries
+        old_entry = entries.get(key)
+
+        if old_entry is not None:
+            if old_entry.depth > depth:
+                return
+            try:
+                entries.move_to_end(key)
+            except KeyError:
+                pass  # Evicted by another thread meanwhile
+        elif len(entries) >= self.capacity:
+            try:
+                entries.popitem(last=False)
+            except KeyError:
+                pass  # Emptied by another thread meanwhile
+
+        entries[key] = TTEntry(depth, bound, rating, move)
+
+    def clear(self):
+        """
+        Remove all entries
+        """
+        self._entries.clear()
@@ -0,0 +1,61 @@
+"""
+Zobrist hashing of board positions
+"""
+
+from functools import lru_cache
+from random import Random
+
+from .tile import TileModel
+
+ZOBRIST_SEED = 0x9E3779B9
+KEY_BITS = 64
+KEY_MASK = (1 << KEY_BITS) - 1
+
+# XORed to a position hash when circle is on turn
+CIRCLE_TURN_KEY = Random(ZOBRIST_SEED).getrandbits(KEY_BITS)
+
+
+@lru_cache(maxsize=None)
+def zobrist_keys(size):
+    """
+    Return random keys for every symbol and position, as a dict
+    symbol -> 2-D list of keys.
+
+    The keys only depend on `size`, so all boards of the same size
+    hash equal positions equally.
+    """
+    rng = Random(ZOBRIST_SEED + size)
+
+    return {
+        symbol: [[rng.getrandbits(KEY_BITS) for _ in range(size)]
+                 for _ in range(size)]
+        for symbol in (TileModel.Symbols.CROSS, TileModel.Symbols.CIRCLE)
+    }
+
+
+def _mix(value):
+    """
+    The SplitMix64 mixing function, a bijection on 64 bit numbers
+    """
+    value = (value + 0x9E3779B97F4A7C15) & KEY_MASK
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & KEY_MASK
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & KEY_MASK
+    return value ^ (value >> 31)
+
+
+def position_key(symbol, x, y):
+    """
+    Return the key of `symbol` at (x, y) on an unbounded board (where
+    the keys can't be generated in advance), (x, y) may be negative
+    """
+    position = (x & 0xFFFFFFFF) << 32 | (y & 0xFFFFFFFF)
+    return _mix(_mix(position) ^ symbol.value)
+
+
+def turn_hash(position_hash, cross_turn):
+    """
+    Combine a position hash with the player on turn
+    """
+    if cross_turn:
+        return position_hash
+    return position_hash ^ CIRCLE_TURN_KEY
@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Headless game server, hosts many games in one process.
+
+Clients talk to the server by JSON lines, over TCP or stdin/stdout.
+Every request is an object with an "op" and an optional "id", which is
+repeated in the response:
+
+    {"op": "new", "size": 15, "difficulty": 3, "player_starts": true}
+        -> {"ok": true, "game": 1}
+    {"op": "move", "game": 1, "move": "h8"}  -> {"ok": true}
+    {"op": "state", "game": 1}  -> {"ok": true, "moves": [...], ...}
+    {"op": "close", "game": 1}  -> {"ok": true}
+
+Failed requests get {"ok": false, "error": "..."}. Every move played in
+a game of the client (including its own moves) is sent as an event
+{"event": "move", "game": 1, "move": "h8", "symbol": "cross",
+"winner": null}, after the response to the request that caused it.
+Games are closed when their client disconnects.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from itertools import count
+
+from pygomoku.models.cache import EvaluationCache
+from pygomoku.models.game import Game
+from pygomoku.models.record import RecordFormatError, format_move, \
+    parse_move
+from pygomoku.models.service import ProcessAIService
+from pygomoku.models.transposition import TranspositionTable
+
+DIFFICULTIES = (1, 2, 3)  # Random, rule and combined AI
+MIN_SIZE = 5
+MAX_SIZE = 26  # Columns of the move notation are letters
+
+
+class RequestError(Exception):
+    """
+    The request can't be done, the message is sent to the client
+    """
+
+
+def winner_name(board):
+    """
+    Return "cross" or "circle" if one of them won on `board`, else None
+    """
+    if not board.win_info:
+        return None
+    _, _, symbol = board.win_info
+    return symbol.name.lower()
+
+
+class Connection:
+    """
+    A client of the server, sends it the responses and events of its games
+    """
+    def __init__(self, writer):
+        self.games = set()  # IDs of the games created by the client
+        self._writer = writer
+        self._messages = asyncio.Queue()
+        self._loop = asyncio.get_running_loop()
+
+    def send(self, message):
+        """
+        Queue `message` (a dict) for sending, from the event loop
+        """
+        self._messages.put_nowait(message)
+
+    def send_event(self, event):
+        """
+        Queue `event` (a dict) for sending, from any thread.
+
+        Events are only queued when the loop gets to them, so the response
+        to a request precedes the events it caused (even an AI move
+        played before the request was done).
+        """
+        self._loop.call_soon_threadsafe(self._messages.put_nowait, event)
+
+    async def write_messages(self):
+        """
+        Send the queued messages until `finish` is called
+        """
+        while True:
+            message = await self._messages.get()
+            if message is None:
+                return
+            self._writer.write(json.dumps(message).encode() + b"\n")
+            await self._writer.drain()
+
+    def finish(self):
+        """
+        Stop sending after the messages queued so far
+        """
+        self.send_event(None)
+
+
+class StdioStream:
+    """
+    Reads lines of stdin and writes to stdout like asyncio streams
+    (works also when they are redirected to files)
+    """
+    async def readline(self):
+        """
+        Return the next line of stdin, b"" at its end
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            None, sys.stdin.buffer.readline)
+
+    def write(self, data):
+        """
+        Write `data` to stdout
+        """
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+
+    async def drain(self):
+        """
+        Nothing to wait for, writes are done at once
+        """
+
+    def close(self):
+        """
+        Leave stdout open
+        """
+
+
+class GameServer:
+    """
+    Hosts up to `max_games` games.
+
+    AI moves of all games are searched by one ProcessAIService (of
+    `workers` processes, so the searches of many games run in parallel).
+    A game has at most one AI move requested at a time and the service
+    runs the requests in the order they came, so the workers are shared
+    fairly between the games -- a game waits for at most one search of
+    every other game. The searching AIs of a worker share the evaluation
+    cache, the opening book and (per board size) the transposition
+    table. The boards of the games have no view, so a game takes little
+    memory. With `sparse`, the games are played on SparseBoards.
+    """
+    DEFAULT_MAX_GAMES = 10000
+
+    def __init__(self, max_games=DEFAULT_MAX_GAMES, workers=None,
+                 sparse=False):
+        self.max_games = max_games
+        self.sparse = sparse
+        self.service = ProcessAIService(max_workers=workers)
+        self.games = {}  # ID -> Game
+        self._game_ids = count(1)
+
+    def create_game(self, connection, size=15, difficulty=3,
+                    player_starts=True):
+        """
+        Create a game against the AI for `connection`, return its ID.
+
+        The game is started by `new_game()` of the game (then the AI
+        moves if the player doesn't start).
+        """
+        if len(self.games) >= self.max_games:
+            raise RequestError("too many games")
+        # Bools are ints too (True == 1), they are rejected
+        if type(size) is not int or not MIN_SIZE <= size <= MAX_SIZE:
+            raise RequestError(f"size must be from {MIN_SIZE} "
+                               f"to {MAX_SIZE}")
+        if type(difficulty) is not int or difficulty not in DIFFICULTIES:
+            raise RequestError(f"difficulty must be one of "
+                               f"{', '.join(map(str, DIFFICULTIES))}")
+
+        game_id = next(self._game_ids)
+        # The AI of the game is only a description for the service, it
+        # searches with the tables of the workers
+        game = Game(size, service=self.service,
+                    evaluation_cache=EvaluationCache(capacity=0),
+                    transposition_table=TranspositionTable(capacity=0),
+                    view=False, sparse=self.sparse)
+        game.last_move.add_callable(
+            lambda move, game: connection.send_event(
+                self._move_event(game_id, game, move)))
+
+        self.games[game_id] = game
+        connection.games.add(game_id)
+
+        # The player starts the new game this may start, so no AI moves yet
+        game.set_difficulty(difficulty)
+        game.player_starting = player_starts
+        return game_id
+
+    @staticmethod
+    def _move_event(game_id, game, move):
+        # Called with the game locked, so the state matches the move
+        board = game.board
+        x, y = move
+        return {
+            "event": "move",
+            "game": game_id,
+            "move": format_move(move, board.size),
+            "symbol": board.symbol_at(x, y).name.lower(),
+            "winner": winner_name(board),
+        }
+
+    def _game(self, connection, game_id):
+        if not isinstance(game_id, int) or game_id not in connection.games:
+            raise RequestError(f"no game {game_id}")
+        return self.games[game_id]
+
+    def play_move(self, connection, game_id, move):
+        """
+        Play `move` (in record notation, e.g. "h8") of the player
+        """
+        game = self._game(connection, game_id)
+        try:
+            x, y = parse_move(str(move), game.board.size)
+        except RecordFormatError as error:
+            raise RequestError(str(error)) from error
+
+        if not game.board.is_empty(x, y):
+            raise RequestError(f"{move} is not empty")
+        # Only the player's moves are played while the game is active
+        if not game.play_move(x, y):
+            raise RequestError("not your turn")
+
+    def game_state(self, connection, game_id):
+        """
+        Return the state of a game as a dict
+        """
+        game = self._game(connection, game_id)
+        board = game.board
+        moves = board.moves
+        return {
+            "size": board.size,
+            "moves": [format_move(move, board.size) for move in moves],
+            "cross_turn": len(moves) % 2 == 0,
+            # The game is only active when waiting for the player
+            "player_turn": game.active.get(),
+            "winner": winner_name(board),
+        }
+
+    def close_game(self, connection, game_id):
+        """
+        Close a game, stopping its AI
+        """
+        self._game(connection, game_id).close()
+        del self.games[game_id]
+        connection.games.discard(game_id)
+
+    def handle(self, connection, request):
+        """
+        Do a request (a dict) of `connection` and send it the response
+        """
+        new_game = None
+        response = {"ok": True}
+        if isinstance(request, dict) and "id" in request:
+            response["id"] = request["id"]
+
+        try:
+            if not isinstance(request, dict):
+                raise RequestError("a request must be an object")
+            operation = request.get("op")
+
+            if operation == "new":
+                response["game"] = self.create_game(
+                    connection, request.get("size", 15),
+                    request.get("difficulty", 3),
+                    bool(request.get("player_starts", True)))
+                new_game = self.games[response["game"]]
+            elif operation == "move":
+                self.play_move(connection, request.get("game"),
+                               request.get("move"))
+            elif operation == "state":
+                response.update(self.game_state(connection,
+                                                request.get("game")))
+            elif operation == "close":
+                self.close_game(connection, request.get("game"))
+            else:
+                raise RequestError(f"unknown op {operation!r}")
+        except RequestError as error:
+            response["ok"] = False
+            response["error"] = str(error)
+        connection.send(response)
+
+        if new_game is not None:
+            # After the response, so the client knows the game of the moves
+            new_game.new_game()
+
+    async def serve_connection(self, reader, writer):
+        """
+        Serve a client connected by asyncio streams
+        """
+        connection = Connection(writer)
+        writer_task = asyncio.ensure_future(connection.write_messages())
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    connection.send({"ok": False, "error": "invalid JSON"})
+                    continue
+                self.handle(connection, request)
+        finally:
+            for game_id in list(connection.games):
+                self.close_game(connection, game_id)
+
+            connection.finish()
+            try:
+                await writer_task
+            except ConnectionError:
+                pass  # The client is gone
+            writer.close()
+
+    async def serve_tcp(self, host, port):
+        """
+        Serve clients connecting to `host`:`port` until cancelled
+        """
+        server = await asyncio.start_server(self.serve_connection,
+                                            host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def serve_stdio(self):
+        """
+        Serve one client on stdin and stdout
+        """
+        stream = StdioStream()
+        await self.serve_connection(stream, stream)
+
+    def close(self):
+        """
+        Close all games and stop the AI workers
+        """
+        for game in self.games.values():
+            game.close()
+        self.games.clear()
+        self.service.close()
+
+
+def main(argv=None):
+    """
+    Server entry point
+    """
+    parser = argparse.ArgumentParser(
+        description="Host gomoku games against the AI, clients send "
+                    "JSON lines (see pygomoku/server.py).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("-p", "--port", type=int, default=None,
+                        help="listen on this TCP port (default: serve "
+                             "one client on stdin and stdout)")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="AI worker processes (default: all CPUs)")
+    parser.add_argument("--max-games", type=int,
+                        default=GameServer.DEFAULT_MAX_GAMES)
+    parser.add_argument("--sparse", action="store_true",
+                        help="play the games on SparseBoard")
+    args = parser.parse_args(argv)
+
+    server = GameServer(max_games=args.max_games, workers=args.workers,
+                        sparse=args.sparse)
+    try:
+        if args.port is None:
+            asyncio.run(server.serve_stdio())
+        else:
+            asyncio.run(server.serve_tcp(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -10,9 +10,15 @@ setup(
     name="pyGomoku",
     version="0.1",
     packages=find_packages(),
+    package_data={
+        "pygomoku": ["data/*.bin"],
+    },
     install_requires=[
         "wheel",
     ],
+    extras_require={
+        "numpy": ["numpy"],  # Batch rating (pygomoku.models.batch)
+    },
 
     author="Jakub Komárek",
     author_email="komaja@email.cz",
@@ -21,5 +27,10 @@ setup(
     entry_points="""
         [gui_scripts]
         pygomoku=pygomoku.main:main
+        [console_scripts]
+        pygomoku-arena=pygomoku.arena:main
+        pygomoku-make-book=pygomoku.make_book:main
+        pygomoku-annotate=pygomoku.annotate:main
+        pygomoku-server=pygomoku.server:main
         """
 )
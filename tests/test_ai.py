@@ -0,0 +1,206 @@
+import multiprocessing
+import time
+import unittest
+
+from pygomoku.models.ai import MinimaxAI
+from pygomoku.models.bitboard import BitBoard
+from pygomoku.models.board import RatedBoard
+from pygomoku.models import parallel
+from pygomoku.models.parallel import ParallelMinimaxAI
+from pygomoku.models.patterns import PatternBoard
+from pygomoku.models.sparse import SparseBoard
+from pygomoku.models.tile import TileModel
+
+
+class TestMinimax(unittest.TestCase):
+    def setUp(self) -> None:
+        self.board = RatedBoard(15)
+
+        moves = [(7, 7), (7, 8), (8, 8), (6, 6), (8, 7), (8, 6)]
+        for i, (x, y) in enumerate(moves):
+            symbol = TileModel.Symbols.CROSS if i % 2 == 0 \
+                else TileModel.Symbols.CIRCLE
+            self.board.place(x, y, symbol)
+
+    def test_bitboard_same_move(self):
+        move = MinimaxAI(self.board, 2).get_move(True)
+        bitboard_move = MinimaxAI(self.board, 2,
+                                  board_cls=BitBoard).get_move(True)
+
+        self.assertEqual(move, bitboard_move)
+
+    def test_iterative_deepening(self):
+        ai = MinimaxAI(self.board, 20, board_cls=BitBoard, time_limit_ms=200)
+
+        start = time.monotonic()
+        move = ai.get_move(True)
+        elapsed = time.monotonic() - start
+
+        self.assertIsNotNone(move)
+        self.assertTrue(self.board[move[0]][move[1]].empty())
+        self.assertLess(elapsed, 2)
+
+    def test_iterative_deepening_full_depth(self):
+        move = MinimaxAI(self.board, 2, board_cls=BitBoard).get_move(True)
+        deepened_move = MinimaxAI(self.board, 2, board_cls=BitBoard,
+                                  time_limit_ms=60000).get_move(True)
+
+        self.assertEqual(move, deepened_move)
+
+    def test_stats(self):
+        reported = []
+        ai = MinimaxAI(self.board, 3, board_cls=BitBoard,
+                       time_limit_ms=60000, on_stats=reported.append)
+        ai.get_move(True)
+
+        stats = ai.stats
+        self.assertEqual(reported, [stats])
+        self.assertEqual(stats.nodes, sum(stats.nodes_by_ply.values()))
+        self.assertEqual(stats.max_ply, 3)
+        self.assertEqual(sorted(stats.depth_times), [1, 2, 3])
+        self.assertEqual(stats.cutoffs, sum(stats.cutoff_indices.values()))
+        self.assertGreater(stats.leaf_evaluations, 0)
+        self.assertGreater(stats.branching_factor, 1)
+
+    def test_killers_and_history(self):
+        ai = MinimaxAI(self.board, 3, board_cls=BitBoard)
+        ai.get_move(True)
+
+        self.assertTrue(ai._history)
+        for killers in ai._killers.values():
+            self.assertLessEqual(len(killers), MinimaxAI.KILLERS_PER_PLY)
+
+        # Ordering by cutoffs (above the leaves) must not change the rating
+        def search(ai):
+            board = BitBoard.from_board(self.board)
+            return ai.minimax(board, 2, True, -float("inf"), float("inf"))
+
+        static_ai = MinimaxAI(self.board, 2)
+        static_ai.order_moves = lambda board, cross_turn, best_known_move, \
+            depth, ply: MinimaxAI.order_moves(static_ai, board, cross_turn)
+
+        self.assertEqual(search(MinimaxAI(self.board, 2))[1],
+                         search(static_ai)[1])
+
+    def test_principal_variation(self):
+        for time_limit_ms in (None, 60000):
+            ai = MinimaxAI(self.board, 3, board_cls=BitBoard,
+                           time_limit_ms=time_limit_ms)
+            move = ai.get_move(True)
+
+            line = ai.principal_variation
+            self.assertEqual(line[0], move)
+            self.assertLessEqual(len(line), 3)
+
+            board = BitBoard.from_board(self.board)
+            for i, (x, y) in enumerate(line):
+                self.assertTrue(board.place(x, y, TileModel.Symbols.CROSS
+                                            if i % 2 == 0
+                                            else TileModel.Symbols.CIRCLE))
+
+    def test_same_rating_as_full_search(self):
+        # Few enough moves for the search to see all of them
+        board = RatedBoard(7)
+        for i, (x, y) in enumerate([(3, 3), (3, 4), (4, 4)]):
+            board.place(x, y, TileModel.Symbols.CROSS if i % 2 == 0
+                        else TileModel.Symbols.CIRCLE)
+
+        def full_search(board, depth, cross_turn):
+            if depth == 0 or board.win_info:
+                return board.rating
+            symbol = TileModel.Symbols.CROSS if cross_turn \
+                else TileModel.Symbols.CIRCLE
+
+            ratings = []
+            for move in board.relevant_moves():
+                board.place(*move, symbol)
+                ratings.append(full_search(board, depth - 1, not cross_turn))
+                board.undo()
+            return max(ratings) if cross_turn else min(ratings)
+
+        expected = full_search(BitBoard.from_board(board), 3, False)
+
+        ai = MinimaxAI(board, 3, board_cls=BitBoard)
+        self.assertEqual(ai._search(ai.search_board(), 3, False)[1],
+                         expected)
+
+        # Aspiration windows around right and wrong guesses
+        for guess in (expected, expected - 1000, expected + 1000):
+            ai = MinimaxAI(board, 3, board_cls=BitBoard)
+            minimax_result = ai._aspiration_search(ai.search_board(), 3,
+                                                   False, guess)
+            self.assertEqual(minimax_result[1], expected)
+            self.assertEqual(ai.stats.aspiration_failures,
+                             0 if guess == expected else 1)
+
+    def test_parallel_same_move(self):
+        for cross_turn in (True, False):
+            move = MinimaxAI(self.board, 3,
+                             board_cls=BitBoard).get_move(cross_turn)
+
+            ai = ParallelMinimaxAI(self.board, 3, board_cls=BitBoard,
+                                   workers=2)
+            try:
+                parallel_move = ai.get_move(cross_turn)
+            finally:
+                ai.close()
+
+            self.assertEqual(move, parallel_move)
+
+    def test_parallel_boards(self):
+        # The workers set the position up on boards of the same class
+        unbounded = SparseBoard()
+        for x, y in self.board.moves:
+            unbounded.place(x, y, self.board.symbol_at(x, y))
+
+        for board, board_cls in ((self.board, PatternBoard),
+                                 (self.board, SparseBoard),
+                                 (self.board, None), (unbounded, None)):
+            move = MinimaxAI(board, 2, board_cls=board_cls).get_move(True)
+
+            ai = ParallelMinimaxAI(board, 2, board_cls=board_cls,
+                                   workers=2)
+            try:
+                parallel_move = ai.get_move(True)
+            finally:
+                ai.close()
+
+            self.assertEqual(move, parallel_move)
+
+
+class TestParallelWorker(unittest.TestCase):
+    """
+    The worker functions, run in this process
+    """
+    def setUp(self):
+        self.rating = multiprocessing.Value("d", float("-inf"))
+        self.search = multiprocessing.Value("i", 1, lock=False)
+        parallel._init_worker(self.rating, self.search,
+                              multiprocessing.Value("b", 0, lock=False), 2)
+
+    def tearDown(self):
+        parallel._worker_ais.clear()
+        parallel._worker_position = parallel._worker_board = None
+
+    def search_root(self, search_id, board, move):
+        return parallel._search_root_move(
+            search_id, parallel._board_position(board), move, 2, True,
+            float("-inf"), float("inf"))
+
+    def test_sizes(self):
+        for size in (19, 9):
+            result = self.search_root(1, BitBoard(size), (4, 4))
+            self.assertIsNotNone(result)
+        self.assertEqual(sorted(parallel._worker_ais), [9, 19])
+
+    def test_stale_search(self):
+        board = BitBoard(9)
+        self.assertIsNone(self.search_root(0, board, (4, 4)))
+        self.assertEqual(self.rating.value, float("-inf"))
+
+        rating, _, _, _ = self.search_root(1, board, (4, 4))
+        self.assertEqual(self.rating.value, rating)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,7 @@
 import unittest
 
 from pygomoku.models import analysis
-from pygomoku.models.board import BoardModel
+from pygomoku.models.board import BoardModel, Cell, RatedBoard
 from pygomoku.models.tile import TileModel
 
 
@@ -72,5 +72,21 @@ class TestCounting(unittest.TestCase):
         self.assertEqual(doubles, (0, 2))
 
 
+class TestAttackEnd(unittest.TestCase):
+    def test_board_without_view(self):
+        for view in (True, False):
+            board = RatedBoard(15, view=view)
+            board.place(2, 7, TileModel.Symbols.CIRCLE)  # Blocks one end
+            for x in range(3, 6):
+                board.place(x, 7, TileModel.Symbols.CROSS)
+
+            end = analysis.find_attack_end(board, TileModel.Symbols.CROSS,
+                                           3, False)
+            self.assertEqual((end.x, end.y), (6, 7))
+            self.assertEqual(isinstance(end, Cell), not view)
+            self.assertIsNone(analysis.find_attack_end(
+                board, TileModel.Symbols.CROSS, 3, True))
+
+
 if __name__ == '__main__':
     unittest.main()
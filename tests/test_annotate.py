@@ -0,0 +1,84 @@
+import unittest
+
+from pygomoku.annotate import analyze_positions, annotate_games, \
+    annotation_json, split_position
+from pygomoku.models.bitboard import CIRCLE, CROSS, EMPTY
+from pygomoku.models.record import GameRecord
+
+MOVES = [(4, 4), (4, 5), (3, 3), (5, 5)]
+
+
+class TestAnnotate(unittest.TestCase):
+    def test_split_position(self):
+        expected = (9, [(4, 4), (3, 3)], [(4, 5), (5, 5)], True)
+        self.assertEqual(split_position(GameRecord(9, MOVES), 15), expected)
+        self.assertEqual(split_position(MOVES, 9), expected)
+
+        array = [[EMPTY] * 9 for _ in range(9)]
+        array[4][4] = CROSS
+        self.assertEqual(split_position(array, 15),
+                         (9, [(4, 4)], [], False))
+        array[4][5] = CIRCLE
+        self.assertEqual(split_position(array, 15),
+                         (9, [(4, 4)], [(4, 5)], True))
+
+    def test_bounded_in_flight(self):
+        pulled = []
+
+        def positions():
+            for count in range(6):
+                pulled.append(count)
+                yield MOVES[:count % 4]
+
+        results = analyze_positions(positions(), "minimax:2", size=9,
+                                    workers=1, max_in_flight=2,
+                                    bitboard=True)
+        next(results)
+        # Two positions in flight, the third is submitted when one is done
+        self.assertLessEqual(len(pulled), 3)
+
+        analyses = [next(results)] + list(results)
+        self.assertEqual(len(pulled), 6)
+        self.assertEqual(len(analyses), 5)
+
+    def test_analysis(self):
+        analyses = list(analyze_positions([MOVES, MOVES[:3]], "minimax:2",
+                                          size=9, workers=2))
+        self.assertEqual(sorted(analysis.index for analysis in analyses),
+                         [0, 1])
+
+        for analysis in analyses:
+            self.assertEqual(analysis.cross_turn, analysis.index == 0)
+            self.assertEqual(analysis.principal_variation[0], analysis.move)
+            self.assertIsNotNone(analysis.rating)
+            self.assertGreater(analysis.stats["nodes"], 0)
+
+    def test_sizes(self):
+        # One worker searches the empty boards of both sizes
+        analyses = analyze_positions([GameRecord(19, []), GameRecord(9, [])],
+                                     "minimax:2", workers=1)
+        for analysis in analyses:
+            x, y = analysis.move
+            self.assertLess(max(x, y), analysis.size)
+
+    def test_parallel_rejected(self):
+        with self.assertRaises(ValueError):
+            next(analyze_positions([MOVES], "parallel:2", workers=1))
+
+    def test_annotate_games(self):
+        records = [GameRecord(9, MOVES), GameRecord(9, MOVES[:2])]
+        annotations = list(annotate_games(records, "rule", workers=1))
+
+        self.assertEqual(sorted((game, ply) for game, ply, _, _
+                                in annotations),
+                         [(0, 0), (0, 1), (0, 2), (0, 3), (1, 0), (1, 1)])
+        for game_index, ply, played, analysis in annotations:
+            self.assertEqual(played, records[game_index].moves[ply])
+
+            annotation = annotation_json(game_index, ply, played, analysis)
+            self.assertIsNone(annotation["rating"])
+            self.assertEqual(annotation["pv"], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+
+from pygomoku.arena import create_ai, parse_ai_spec, percentile, \
+    run_arena
+from pygomoku.models.bitboard import BitBoard
+from pygomoku.models.parallel import ParallelMinimaxAI
+from pygomoku.models.record import RecordWriter, iter_records
+from pygomoku.models.sparse import SparseBoard
+
+
+class TestArena(unittest.TestCase):
+    def test_parse_spec(self):
+        self.assertEqual(parse_ai_spec("random"), ("random", None))
+        self.assertEqual(parse_ai_spec("minimax:3"), ("minimax", 3))
+        self.assertEqual(parse_ai_spec("combined"), ("combined", 4))
+        self.assertRaises(ValueError, parse_ai_spec, "unknown")
+
+    def test_percentile(self):
+        values = list(range(101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_games(self):
+        first, second = run_arena("rule", "minimax:1", 2, size=9,
+                                  bitboard=True)
+
+        for stats in (first, second):
+            summary = stats.summary()
+            self.assertEqual(summary["games"], 2)
+            self.assertEqual(summary["wins"] + summary["losses"] +
+                             summary["draws"], 2)
+
+        self.assertEqual(first.wins, second.losses)
+        self.assertGreater(second.nodes, 0)
+
+    def test_sparse_games(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "games.bin")
+            with RecordWriter(path) as writer:
+                run_arena("rule", "combined:2", 2, size=9, sparse=True,
+                          record_writer=writer)
+            records = list(iter_records(path))
+
+        self.assertEqual(len(records), 2)
+        for record in records:
+            self.assertEqual(record.size, 9)
+            self.assertGreater(len(record.moves), 0)
+
+    def test_parallel(self):
+        ai = create_ai("parallel:3", SparseBoard(9), bitboard=True,
+                       workers=2)
+        self.assertIsInstance(ai, ParallelMinimaxAI)
+        self.assertEqual((ai.depth, ai.board_cls, ai.workers),
+                         (3, BitBoard, 2))
+        ai.close()
+
+        first, second = run_arena("parallel:2", "rule", 1, size=9,
+                                  bitboard=True, workers=2)
+        self.assertGreater(first.nodes, 0)
+        self.assertEqual(first.wins, second.losses)
+
+    def test_board_options(self):
+        board = SparseBoard(9)
+        self.assertRaises(ValueError, create_ai, "minimax:2", board,
+                          bitboard=True, sparse=True)
+        self.assertRaises(ValueError, run_arena, "rule", "rule", 1,
+                          size=9, bitboard=True, patterns=True)
+
+    def test_deterministic(self):
+        first = run_arena("random", "rule", 2, size=9, seed=5)
+        second = run_arena("random", "rule", 2, size=9, seed=5)
+
+        self.assertEqual([len(stats.move_times) for stats in first],
+                         [len(stats.move_times) for stats in second])
+
+
+if __name__ == '__main__':
+    unittest.main()
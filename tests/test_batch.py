@@ -0,0 +1,62 @@
+import random
+import unittest
+
+from pygomoku.models.batch import np, group_counts, positions_array, \
+                                  rate_boards, rate_positions
+from pygomoku.models.board import RatedBoard
+from pygomoku.models.tile import TileModel
+
+CROSS = TileModel.Symbols.CROSS
+CIRCLE = TileModel.Symbols.CIRCLE
+
+
+def random_boards(count, size, moves, seed):
+    rng = random.Random(seed)
+    boards = []
+    for _ in range(count):
+        board = RatedBoard(size, view=False)
+        for turn in range(rng.randrange(moves)):
+            move = rng.choice(board.relevant_moves())
+            board.place(*move, CROSS if turn % 2 == 0 else CIRCLE)
+        boards.append(board)
+    return boards
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestBatchRating(unittest.TestCase):
+    def test_same_as_rated_board(self):
+        for size in (9, 15):
+            boards = random_boards(50, size, 60, seed=size)
+            self.assertEqual(rate_boards(boards),
+                             [board.rating for board in boards])
+
+    def test_group_counts(self):
+        board = RatedBoard(9, view=False)
+        for y in range(3):
+            board.place(4, y, CROSS)
+        board.place(4, 3, CIRCLE)
+
+        counts = group_counts(positions_array([board]))[0]
+        # The three is blocked by the circle, the other
+        # directions have single symbols
+        self.assertEqual(counts[0, 3, 1], 1)
+        self.assertEqual(counts[0, 1, 0], 9)
+        self.assertEqual(counts[1, 1, 1], 1)
+        self.assertEqual(counts[1, 1, 0], 3)
+        self.assertEqual(counts.sum(), len(board.groups))
+
+    def test_win(self):
+        positions = np.zeros((2, 9, 9), dtype=np.int8)
+        positions[0, 2, 0:6] = 1  # Six crosses
+        positions[1, 2:7, 2] = 2  # Five circles
+
+        self.assertEqual(rate_positions(positions).tolist(),
+                         [99999 + 6 * 3 * 2, -99999 - 5 * 3 * 2])
+
+    def test_empty(self):
+        self.assertEqual(rate_boards([]), [])
+        self.assertEqual(rate_positions(np.zeros((1, 15, 15))).tolist(), [0])
+
+
+if __name__ == '__main__':
+    unittest.main()
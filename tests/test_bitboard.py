@@ -0,0 +1,136 @@
+import random
+import unittest
+
+from pygomoku.models.bitboard import BitBoard
+from pygomoku.models.board import BoardModel, RatedBoard
+from pygomoku.models.constants import Direction
+from pygomoku.models.tile import TileModel
+
+
+class TestRating(unittest.TestCase):
+    def setUp(self) -> None:
+        self.rated = RatedBoard(9)
+        self.bitboard = BitBoard(9)
+
+    def _place(self, x, y, symbol):
+        self.rated.place(x, y, symbol)
+        self.bitboard.place(x, y, symbol)
+
+    def test_empty(self):
+        self.assertEqual(self.bitboard.rating, 0)
+
+    def test_blocked_by_edge(self):
+        # Board edges don't block groups
+        self._place(0, 0, TileModel.Symbols.CROSS)
+        self._place(0, 1, TileModel.Symbols.CROSS)
+        self.assertEqual(self.bitboard.rating, self.rated.rating)
+
+    def test_random_games(self):
+        symbols = [TileModel.Symbols.CROSS, TileModel.Symbols.CIRCLE]
+        for seed in range(20):
+            rng = random.Random(seed)
+            self.setUp()
+
+            for turn in range(40):
+                if turn % 5 == 4:
+                    self.rated.undo()
+                    self.bitboard.undo()
+                else:
+                    move = rng.choice(self.rated.relevant_moves())
+                    self._place(*move, symbols[turn % 2])
+
+                self.assertEqual(self.bitboard.rating, self.rated.rating)
+
+    def test_occupied(self):
+        self._place(4, 4, TileModel.Symbols.CROSS)
+        self.assertFalse(self.bitboard.place(4, 4, TileModel.Symbols.CIRCLE))
+
+
+class TestRelevantMoves(unittest.TestCase):
+    def setUp(self) -> None:
+        self.board = BoardModel(9)
+        self.bitboard = BitBoard(9)
+
+    def test_empty(self):
+        self.assertEqual(self.bitboard.relevant_moves(), [(4, 4)])
+
+    def test_corners(self):
+        for x, y in [(0, 0), (8, 8), (0, 8), (8, 0), (4, 6)]:
+            self.board.place(x, y, TileModel.Symbols.CROSS)
+            self.bitboard.place(x, y, TileModel.Symbols.CROSS)
+
+        self.assertEqual(self.bitboard.relevant_moves(),
+                         self.board.relevant_moves())
+
+
+class TestCheckWin(unittest.TestCase):
+    def setUp(self) -> None:
+        self.board = BoardModel(9)
+        self.bitboard = BitBoard(9)
+
+    def _place_multiple(self, symbol, positions):
+        for x, y in positions:
+            self.board.place(x, y, symbol)
+            self.bitboard.place(x, y, symbol)
+
+    def _assert_same_win(self):
+        tile, direction, symbol = self.board.check_win()
+
+        for win_info in (self.bitboard.check_win(), self.bitboard.win_info):
+            cell, bit_direction, bit_symbol = win_info
+
+            self.assertEqual((cell.x, cell.y), (tile.x, tile.y))
+            self.assertEqual(bit_direction, direction)
+            self.assertEqual(bit_symbol, symbol)
+
+    def test_no_win(self):
+        self._place_multiple(TileModel.Symbols.CROSS,
+                             [(0, 5), (0, 6), (0, 7), (0, 8), (1, 0)])
+        self.assertFalse(self.bitboard.check_win())
+        self.assertFalse(self.bitboard.win_info)
+
+    def test_undo(self):
+        self._place_multiple(TileModel.Symbols.CROSS,
+                             [(4, y) for y in range(5)])
+        self.bitboard.undo()
+        self.assertFalse(self.bitboard.win_info)
+
+    def test_horizontal(self):
+        self._place_multiple(TileModel.Symbols.CIRCLE,
+                             [(2, y) for y in range(4, 9)])
+        self._assert_same_win()
+
+    def test_vertical(self):
+        self._place_multiple(TileModel.Symbols.CROSS,
+                             [(x, 3) for x in range(1, 7)])
+        self._assert_same_win()
+
+    def test_diagonals(self):
+        self._place_multiple(TileModel.Symbols.CROSS,
+                             [(i, i + 1) for i in range(5)])
+        self._assert_same_win()
+
+        self.setUp()
+        self._place_multiple(TileModel.Symbols.CROSS,
+                             [(i, 8 - i) for i in range(2, 7)])
+        self._assert_same_win()
+
+
+class TestGroups(unittest.TestCase):
+    def test_group(self):
+        board = BitBoard(9)
+        board.place(3, 3, TileModel.Symbols.CROSS)
+        board.place(4, 3, TileModel.Symbols.CROSS)
+        board.place(5, 3, TileModel.Symbols.CIRCLE)
+
+        horizontal = [group for group in board.groups
+                      if group.direction == Direction.HORIZONTAL
+                      and group.get_symbol() == TileModel.Symbols.CROSS]
+
+        self.assertEqual(len(horizontal), 1)
+        self.assertEqual(horizontal[0].get_size(), 2)
+        self.assertEqual(horizontal[0].get_blocked(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
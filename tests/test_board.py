@@ -1,6 +1,10 @@
-from pygomoku.models.board import BoardModel
+import random
+
+from pygomoku.models.analysis import n_tet_counts
+from pygomoku.models.board import BoardModel, Cell, RatedBoard
 from pygomoku.models.constants import Direction
 from pygomoku.models.tile import TileModel
+from pygomoku.models.tile_generators import relevant_tiles
 import unittest as ut
 
 
@@ -57,5 +61,272 @@ class TestNextTile(ut.TestCase):
         self.assertEqual((14, 14), self.board.next_tile(13, 13, Direction.DIAGONAL_B))
 
 
+class TestRelevantMoves(ut.TestCase):
+    def setUp(self):
+        self.board = RatedBoard(9)
+
+    def _expected(self):
+        return [(tile.x, tile.y) for tile in relevant_tiles(self.board)]
+
+    def test_empty(self):
+        self.assertEqual([(4, 4)], self.board.relevant_moves())
+
+    def test_corner(self):
+        self.board.place(0, 0, TileModel.Symbols.CROSS)
+        self.assertEqual(self._expected(), self.board.relevant_moves())
+        self.assertEqual(8, len(self.board.relevant_moves()))
+
+    def test_place_undo(self):
+        symbols = [TileModel.Symbols.CROSS, TileModel.Symbols.CIRCLE]
+        rng = random.Random(0)
+
+        for turn in range(60):
+            if turn % 3 == 2:
+                self.board.undo()
+            else:
+                move = rng.choice(self.board.relevant_moves())
+                self.board.place(*move, symbols[turn % 2])
+
+            self.assertEqual(self._expected(), self.board.relevant_moves())
+
+        self.assertEqual(self._expected(),
+                         self.board.clone().relevant_moves())
+
+
+class TestNoView(ut.TestCase):
+    def setUp(self):
+        self.board = BoardModel(9, view=False)
+        self.view_board = BoardModel(9)
+
+        moves = [(0, 0), (4, 4), (0, 1), (4, 5), (0, 2), (8, 8)]
+        for i, move in enumerate(moves):
+            symbol = TileModel.Symbols.CROSS if i % 2 == 0 \
+                else TileModel.Symbols.CIRCLE
+            self.board.place(*move, symbol)
+            self.view_board.place(*move, symbol)
+
+    def test_tiles(self):
+        self.assertEqual(self.board[3][5], Cell(3, 5))
+        self.assertEqual(self.board.tile(3, 5), Cell(3, 5))
+
+    def test_relevant_moves(self):
+        expected = [(tile.x, tile.y)
+                    for tile in relevant_tiles(self.view_board)]
+        self.assertEqual(self.board.relevant_moves(), expected)
+        self.assertEqual(self.view_board.relevant_moves(), expected)
+        self.assertEqual(BoardModel(9, view=False).relevant_moves(),
+                         [(4, 4)])
+
+    def test_n_tet_counts(self):
+        for n in (2, 3):
+            self.assertEqual(n_tet_counts(self.board, n),
+                             n_tet_counts(self.view_board, n))
+        self.assertEqual(n_tet_counts(self.board, 3), (1, 0))
+
+
+class TestWinInfo(ut.TestCase):
+    def setUp(self):
+        self.board = RatedBoard(9)
+
+    def _place_multiple(self, symbol, positions):
+        for x, y in positions:
+            self.board.place(x, y, symbol)
+
+    def _assert_check_win(self):
+        tile, direction, symbol = self.board.check_win()
+        win_tile, win_direction, win_symbol = self.board.win_info
+
+        self.assertEqual((tile.x, tile.y), (win_tile.x, win_tile.y))
+        self.assertEqual(direction, win_direction)
+        self.assertEqual(symbol, win_symbol)
+
+    def test_no_win(self):
+        self._place_multiple(TileModel.Symbols.CROSS,
+                             [(0, 0), (0, 1), (0, 2), (0, 3)])
+        self.assertFalse(self.board.win_info)
+
+    def test_lines(self):
+        lines = [
+            [(3, y) for y in (5, 3, 7, 4, 6)],
+            [(x, 2) for x in (0, 1, 2, 4, 3)],
+            [(i, i + 2) for i in (2, 0, 1, 4, 3)],
+            [(i, 8 - i) for i in (6, 2, 4, 3, 5)],
+        ]
+        for line in lines:
+            self.setUp()
+            self._place_multiple(TileModel.Symbols.CIRCLE, line)
+            self._assert_check_win()
+
+    def test_undo(self):
+        self._place_multiple(TileModel.Symbols.CROSS,
+                             [(0, y) for y in range(5)])
+        self.board.place(5, 5, TileModel.Symbols.CROSS)
+        self.board.undo()
+        self._assert_check_win()
+
+        self.board.undo()
+        self.assertFalse(self.board.win_info)
+
+    def test_mark_win(self):
+        self._place_multiple(TileModel.Symbols.CROSS,
+                             [(i, 4 - i) for i in range(5)])
+        self.board.mark_win(self.board.win_info)
+
+        for i in range(5):
+            self.assertEqual(TileModel.States.MARKED_AS_WIN,
+                             self.board[i][4 - i].state.get())
+
+
+class TestGroups(ut.TestCase):
+    def setUp(self):
+        self.board = RatedBoard(15)
+
+    def _rating(self):
+        """
+        Rating of the board computed from scratch
+        """
+        board = RatedBoard(self.board.size)
+        for x, y in self.board._added_tiles_stack:
+            board.place(x, y, self.board[x][y].symbol.get())
+        return board.rating
+
+    def test_merge_undo(self):
+        # The groups of 5 and 7 are merged by 6 before 4 merges the rest
+        for y in (2, 3, 5, 7, 6):
+            self.board.place(7, y, TileModel.Symbols.CROSS)
+        rating = self.board.rating
+
+        self.board.place(7, 4, TileModel.Symbols.CROSS)
+        self.board.undo()
+        self.assertEqual(rating, self.board.rating)
+        self.assertEqual(3, self.board.board_context[7][5]
+                         .directions[Direction.VERTICAL].get_size())
+
+    def test_place_undo(self):
+        symbols = [TileModel.Symbols.CROSS, TileModel.Symbols.CIRCLE]
+        rng = random.Random(1)
+
+        for turn in range(300):
+            if turn % 4 == 3 and self.board._added_tiles_stack:
+                self.board.undo()
+            else:
+                move = rng.choice(self.board.relevant_moves())
+                self.board.place(*move, symbols[turn % 2])
+
+            self.assertEqual(self._rating(), self.board.rating)
+
+    def test_depth(self):
+        # Union by size keeps the trees shallow
+        for y in (0, 2, 4, 6, 8, 10, 12, 14, 1, 5, 9, 13, 3, 11, 7):
+            self.board.place(7, y, TileModel.Symbols.CIRCLE)
+
+        for y in range(15):
+            group = self.board.board_context[7][y] \
+                .directions[Direction.VERTICAL]
+            depth = 0
+            while group._parent is not None:
+                group = group._parent
+                depth += 1
+            self.assertLessEqual(depth, 4)
+
+
+class TestClone(ut.TestCase):
+    def setUp(self):
+        self.board = RatedBoard(15)
+        moves = [(7, 7), (7, 8), (8, 8), (6, 6), (8, 7), (8, 6), (6, 8)]
+        for i, (x, y) in enumerate(moves):
+            symbol = TileModel.Symbols.CROSS if i % 2 == 0 \
+                else TileModel.Symbols.CIRCLE
+            self.board.place(x, y, symbol)
+
+    def test_same_state(self):
+        cloned = self.board.clone()
+
+        self.assertEqual(self.board.rating, cloned.rating)
+        self.assertEqual(self.board.hash, cloned.hash)
+        self.assertEqual(self.board.candidates, cloned.candidates)
+        self.assertEqual(self.board.relevant_moves(), cloned.relevant_moves())
+
+    def test_independent(self):
+        rating = self.board.rating
+        cloned = self.board.clone()
+        cloned.place(0, 0, TileModel.Symbols.CROSS)
+
+        self.assertTrue(self.board[0][0].empty())
+        self.assertEqual(rating, self.board.rating)
+
+        # The copy can undo all the moves
+        while cloned._added_tiles_stack:
+            cloned.undo()
+        self.assertEqual(0, cloned.rating)
+        self.assertEqual(0, cloned.hash)
+        self.assertEqual(rating, self.board.rating)
+
+    def test_win_info(self):
+        for y in range(5):
+            self.board.place(0, y, TileModel.Symbols.CIRCLE)
+        cloned = self.board.clone()
+
+        tile, direction, symbol = cloned.win_info
+        self.assertEqual((0, 0), (tile.x, tile.y))
+        self.assertEqual(self.board.win_info[1:], (direction, symbol))
+        self.assertEqual(cloned.win_info, cloned.check_win())
+
+    def test_no_view(self):
+        cloned = self.board.clone()
+        self.assertFalse(cloned.has_view)
+        self.assertEqual(TileModel.Symbols.CROSS, cloned.symbol_at(7, 7))
+
+        calls = []
+        self.board[0][0].symbol.add_callable(lambda *args: calls.append(args))
+        cloned.place(0, 0, TileModel.Symbols.CROSS)
+        self.assertEqual([], calls)
+
+    def test_reset(self):
+        self.board.reset()
+        self.assertEqual([], self.board.clone()._added_tiles_stack)
+        self.assertEqual(0, self.board.clone().rating)
+
+
+class TestStateChanges(ut.TestCase):
+    def setUp(self):
+        self.board = BoardModel(9)
+        self.events = []
+        self.tile_events = []
+
+        self.board.states_changed.add_callable(
+            lambda changes, parent: self.events.append(changes))
+        self.board[0][0].state.add_callable(
+            lambda value, parent: self.tile_events.append(value))
+
+    def test_disable_enable(self):
+        self.board.disable()
+        self.assertEqual(1, len(self.events))
+        self.assertEqual(81, len(self.events[0]))
+        self.assertEqual(TileModel.States.DISABLED, self.events[0][0, 0])
+
+        self.board.disable()  # Nothing changed
+        self.assertEqual(1, len(self.events))
+
+        self.board.enable()
+        self.assertEqual(2, len(self.events))
+        self.assertEqual(TileModel.States.NONE, self.events[1][8, 8])
+        self.assertEqual([], self.tile_events)
+
+    def test_mark_win(self):
+        for y in range(5):
+            self.board.place(2, y, TileModel.Symbols.CROSS)
+        self.board.mark_win(self.board.check_win())
+
+        self.assertEqual([{(2, y): TileModel.States.MARKED_AS_WIN
+                           for y in range(5)}], self.events)
+
+    def test_reset(self):
+        self.board[4][4].state.set(TileModel.States.PRELIT)
+        self.board.reset()
+
+        self.assertEqual([{(4, 4): TileModel.States.NONE}], self.events)
+
+
 if __name__ == "__main__":
     ut.main()
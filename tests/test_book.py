@@ -0,0 +1,148 @@
+import os
+import tempfile
+import unittest
+
+import random
+
+from pygomoku.models.ai import CombinedAI, MinimaxAI
+from pygomoku.models.bitboard import BitBoard
+from pygomoku.models.board import BoardModel, RatedBoard
+from pygomoku.models.book import BookFormatError, OpeningBook
+from pygomoku.models.sparse import SparseBoard
+from pygomoku.models.symmetry import TRANSFORMS, board_canonical_hash, \
+    board_stones, canonical_hash, inverse_transform_move, transform_move
+from pygomoku.models.tile import TileModel
+
+
+class TestSymmetry(unittest.TestCase):
+    def test_inverse(self):
+        for transform in range(len(TRANSFORMS)):
+            for move in [(0, 0), (2, 5), (14, 3)]:
+                moved = transform_move(move, transform, 15)
+                self.assertEqual(
+                    inverse_transform_move(moved, transform, 15), move)
+
+    def test_distinct(self):
+        images = {transform_move((1, 2), transform, 15)
+                  for transform in range(len(TRANSFORMS))}
+        self.assertEqual(len(images), 8)
+
+    def test_canonical_hash(self):
+        stones = [(7, 7, TileModel.Symbols.CROSS),
+                  (6, 8, TileModel.Symbols.CIRCLE),
+                  (3, 9, TileModel.Symbols.CROSS)]
+        key, _ = canonical_hash(stones, 15)
+
+        for transform in range(len(TRANSFORMS)):
+            moved = [transform_move((x, y), transform, 15) + (symbol,)
+                     for x, y, symbol in stones]
+            self.assertEqual(canonical_hash(moved, 15)[0], key)
+
+        self.assertNotEqual(canonical_hash(stones, 15, False)[0], key)
+
+    def test_symmetry_hashes(self):
+        rng = random.Random(1)
+        boards = [RatedBoard(9, view=False), BitBoard(9), SparseBoard(9)]
+        for turn in range(30):
+            if turn % 4 == 3:
+                for board in boards:
+                    board.undo()
+            else:
+                move = rng.choice(boards[0].relevant_moves())
+                symbol = TileModel.Symbols.CROSS if turn % 2 == 0 \
+                    else TileModel.Symbols.CIRCLE
+                for board in boards:
+                    board.place(*move, symbol)
+
+            stones = board_stones(boards[0])
+            for cross_turn in (True, False):
+                expected = canonical_hash(stones, 9, cross_turn)
+                for board in boards:
+                    self.assertEqual(board.symmetry_hashes[0], board.hash)
+                    self.assertEqual(board_canonical_hash(board, cross_turn),
+                                     expected)
+
+    def test_symmetric_transpositions(self):
+        board = BitBoard(15)
+        mirrored = BitBoard(15)
+        for i, (x, y) in enumerate([(7, 7), (6, 8), (8, 9), (10, 8)]):
+            symbol = TileModel.Symbols.CROSS if i % 2 == 0 \
+                else TileModel.Symbols.CIRCLE
+            board.place(x, y, symbol)
+            mirrored.place(x, 14 - y, symbol)
+
+        ai = MinimaxAI(None, 2)
+        ai._root_depth = 2
+        move, rating = ai.minimax(board, 2, True, -float("inf"),
+                                  float("inf"))
+
+        # The mirrored position is found in the table, with a mirrored move
+        self.assertEqual(ai.table_key(board, True)[0],
+                         ai.table_key(mirrored, True)[0])
+        self.assertEqual(ai.minimax(mirrored, 2, True, -float("inf"),
+                                    float("inf")),
+                         ((move[0], 14 - move[1]), rating))
+        self.assertEqual(ai.stats.transposition_hits, 1)
+
+
+class TestOpeningBook(unittest.TestCase):
+    def setUp(self) -> None:
+        self.book = OpeningBook(15)
+        self.board = BoardModel(15)
+        self.board.place(7, 7, TileModel.Symbols.CROSS)
+        self.board.place(6, 8, TileModel.Symbols.CIRCLE)
+
+    def _mirrored_board(self):
+        board = BoardModel(15)
+        for x, y, symbol in board_stones(self.board):
+            board.place(x, 14 - y, symbol)
+        return board
+
+    def test_lookup(self):
+        self.book.add(self.board, True, (8, 6))
+
+        self.assertEqual(self.book.lookup(self.board, True), (8, 6))
+        self.assertIsNone(self.book.lookup(self.board, False))
+        self.assertIsNone(self.book.lookup(BoardModel(15), True))
+
+    def test_symmetric_lookup(self):
+        self.book.add(self.board, True, (8, 6))
+        self.assertEqual(self.book.lookup(self._mirrored_board(), True),
+                         (8, 8))
+
+    def test_save_load(self):
+        self.book.add(self.board, True, (8, 6))
+        self.book.add(BoardModel(15), True, (7, 7))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "book.bin")
+            self.book.save(path)
+            loaded = OpeningBook.load(path)
+
+        self.assertEqual(len(loaded), 2)
+        self.assertEqual(loaded.size, 15)
+        self.assertEqual(loaded.lookup(self.board, True), (8, 6))
+
+    def test_invalid_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "book.bin")
+            with open(path, "wb") as book_file:
+                book_file.write(b"not a book at all")
+
+            self.assertRaises(BookFormatError, OpeningBook.load, path)
+
+    def test_default_book(self):
+        book = OpeningBook.load_default(15)
+        self.assertIsNotNone(book)
+        self.assertEqual(book.lookup(BoardModel(15), True), (7, 7))
+        self.assertIsNone(OpeningBook.load_default(9))
+
+    def test_combined_ai(self):
+        self.book.add(self.board, True, (0, 0))
+        ai = CombinedAI(self.board, 2, book=self.book)
+
+        self.assertEqual(ai.get_move(True), (0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import random
+import unittest
+
+from pygomoku.models.ai import MinimaxAI
+from pygomoku.models.bitboard import CROSS as CROSS_CODE, EMPTY
+from pygomoku.models.board import RatedBoard, rate_group
+from pygomoku.models.patterns import PatternBoard, LINE_DIRECTIONS, \
+                                     line_shape
+from pygomoku.models.tile import TileModel
+
+CROSS = TileModel.Symbols.CROSS
+CIRCLE = TileModel.Symbols.CIRCLE
+
+
+def full_rating(board):
+    """
+    Rate `board` from scratch, reading the lines of all symbols
+    """
+    rating = 0
+    for x in range(board.size):
+        for y in range(board.size):
+            code = board._cells[board.index(x, y)]
+            if code == EMPTY:
+                continue
+
+            for dx, dy in LINE_DIRECTIONS:
+                cells = []
+                for offset in range(-4, 5):
+                    nx, ny = x + offset * dx, y + offset * dy
+                    if not (0 <= nx < board.size and 0 <= ny < board.size):
+                        cells.append(2)
+                        continue
+                    other = board._cells[board.index(nx, ny)]
+                    cells.append(0 if other == EMPTY else
+                                 1 if other == code else 2)
+
+                size, is_open = line_shape(tuple(cells))
+                score = rate_group(size, 0 if is_open else 1) if size else 0
+                rating += score if code == CROSS_CODE else -score
+    return rating
+
+
+class TestLineShape(unittest.TestCase):
+    def test_shapes(self):
+        self.assertEqual(line_shape((0, 0, 0, 0, 1, 0, 0, 0, 0)), (1, True))
+        self.assertEqual(line_shape((0, 0, 0, 1, 1, 1, 1, 0, 0)), (4, True))
+        self.assertEqual(line_shape((0, 0, 2, 1, 1, 1, 1, 0, 0)),
+                         (4, False))
+        self.assertEqual(line_shape((0, 0, 0, 1, 1, 1, 1, 1, 2)), (5, True))
+        # Broken shapes
+        self.assertEqual(line_shape((0, 0, 0, 1, 1, 0, 1, 0, 0)), (3, True))
+        self.assertEqual(line_shape((0, 2, 1, 1, 1, 0, 1, 2, 0)),
+                         (4, False))
+        self.assertEqual(line_shape((2, 2, 2, 0, 1, 0, 2, 2, 2)), (0, False))
+
+
+class TestPatternBoard(unittest.TestCase):
+    def test_incremental_rating(self):
+        random.seed(3)
+        for size in (9, 15):
+            board = PatternBoard(size)
+            for i in range(40):
+                x, y = random.randrange(size), random.randrange(size)
+                if not board.place(x, y, CROSS if i % 2 == 0 else CIRCLE):
+                    continue
+                if random.random() < 0.2:
+                    board.undo()
+
+                self.assertEqual(board.rating, full_rating(board))
+
+            while board._move_stack:
+                board.undo()
+            self.assertEqual(board.rating, 0)
+            self.assertEqual(board._line_codes,
+                             PatternBoard(size)._line_codes)
+
+    def test_broken_three(self):
+        broken = PatternBoard(15)
+        for x in (5, 6, 8):
+            broken.place(x, 7, CROSS)
+
+        separate = PatternBoard(15)
+        for x in (4, 5, 8):
+            separate.place(x, 7, CROSS)
+
+        self.assertGreater(broken.rating, separate.rating)
+
+    def test_win_info(self):
+        board = PatternBoard(15)
+        for y in (3, 4, 6, 7):
+            board.place(2, y, CIRCLE)
+        self.assertFalse(board.win_info)
+
+        board.place(2, 5, CIRCLE)
+        self.assertEqual(board.win_info, board.check_win())
+        board.undo()
+        self.assertFalse(board.win_info)
+
+    def test_clone(self):
+        board = PatternBoard(15)
+        board.place(7, 7, CROSS)
+        cloned = board.clone()
+        cloned.place(7, 8, CIRCLE)
+
+        self.assertEqual(board.rating, full_rating(board))
+        self.assertEqual(cloned.rating, full_rating(cloned))
+        self.assertNotEqual(board.rating, cloned.rating)
+
+    def test_search(self):
+        board = RatedBoard(15)
+        for i, (x, y) in enumerate([(7, 7), (7, 8), (8, 8), (6, 6)]):
+            board.place(x, y, CROSS if i % 2 == 0 else CIRCLE)
+
+        x, y = MinimaxAI(board, 2, board_cls=PatternBoard).get_move(True)
+        self.assertTrue(board[x][y].empty())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import io
+import os
+import tempfile
+import unittest
+
+from pygomoku.arena import run_arena
+from pygomoku.models.board import RatedBoard
+from pygomoku.models.record import GameRecord, RecordFormatError, \
+                                   RecordWriter, encode_varint, \
+                                   iter_records, read_varint, \
+                                   replay_records, write_records
+from pygomoku.models.tile import TileModel
+
+MOVES = [(7, 7), (7, 8), (8, 8), (6, 6), (9, 9), (10, 10), (6, 7),
+         (5, 7), (10, 11), (11, 12)]
+
+
+class TestVarint(unittest.TestCase):
+    def test_round_trip(self):
+        stream = io.BytesIO(b"".join(encode_varint(value)
+                                     for value in (0, 127, 128, 300, 2**40)))
+        self.assertEqual([read_varint(stream) for _ in range(6)],
+                         [0, 127, 128, 300, 2**40, None])
+
+    def test_truncated(self):
+        self.assertRaises(RecordFormatError, read_varint,
+                          io.BytesIO(encode_varint(300)[:1]))
+
+
+class TestGameRecord(unittest.TestCase):
+    def test_from_board(self):
+        board = RatedBoard(15)
+        for i, move in enumerate(MOVES):
+            board.place(*move, TileModel.Symbols.CROSS if i % 2 == 0
+                        else TileModel.Symbols.CIRCLE)
+
+        record = GameRecord.from_board(board)
+        self.assertEqual(record.moves, MOVES)
+
+        replayed = record.replay()
+        self.assertEqual(replayed.rating, board.rating)
+        self.assertEqual(replayed.hash, board.hash)
+
+    def test_bytes(self):
+        record = GameRecord(15, MOVES)
+        self.assertEqual(GameRecord.read(io.BytesIO(record.to_bytes())),
+                         record)
+        # Size, rules, count and a byte or two per move
+        self.assertLessEqual(len(record.to_bytes()), 3 + 2 * len(MOVES))
+
+    def test_text(self):
+        record = GameRecord(15, [(7, 7), (0, 0), (14, 14)])
+        self.assertEqual(record.to_text(), "h8 a15 o1")
+        self.assertEqual(GameRecord.from_text("h8 A15 o1", 15), record)
+
+        self.assertRaises(RecordFormatError, GameRecord.from_text, "p1", 15)
+        self.assertRaises(RecordFormatError, GameRecord.from_text, "h0", 15)
+
+    def test_impossible_move(self):
+        record = GameRecord(15, [(7, 7), (7, 7)])
+        self.assertRaises(RecordFormatError, record.replay)
+
+
+class TestArchive(unittest.TestCase):
+    def test_round_trip(self):
+        records = [GameRecord(15, MOVES[:count]) for count in range(5)]
+        records.append(GameRecord(19, MOVES))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "games.bin")
+            write_records(path, records)
+
+            self.assertEqual(list(iter_records(path)), records)
+
+            ratings = [board.rating for _, board in replay_records(path)]
+            self.assertEqual(ratings,
+                             [record.replay().rating for record in records])
+
+    def test_not_an_archive(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "games.bin")
+            with open(path, "wb") as archive:
+                archive.write(b"PGBK\x01")
+
+            self.assertRaises(RecordFormatError, list, iter_records(path))
+
+    def test_arena_games(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "games.bin")
+            with RecordWriter(path) as writer:
+                first, second = run_arena("random", "rule", 2, size=9,
+                                          record_writer=writer)
+
+            records = list(iter_records(path))
+            self.assertEqual(len(records), 2)
+            self.assertEqual(sum(len(record.moves) for record in records),
+                             len(first.move_times) + len(second.move_times))
+
+
+if __name__ == '__main__':
+    unittest.main()
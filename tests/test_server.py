@@ -0,0 +1,183 @@
+import asyncio
+import json
+import unittest
+
+from pygomoku.server import GameServer
+
+TIMEOUT = 5  # Seconds
+
+
+class Client:
+    """
+    Talks to the server by JSON lines
+    """
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def send(self, request):
+        self.writer.write(json.dumps(request).encode() + b"\n")
+        await self.writer.drain()
+
+    async def receive(self):
+        line = await asyncio.wait_for(self.reader.readline(), TIMEOUT)
+        return json.loads(line)
+
+    async def receive_response(self):
+        """
+        Return the next response, skipping events
+        """
+        while True:
+            message = await self.receive()
+            if "event" not in message:
+                return message
+
+    async def request(self, request):
+        await self.send(request)
+        return await self.receive_response()
+
+
+class TestGameServer(unittest.TestCase):
+    def setUp(self):
+        self.server = GameServer(max_games=2, workers=2)
+
+    def tearDown(self):
+        self.server.close()
+
+    def run_client(self, talk):
+        """
+        Run the coroutine function `talk` with a Client connected to the
+        server
+        """
+        async def run():
+            tcp_server = await asyncio.start_server(
+                self.server.serve_connection, "127.0.0.1", 0)
+            port = tcp_server.sockets[0].getsockname()[1]
+            async with tcp_server:
+                client = Client(*await asyncio.open_connection(
+                    "127.0.0.1", port))
+                try:
+                    await talk(client)
+                finally:
+                    client.writer.close()
+                    await client.writer.wait_closed()
+
+                # The server closes the games of the client
+                for _ in range(100):
+                    if not self.server.games:
+                        break
+                    await asyncio.sleep(0.01)
+
+        asyncio.run(run())
+
+    def test_game(self):
+        async def talk(client):
+            response = await client.request(
+                {"op": "new", "size": 9, "difficulty": 1, "id": "a"})
+            self.assertEqual(response, {"ok": True, "id": "a", "game": 1})
+
+            await client.send({"op": "move", "game": 1, "move": "e5"})
+            self.assertEqual(await client.receive(), {"ok": True})
+            self.assertEqual(await client.receive(),
+                             {"event": "move", "game": 1, "move": "e5",
+                              "symbol": "cross", "winner": None})
+
+            ai_move = await client.receive()
+            self.assertEqual(ai_move["symbol"], "circle")
+
+            state = await client.request({"op": "state", "game": 1})
+            self.assertEqual(state["moves"], ["e5", ai_move["move"]])
+            self.assertTrue(state["cross_turn"])
+            self.assertTrue(state["player_turn"])
+
+            response = await client.request(
+                {"op": "move", "game": 1, "move": "e5"})
+            self.assertEqual(response["error"], "e5 is not empty")
+
+        self.run_client(talk)
+        self.assertEqual(self.server.games, {})
+
+    def test_ai_starts(self):
+        async def talk(client):
+            response = await client.request(
+                {"op": "new", "size": 9, "difficulty": 2,
+                 "player_starts": False})
+            # The AI moves after the game is announced
+            event = await client.receive()
+            self.assertEqual((event["game"], event["symbol"]),
+                             (response["game"], "cross"))
+
+        self.run_client(talk)
+
+    def test_ai_starts_sizes(self):
+        async def talk(client):
+            # The AI searches the empty board of both sizes
+            for size in (19, 9):
+                response = await client.request(
+                    {"op": "new", "size": size, "difficulty": 3,
+                     "player_starts": False})
+                event = await client.receive()
+                self.assertEqual(event["game"], response["game"])
+
+                state = await client.request(
+                    {"op": "state", "game": response["game"]})
+                self.assertEqual(len(state["moves"]), 1)
+                self.assertTrue(state["player_turn"])
+
+        self.run_client(talk)
+
+    def test_sparse(self):
+        self.server.close()
+        self.server = GameServer(max_games=2, workers=2, sparse=True)
+        self.test_game()
+
+    def test_invalid_new(self):
+        async def talk(client):
+            requests = [
+                ({"op": "new", "difficulty": True},
+                 "difficulty must be one of 1, 2, 3"),
+                ({"op": "new", "difficulty": 3.0},
+                 "difficulty must be one of 1, 2, 3"),
+                ({"op": "new", "size": 9.0}, "size must be from 5 to 26"),
+            ]
+            for request, error in requests:
+                response = await client.request(request)
+                self.assertEqual(response, {"ok": False, "error": error})
+
+        self.run_client(talk)
+        self.assertEqual(self.server.games, {})
+
+    def test_errors(self):
+        async def talk(client):
+            await client.send({"op": "new", "size": 9, "difficulty": 1})
+            await client.send({"op": "new", "size": 9, "difficulty": 1})
+            await client.receive_response()
+            await client.receive_response()
+
+            requests = [
+                ({"op": "new"}, "too many games"),
+                ({"op": "state", "game": 3}, "no game 3"),
+                ({"op": "state", "game": [1]}, "no game [1]"),
+                ({"op": "move", "game": 1, "move": "z1"},
+                 "'z1' is not a move on a board of size 9"),
+                ({"op": "resign"}, "unknown op 'resign'"),
+                ([], "a request must be an object"),
+            ]
+            for request, error in requests:
+                response = await client.request(request)
+                self.assertEqual(response, {"ok": False, "error": error})
+
+            await client.send({"op": "close", "game": 1})
+            self.assertEqual(await client.receive_response(), {"ok": True})
+            self.assertEqual(list(self.server.games), [2])
+
+            client.writer.write(b"{not json\n")
+            self.assertEqual(await client.receive_response(),
+                             {"ok": False, "error": "invalid JSON"})
+
+        self.run_client(talk)
+        self.assertEqual(self.server.games, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,192 @@
+import asyncio
+import unittest
+from concurrent.futures import CancelledError
+from threading import Event
+from time import monotonic, sleep
+
+from pygomoku.models.ai import AbstractAI, CombinedAI, RandomAI
+from pygomoku.models.bitboard import BitBoard
+from pygomoku.models.board import RatedBoard
+from pygomoku.models.game import Game
+from pygomoku.models.service import AIService, ProcessAIService
+from pygomoku.models.tile import TileModel
+
+TIMEOUT = 5  # Seconds
+
+
+class BlockingAI(AbstractAI):
+    """
+    Plays the first relevant move once released (or stopped)
+    """
+    def __init__(self, board):
+        super().__init__(board)
+        self.started = Event()
+        self.release = Event()
+        self.searches = 0
+
+    def get_move(self, cross_turn):
+        super().get_move(cross_turn)
+        self.searches += 1
+        self.started.set()
+        while not self.release.wait(0.01):
+            if self.stopped:
+                break
+        return self.board.relevant_moves()[0]
+
+
+class TestAIService(unittest.TestCase):
+    def setUp(self):
+        self.service = AIService(max_workers=2)
+        self.game = Game(9, service=self.service)
+        self.game.set_multiplayer(True)
+
+    def tearDown(self):
+        self.service.close()
+
+    def test_request_move(self):
+        future = self.service.request_move(RandomAI(self.game.board), True)
+        self.assertEqual(future.result(TIMEOUT), (4, 4))
+
+    def test_cancel_running(self):
+        ai = BlockingAI(self.game.board)
+        future = self.service.request_move(ai, True)
+        self.assertTrue(ai.started.wait(TIMEOUT))
+
+        self.assertTrue(future.cancel())
+        self.assertTrue(ai.stopped)
+        self.assertRaises(CancelledError, future.result)
+
+    def test_cancel_waiting(self):
+        # The second request of the same AI waits for the first one
+        ai = BlockingAI(self.game.board)
+        first = self.service.request_move(ai, True)
+        second = self.service.request_move(ai, True)
+        self.assertTrue(ai.started.wait(TIMEOUT))
+
+        second.cancel()
+        ai.release.set()
+        self.assertEqual(first.result(TIMEOUT), (4, 4))
+        self.assertEqual(ai.searches, 1)
+
+    def test_asyncio(self):
+        ai = RandomAI(self.game.board)
+        move = asyncio.run(self.service.get_move(ai, True))
+        self.assertEqual(move, (4, 4))
+
+    def test_asyncio_cancel(self):
+        ai = BlockingAI(self.game.board)
+
+        async def cancel_search():
+            task = asyncio.ensure_future(self.service.get_move(ai, True))
+            while not ai.started.is_set():
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(cancel_search())
+        self.assertTrue(ai.stopped)
+
+
+class TestProcessAIService(unittest.TestCase):
+    def setUp(self):
+        self.service = ProcessAIService(max_workers=1)
+
+    def tearDown(self):
+        self.service.close()
+
+    def test_request_move(self):
+        board = RatedBoard(9, view=False)
+        self.assertEqual(self.service.request_move(RandomAI(board), True)
+                         .result(TIMEOUT), (4, 4))
+
+        # The worker sets the board up by the moves
+        board.place(4, 4, TileModel.Symbols.CROSS)
+        board.place(4, 5, TileModel.Symbols.CIRCLE)
+        ai = CombinedAI(board, 2, board_cls=BitBoard)
+        x, y = self.service.request_move(ai, True).result(TIMEOUT)
+        self.assertTrue(board.is_empty(x, y))
+
+    def test_sizes(self):
+        # The empty boards of both sizes have the same hash
+        for size in (19, 9):
+            ai = CombinedAI(RatedBoard(size, view=False), 2,
+                            board_cls=BitBoard)
+            x, y = self.service.request_move(ai, True).result(TIMEOUT)
+            self.assertLess(max(x, y), size)
+
+    def test_game(self):
+        game = Game(9, service=self.service, view=False)
+        game.set_difficulty(3)
+        if game.player_turn:
+            game.play_move(4, 4)
+
+        game._ai_future.result(TIMEOUT)
+        deadline = monotonic() + TIMEOUT
+        while game._ai_future is not None and monotonic() < deadline:
+            sleep(0.001)
+        self.assertTrue(game.active.get())
+        self.assertIn(len(game.board.moves), (1, 2))
+
+    def test_closed(self):
+        self.service.close()
+        self.assertRaises(RuntimeError, self.service.request_move,
+                          RandomAI(RatedBoard(9, view=False)), True)
+
+
+class TestGameAI(unittest.TestCase):
+    def setUp(self):
+        self.service = AIService(max_workers=1)
+        self.game = Game(9, service=self.service)
+        self.game.set_difficulty(1)
+
+    def tearDown(self):
+        self.service.close()
+
+    def _wait_for_ai(self):
+        future = self.game._ai_future
+        if future is None:
+            return
+
+        future.result(TIMEOUT)
+        # The move is played by a callback after the result is set
+        deadline = monotonic() + TIMEOUT
+        while self.game._ai_future is future and monotonic() < deadline:
+            sleep(0.001)
+        with self.game._lock:
+            pass
+
+    def test_ai_plays(self):
+        self._wait_for_ai()  # If the AI started
+        moves = len(self.game.board.moves)
+
+        x, y = self.game.board.relevant_moves()[0]
+        self.game.play_move(x, y)
+        self._wait_for_ai()
+
+        self.assertEqual(len(self.game.board.moves), moves + 2)
+        self.assertTrue(self.game.active.get())
+
+    def test_new_game_discards_move(self):
+        self._wait_for_ai()
+        ai = BlockingAI(self.game.board)
+        self.game.ai = ai
+        if self.game.player_turn:
+            self.game.play_move(0, 0)
+        self.assertTrue(ai.started.wait(TIMEOUT))
+        future = self.game._ai_future
+
+        generation = self.game.generation
+        self.game.new_game()
+        ai.release.set()
+        self._wait_for_ai()  # If the AI starts the new game
+
+        self.assertTrue(future.cancelled())
+        self.assertEqual(self.game.generation, generation + 1)
+        # Only the move of the new game was played
+        self.assertEqual(len(self.game.board.moves),
+                         0 if self.game.player_turn else 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import random
+import unittest
+
+from pygomoku.models.ai import MinimaxAI
+from pygomoku.models.board import RatedBoard
+from pygomoku.models.constants import Direction
+from pygomoku.models.game import Game
+from pygomoku.models.record import GameRecord
+from pygomoku.models.sparse import SparseBoard
+from pygomoku.models.tile import TileModel
+
+CROSS = TileModel.Symbols.CROSS
+CIRCLE = TileModel.Symbols.CIRCLE
+
+
+class TestSparseBoard(unittest.TestCase):
+    def test_same_as_rated_board(self):
+        for seed in range(10):
+            rng = random.Random(seed)
+            rated = RatedBoard(15, view=False)
+            sparse = SparseBoard(15)
+
+            for turn in range(50):
+                if turn % 6 == 5:
+                    rated.undo()
+                    sparse.undo()
+                else:
+                    move = rng.choice(rated.relevant_moves())
+                    symbol = CROSS if turn % 2 == 0 else CIRCLE
+                    rated.place(*move, symbol)
+                    sparse.place(*move, symbol)
+
+                self.assertEqual(sparse.rating, rated.rating)
+                self.assertEqual(sparse.hash, rated.hash)
+                self.assertEqual(sparse.relevant_moves(),
+                                 rated.relevant_moves())
+                self.assertEqual(bool(sparse.win_info), bool(rated.win_info))
+
+    def test_off_board(self):
+        board = SparseBoard(9)
+        self.assertFalse(board.place(9, 0, CROSS))
+        self.assertFalse(board.place(-1, 0, CROSS))
+
+        board.place(0, 0, CROSS)
+        self.assertFalse(board.place(0, 0, CIRCLE))
+        self.assertTrue(all(board.on_board(x, y)
+                            for x, y in board.relevant_moves()))
+
+    def test_unbounded(self):
+        board = SparseBoard()
+        self.assertEqual(board.relevant_moves(), [(0, 0)])
+
+        for y in range(-3, 1):
+            board.place(-100, y, CROSS)
+        self.assertFalse(board.win_info)
+        self.assertIn((-100, -4), board.relevant_moves())
+
+        position_hash = board.hash
+        board.place(-100, -4, CROSS)
+        self.assertNotEqual(board.hash, position_hash)
+        self.assertEqual(board.win_info, board.check_win())
+
+        cell, direction, symbol = board.win_info
+        self.assertEqual((cell.x, cell.y), (-100, -4))
+        self.assertEqual(direction, Direction.HORIZONTAL)
+        self.assertEqual(symbol, CROSS)
+
+        board.undo()
+        self.assertFalse(board.win_info)
+        self.assertEqual(board.hash, position_hash)
+
+    def test_from_board(self):
+        rated = RatedBoard(15)
+        for i, (x, y) in enumerate([(7, 7), (7, 8), (8, 8), (6, 6)]):
+            rated.place(x, y, CROSS if i % 2 == 0 else CIRCLE)
+
+        sparse = SparseBoard.from_board(rated)
+        self.assertEqual(sparse.rating, rated.rating)
+        self.assertEqual(sparse.hash, rated.hash)
+        self.assertEqual(sparse.moves, rated.moves)
+
+        # Also of unbounded boards
+        unbounded = SparseBoard()
+        unbounded.place(-50, 70, CROSS)
+        copy = SparseBoard.from_board(unbounded)
+        self.assertEqual((copy.size, copy.moves), (None, [(-50, 70)]))
+        self.assertEqual(copy.hash, unbounded.hash)
+
+    def test_game(self):
+        game = Game(9, sparse=True)
+        game.set_multiplayer(True)
+        for x in range(5):
+            self.assertTrue(game.play_move(x, 0))
+            if x < 4:
+                self.assertTrue(game.play_move(x, 1))
+
+        board = game.board
+        self.assertEqual(board.moves[:3], [(0, 0), (0, 1), (1, 0)])
+        self.assertTrue(board.win_info)
+        self.assertFalse(game.active.get())
+        self.assertEqual(GameRecord.from_board(board).moves, board.moves)
+
+        game.new_game()
+        self.assertEqual(board.moves, [])
+
+    def test_search(self):
+        board = SparseBoard()
+        for i, (x, y) in enumerate([(50, 50), (50, 51), (51, 51),
+                                    (49, 49), (52, 52)]):
+            board.place(x, y, CROSS if i % 2 == 0 else CIRCLE)
+
+        x, y = MinimaxAI(board, 2).get_move(False)
+        self.assertTrue(board.is_empty(x, y))
+        self.assertEqual(len(board._move_stack), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+
+from pygomoku.models.ai import CombinedAI
+from pygomoku.models.bitboard import BitBoard
+from pygomoku.models.board import RatedBoard
+from pygomoku.models.threats import VCFSolver
+from pygomoku.models.tile import TileModel
+
+CROSS = TileModel.Symbols.CROSS
+CIRCLE = TileModel.Symbols.CIRCLE
+
+
+def place_moves(board, moves):
+    for i, (x, y) in enumerate(moves):
+        board.place(x, y, CROSS if i % 2 == 0 else CIRCLE)
+    return board
+
+
+class TestVCFSolver(unittest.TestCase):
+    # Cross (to move) wins by 3 continuous fours
+    MOVES = [(6, 6), (2, 6), (2, 3), (5, 5), (4, 6), (4, 2), (3, 5), (2, 2),
+             (3, 4), (3, 3), (2, 5), (4, 3), (3, 6), (3, 2)]
+
+    def test_finds_win(self):
+        board = place_moves(BitBoard(9), self.MOVES)
+        line = VCFSolver(board).solve(CROSS)
+
+        self.assertIsNotNone(line)
+        self.assertEqual(len(line) % 2, 1)
+        self.assertEqual(len(board._move_stack), len(self.MOVES))
+
+        # Every attacker move but the last makes a four
+        for i, (x, y) in enumerate(line):
+            symbol = CROSS if i % 2 == 0 else CIRCLE
+            self.assertFalse(board.win_info)
+            board.place(x, y, symbol)
+            if symbol == CROSS and i < len(line) - 1:
+                self.assertTrue(board.threat_cells(CROSS, 4))
+
+        self.assertEqual(board.win_info[2], CROSS)
+
+    def test_no_win(self):
+        board = place_moves(BitBoard(15), [(7, 7), (7, 8), (8, 8)])
+        self.assertIsNone(VCFSolver(board).solve(CROSS))
+
+    def test_blocks_defender_four(self):
+        board = place_moves(BitBoard(9), self.MOVES)
+        # Circle makes a four, blocking it at (4, 4) is not a four
+        board.place(2, 0, CROSS)
+        board.place(2, 1, CIRCLE)
+        board.place(8, 8, CROSS)
+        board.place(1, 1, CIRCLE)
+
+        self.assertEqual(board.mask_positions(board.threat_cells(CIRCLE, 4)),
+                         [(4, 4)])
+        self.assertIsNone(VCFSolver(board).solve(CROSS))
+
+    def test_combined_ai_plays_vcf(self):
+        board = place_moves(RatedBoard(9), self.MOVES)
+        line = VCFSolver.from_board(board).solve(CROSS)
+
+        ai = CombinedAI(board, 2)
+        self.assertEqual(ai.get_move(True), line[0])
+        self.assertGreater(ai.stats.threat_nodes, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import unittest
+
+from pygomoku.models.ai import MinimaxAI
+from pygomoku.models.bitboard import BitBoard
+from pygomoku.models.board import RatedBoard
+from pygomoku.models.cache import EvaluationCache
+from pygomoku.models.constants import Bound
+from pygomoku.models.sparse import SparseBoard
+from pygomoku.models.tile import TileModel
+from pygomoku.models.transposition import TranspositionTable
+
+
+class TestZobristHash(unittest.TestCase):
+    def setUp(self) -> None:
+        self.board = RatedBoard(15)
+
+    def test_empty(self):
+        self.assertEqual(self.board.hash, 0)
+
+    def test_undo(self):
+        self.board.place(7, 7, TileModel.Symbols.CROSS)
+        position_hash = self.board.hash
+
+        self.board.place(7, 8, TileModel.Symbols.CIRCLE)
+        self.assertNotEqual(self.board.hash, position_hash)
+
+        self.board.undo()
+        self.assertEqual(self.board.hash, position_hash)
+
+    def test_transposition(self):
+        self.board.place(7, 7, TileModel.Symbols.CROSS)
+        self.board.place(7, 8, TileModel.Symbols.CIRCLE)
+        self.board.place(8, 8, TileModel.Symbols.CROSS)
+
+        other = RatedBoard(15)
+        other.place(8, 8, TileModel.Symbols.CROSS)
+        other.place(7, 8, TileModel.Symbols.CIRCLE)
+        other.place(7, 7, TileModel.Symbols.CROSS)
+
+        self.assertEqual(self.board.hash, other.hash)
+
+    def test_symbols_differ(self):
+        other = RatedBoard(15)
+        self.board.place(7, 7, TileModel.Symbols.CROSS)
+        other.place(7, 7, TileModel.Symbols.CIRCLE)
+
+        self.assertNotEqual(self.board.hash, other.hash)
+
+    def test_bitboard(self):
+        self.board.place(7, 7, TileModel.Symbols.CROSS)
+        self.board.place(3, 9, TileModel.Symbols.CIRCLE)
+
+        bitboard = BitBoard.from_board(self.board)
+        self.assertEqual(bitboard.hash, self.board.hash)
+        self.assertEqual(self.board.clone().hash, self.board.hash)
+
+    def test_hash_after(self):
+        self.board.place(7, 7, TileModel.Symbols.CROSS)
+        for board in (self.board, BitBoard.from_board(self.board),
+                      SparseBoard.from_board(self.board), SparseBoard()):
+            position_hash = board.hash_after(6, 8, TileModel.Symbols.CIRCLE)
+            board.place(6, 8, TileModel.Symbols.CIRCLE)
+            self.assertEqual(board.hash, position_hash)
+
+
+class TestTranspositionTable(unittest.TestCase):
+    def setUp(self) -> None:
+        self.table = TranspositionTable(capacity=2)
+
+    def test_store(self):
+        self.table.store(1, 2, Bound.EXACT, 10, (0, 0))
+
+        entry = self.table.get(1)
+        self.assertEqual(entry.depth, 2)
+        self.assertEqual(entry.bound, Bound.EXACT)
+        self.assertEqual(entry.rating, 10)
+        self.assertEqual(entry.move, (0, 0))
+        self.assertIsNone(self.table.get(2))
+
+    def test_deeper_is_kept(self):
+        self.table.store(1, 3, Bound.EXACT, 10, (0, 0))
+        self.table.store(1, 2, Bound.LOWER, 20, (1, 1))
+        self.assertEqual(self.table.get(1).depth, 3)
+
+        self.table.store(1, 3, Bound.UPPER, 30, (2, 2))
+        self.assertEqual(self.table.get(1).rating, 30)
+
+    def test_eviction(self):
+        self.table.store(1, 1, Bound.EXACT, 10, (0, 0))
+        self.table.store(2, 1, Bound.EXACT, 20, (0, 0))
+        self.table.store(1, 2, Bound.EXACT, 30, (0, 0))  # Refreshes 1
+        self.table.store(3, 1, Bound.EXACT, 40, (0, 0))
+
+        self.assertEqual(len(self.table), 2)
+        self.assertIsNone(self.table.get(2))
+        self.assertIsNotNone(self.table.get(1))
+        self.assertIsNotNone(self.table.get(3))
+
+    def test_disabled(self):
+        table = TranspositionTable(capacity=0)
+        table.store(1, 1, Bound.EXACT, 10, (0, 0))
+
+        self.assertEqual(len(table), 0)
+        self.assertIsNone(table.get(1))
+
+
+class TestEvaluationCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache = EvaluationCache(capacity=2)
+
+    def test_counters(self):
+        self.assertIsNone(self.cache.get(1))
+        self.cache.store(1, 0)
+        self.assertEqual(self.cache.get(1), 0)
+
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        self.assertEqual(self.cache.hit_rate, 0.5)
+
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.hits, 0)
+
+    def test_least_recently_used_evicted(self):
+        self.cache.store(1, 10)
+        self.cache.store(2, 20)
+        self.cache.get(1)  # Now 2 is the least recently used
+        self.cache.store(3, 30)
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertIsNone(self.cache.get(2))
+        self.assertEqual(self.cache.get(1), 10)
+        self.assertEqual(self.cache.get(3), 30)
+
+    def test_search(self):
+        board = RatedBoard(15)
+        board.place(7, 7, TileModel.Symbols.CROSS)
+        board.place(7, 8, TileModel.Symbols.CIRCLE)
+
+        uncached = MinimaxAI(board, 3, board_cls=BitBoard,
+                             evaluation_cache=EvaluationCache(capacity=0))
+        ai = MinimaxAI(board, 3, board_cls=BitBoard)
+        move = ai.get_move(True)
+
+        self.assertEqual(move, uncached.get_move(True))
+        self.assertGreater(ai.stats.evaluation_cache_hits, 0)
+        self.assertEqual(uncached.stats.evaluation_cache_hits, 0)
+        self.assertLessEqual(len(ai.evaluation_cache),
+                             ai.evaluation_cache.capacity)
+
+
+if __name__ == '__main__':
+    unittest.main()